@@ -10,16 +10,18 @@ import pandas as pd
 from loguru import logger
 
 from ebm.cmd import prepare_main
+from ebm.cmd.compile_input import compile_input
 from ebm.cmd.helpers import configure_json_log, configure_loglevel, load_environment_from_dotenv, open_file
 from ebm.cmd.initialize import create_output_directory, init, list_available_datasets
 from ebm.cmd.migrate import migrate_directories
-from ebm.cmd.pipeline import export_energy_model_reports
+from ebm.cmd.pipeline import export_energy_model_reports, export_excel_reports
 from ebm.cmd.result_handler import EbmDefaultHandler, append_result, transform_model_to_horizontal
 from ebm.cmd.run_calculation import validate_years
 from ebm.model.building_category import BuildingCategory
 from ebm.model.database_manager import DatabaseManager
 from ebm.model.enums import ReturnCode
 from ebm.model.file_handler import FileHandler
+from ebm.services.columnar import COLUMNAR_SUFFIXES, MANIFEST
 
 df = None
 
@@ -51,6 +53,16 @@ def main() -> tuple[ReturnCode, pd.DataFrame | None]:
     if arguments.step == 'list-input':
         list_available_datasets()
         return ReturnCode.OK, None
+    if arguments.step == 'export-excel':
+        output_path = default_path.parent if arguments.output_file == default_path else arguments.output_file
+        manifest_file = output_path / MANIFEST if output_path.is_dir() else output_path
+        if not manifest_file.is_file():
+            logger.error(f'{manifest_file} not found. Use energy-use with --output-format parquet, arrow or csv to write it')
+            return ReturnCode.FILE_NOT_ACCESSIBLE, None
+        for file_to_open in export_excel_reports(manifest_file, reports=arguments.report):
+            if arguments.open or os.environ.get('EBM_ALWAYS_OPEN', 'FALSE').upper() == 'TRUE':
+                open_file(file_to_open)
+        return ReturnCode.OK, None
     
     # Make local variable from arguments for clarity
     building_categories = [BuildingCategory.from_string(b_c) for b_c in arguments.categories]
@@ -119,13 +131,21 @@ Use `<program name> create-input --input={input_directory}` to create an input d
     if database_manager.file_handler.is_calibrated():
         logger.info(f'Input directory "{input_directory}" contains calibration files', directory=database_manager.file_handler.input_directory.name)
 
-    database_manager.file_handler.validate_input_files()
+    if arguments.step == 'compile-input':
+        snapshot_directory = compile_input(database_manager.file_handler, revalidate=arguments.revalidate)
+        logger.success('Wrote compiled input to {snapshot_directory}', snapshot_directory=snapshot_directory)
+        return ReturnCode.OK, None
+
+    database_manager.file_handler.validate_input_files(revalidate=arguments.revalidate)
 
     end_year = arguments.end_year if arguments.end_year else database_manager.get_population_forecast_end_year()
     model_years = validate_years(start_year=arguments.start_year, end_year=end_year)
 
     step_choice = arguments.step
     output_file = arguments.output_file
+    output_format = arguments.output_format
+    if output_format and step_choice != 'energy-use' and str(output_file) != '-':
+        output_file = output_file.with_suffix(COLUMNAR_SUFFIXES.get(output_format, '.xlsx'))
 
     if step_choice == 'energy-use':
         try:
@@ -154,7 +174,8 @@ Use `<program name> create-input --input={input_directory}` to create an input d
     files_to_open = [output_file]
 
     if step_choice == 'energy-use':
-        files_to_open = export_energy_model_reports(model_years, database_manager, output_directory)
+        files_to_open = export_energy_model_reports(model_years, database_manager, output_directory, reports=arguments.report,
+                                                    output_format=output_format or 'xlsx', csv_delimiter=csv_delimiter)
     else:
         model = default_handler.extract_model(model_years, building_categories, database_manager, step_choice)
 
@@ -177,7 +198,7 @@ Use `<program name> create-input --input={input_directory}` to create an input d
             append_result(output_file, df, f'{sheet_name_prefix} category')
             logger.success('Wrote {filename}', filename=output_file)
         else:
-            default_handler.write_tqdm_result(output_file, model, csv_delimiter)
+            default_handler.write_tqdm_result(output_file, model, csv_delimiter, output_format=output_format)
 
     for file_to_open in files_to_open:
         if arguments.open or os.environ.get('EBM_ALWAYS_OPEN', 'FALSE').upper() == 'TRUE':
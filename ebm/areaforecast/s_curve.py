@@ -1,8 +1,12 @@
+import os
+
 import numpy as np
 import pandas as pd
 from loguru import logger
 from pandas import Series
 
+from ebm.areaforecast.s_curve_cache import s_curve_rate_cache
+from ebm.model.array_operations import kahan_cumsum
 from ebm.model.building_condition import BuildingCondition
 from ebm.model.data_classes import YearRange
 
@@ -328,7 +332,7 @@ def pad_s_curve_age(s_curves: pd.DataFrame, scurve_parameters: pd.DataFrame) ->
     return df_never_share
 
 
-def scurve_from_s_curve_parameters(scurve_parameters: pd.DataFrame) -> pd.DataFrame:
+def scurve_from_s_curve_parameters(scurve_parameters: pd.DataFrame, use_cache: bool | None = None) -> pd.DataFrame:
     """
     Create scurve new dataframe from scurve_parameters using ebm.model.area.building_condition_scurves and
         ebm.model.area.building_condition_accumulated_scurves
@@ -338,6 +342,9 @@ def scurve_from_s_curve_parameters(scurve_parameters: pd.DataFrame) -> pd.DataFr
     Parameters
     ----------
     scurve_parameters : pandas.DataFrame
+    use_cache : bool, optional
+        Reuse rates from ebm.areaforecast.s_curve_cache for parameter rows that are unchanged. When use_cache is None
+            the environment variable EBM_S_CURVE_CACHE is used. The cache is enabled unless EBM_S_CURVE_CACHE is FALSE.
 
     Notes
     -----
@@ -347,13 +354,41 @@ def scurve_from_s_curve_parameters(scurve_parameters: pd.DataFrame) -> pd.DataFr
     -------
     pandas.DataFrame
     """
+    if use_cache is None:
+        use_cache = os.environ.get('EBM_S_CURVE_CACHE', 'TRUE').upper() != 'FALSE'
     df = scurve_rates(translate_scurve_parameter_to_shortform(scurve_parameters))
+    if use_cache and s_curve_rate_cache.supports(df):
+        return _scurve_from_cached_rates(df)
+
     df_age = scurve_rates_with_age(df)
 
     df = scurve_rates_to_long(df_age.query('age<=130 or last_age==150'))
     return df
 
 
+def _scurve_rate_arrays(s_curve_rates: pd.DataFrame, max_age: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Calculate rate and rate_acc by age for each row in s_curve_rates, as filtered by scurve_from_s_curve_parameters"""
+    df_age = scurve_rates_with_age(s_curve_rates, max_age=max_age).query('age<=130 or last_age==150')
+    rows = df_age.groupby(by='index', sort=False, observed=True)
+    return [(row.rate.to_numpy(), row.rate_acc.to_numpy()) for _, row in rows]
+
+
+def _scurve_from_cached_rates(s_curve_rates: pd.DataFrame) -> pd.DataFrame:
+    """Same as scurve_from_s_curve_parameters with rates from s_curve_rate_cache"""
+    rates = s_curve_rate_cache.get(s_curve_rates, _max_age(s_curve_rates), _scurve_rate_arrays)
+    lengths = [len(rate) for rate, _ in rates]
+    building_category = np.repeat(s_curve_rates.building_category.to_numpy(), lengths)
+    building_condition = np.repeat(s_curve_rates.building_condition.to_numpy(), lengths)
+    age = np.concatenate([np.arange(1, length + 1) for length in lengths])
+    share = pd.DataFrame({'building_category': building_category, 'age': age,
+                          'building_condition': building_condition,
+                          'scurve': np.concatenate([rate for rate, _ in rates])})
+    share_acc = pd.DataFrame({'building_category': building_category, 'age': age,
+                              'building_condition': building_condition + '_acc',
+                              'scurve': np.concatenate([rate_acc for _, rate_acc in rates])})
+    return pd.concat([share, share_acc]).set_index(['building_category', 'age', 'building_condition'])
+
+
 def accumulate_demolition(s_curves_long: pd.DataFrame, years: YearRange) -> pd.DataFrame:
     """
     Sets demolition in year 0 (2020) to 0.0 and sums up the yearly demolition using years
@@ -369,7 +404,7 @@ def accumulate_demolition(s_curves_long: pd.DataFrame, years: YearRange) -> pd.D
     """
     demolition_acc = s_curves_long
     demolition_acc.loc[demolition_acc.query(f'year<={years.start}').index, 'demolition'] = 0.0
-    demolition_acc['demolition_acc'] = demolition_acc.groupby(by=['building_category', 'building_code'])[['demolition']].cumsum()[
+    demolition_acc['demolition_acc'] = demolition_acc.groupby(by=['building_category', 'building_code'], observed=True)[['demolition']].cumsum()[
         ['demolition']]
 
     return demolition_acc
@@ -472,17 +507,76 @@ def transform_to_long(s_curves_by_condition: pd.DataFrame) -> pd.DataFrame:
 def calculate_s_curves(scurve_parameters: pd.DataFrame,
                        building_code_parameters: pd.DataFrame,
                        years: YearRange,
+                       engine: str = 'pandas',
+                       diagnostics: bool | None = None,
                        **kwargs: pd.DataFrame|pd.Series) -> pd.DataFrame:
+    """
+    Calculate the share of each building condition by building_category, building_code and year.
+
+    Parameters
+    ----------
+    scurve_parameters : pandas.DataFrame
+    building_code_parameters : pandas.DataFrame
+    years : YearRange
+    engine : str, default 'pandas'
+        'pandas' or 'numpy', see normalize_scurve_conditions
+    diagnostics : bool, optional
+        Include the intermediate s-curves in the result. When diagnostics is None the environment variable
+            EBM_S_CURVE_DIAGNOSTICS is used. Diagnostics are disabled unless EBM_S_CURVE_DIAGNOSTICS is TRUE.
+    kwargs :
+        s_curves_with_building_code, replace_s_curves and the overrides accepted by normalize_scurve_conditions
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    if diagnostics is None:
+        diagnostics = os.environ.get('EBM_S_CURVE_DIAGNOSTICS', 'FALSE').upper() == 'TRUE'
 
     if 's_curves_with_building_code' in kwargs:
         s_curves_with_building_code = kwargs.get('s_curves_with_building_code')
     else:
         s_curves_with_building_code = calculate_scurves_with_building_code(building_code_parameters, scurve_parameters, years, **kwargs)
 
-    return normalize_scurve_conditions(s_curves_with_building_code=s_curves_with_building_code, years=years, kwargs=kwargs)
+    return normalize_scurve_conditions(s_curves_with_building_code=s_curves_with_building_code, years=years,
+                                       engine=engine, diagnostics=diagnostics, kwargs=kwargs)
 
 
-def normalize_scurve_conditions(s_curves_with_building_code, years, **kwargs):
+def normalize_scurve_conditions(s_curves_with_building_code, years, engine: str = 'pandas', diagnostics: bool = False, **kwargs):
+    """
+    Turn accumulated s-curves for small_measure, renovation and demolition into shares per building condition.
+
+    Parameters
+    ----------
+    s_curves_with_building_code : pandas.DataFrame
+        s-curves indexed by building_category, building_code and year
+    years : YearRange
+    engine : str, default 'pandas'
+        'pandas' or 'numpy'. The numpy engine does the same calculation on dense
+        (building_category, building_code, year) arrays and returns an identical dataframe. It falls back to pandas
+        for input it does not support, like the override keyword arguments.
+    diagnostics : bool, default False
+        When False only the building condition shares and s_curve_demolition, the columns used by
+        calculate_all_area, are returned. When True the intermediate s-curves, s_curve_sum and age are included.
+    kwargs :
+        Optional overrides: small_measure_never_share, cumulative_small_measure and s_curve_small_measure_max
+
+    Returns
+    -------
+    pandas.DataFrame
+        shares per building condition, and with diagnostics the intermediate s-curves used to calculate them
+
+    See Also
+    --------
+    normalize_scurve_conditions_numpy
+    """
+    if engine not in ('pandas', 'numpy'):
+        msg = f'Unknown engine {engine}. Expected pandas or numpy.'
+        raise ValueError(msg)
+    if engine == 'numpy':
+        if _supports_numpy_engine(s_curves_with_building_code, years, kwargs):
+            return normalize_scurve_conditions_numpy(s_curves_with_building_code, years, diagnostics=diagnostics)
+        logger.debug('normalize_scurve_conditions falling back to pandas engine')
     s_curves_with_demolition_acc = accumulate_demolition(s_curves_with_building_code, years)
     s_curve_demolition = s_curves_with_building_code.demolition
     s_curve_cumulative_demolition = transform_to_cumulative_demolition(s_curves_with_demolition_acc, years)
@@ -515,6 +609,8 @@ def normalize_scurve_conditions(s_curves_with_building_code, years, **kwargs):
                                                    s_curve_renovation_and_small_measure,
                                                    s_curve_small_measure,
                                                    s_curve_demolition)
+    if not diagnostics:
+        return s_curves_by_condition
     s_curves_by_condition['original_condition'] = s_curve_original_condition
     s_curves_by_condition['demolition'] = s_curve_cumulative_demolition
     s_curves_by_condition['small_measure'] = s_curve_small_measure
@@ -538,6 +634,117 @@ def normalize_scurve_conditions(s_curves_with_building_code, years, **kwargs):
     return s_curves_by_condition
 
 
+def _supports_numpy_engine(s_curves_with_building_code: pd.DataFrame, years: YearRange, kwargs: dict) -> bool:
+    """
+    The numpy engine requires a sorted index without missing values, holding exactly the years in years, and no
+    overrides.
+    """
+    overrides = {'small_measure_never_share', 'cumulative_small_measure', 's_curve_small_measure_max'}
+    if overrides.intersection(kwargs):
+        return False
+    index = s_curves_with_building_code.index
+    if index.nlevels != 3 or not index.is_monotonic_increasing or any((c == -1).any() for c in index.codes):
+        return False
+    if not index.levels[2].is_monotonic_increasing:
+        return False
+    return set(index.get_level_values(2)) == set(years.year_range)
+
+
+def _clip_lower_zero(values: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(values) | (values >= 0.0), values, 0.0)
+
+
+def normalize_scurve_conditions_numpy(s_curves_with_building_code: pd.DataFrame, years: YearRange,
+                                      diagnostics: bool = False) -> pd.DataFrame:
+    """
+    Numpy engine for normalize_scurve_conditions.
+
+    Every column is scattered into a dense (building_category, building_code, year) array using the index codes. The
+    calculation is done on the arrays, and the result is gathered back into the index of s_curves_with_building_code.
+    Unlike the pandas engine the input dataframe is left unchanged.
+
+    Parameters
+    ----------
+    s_curves_with_building_code : pandas.DataFrame
+        s-curves indexed by building_category, building_code and year
+    years : YearRange
+    diagnostics : bool, default False
+        Include the intermediate s-curves
+
+    Returns
+    -------
+    pandas.DataFrame
+        The same dataframe as normalize_scurve_conditions(engine='pandas')
+    """
+    index = s_curves_with_building_code.index
+    shape = tuple(len(level) for level in index.levels)
+    codes = tuple(index.codes)
+
+    def to_dense(column: str) -> np.ndarray:
+        dense = np.full(shape, np.nan)
+        dense[codes] = s_curves_with_building_code[column].to_numpy(dtype='float64')
+        return dense
+
+    demolition = to_dense('demolition')
+    demolition[..., index.levels[2] <= years.start] = 0.0
+    cumulative_demolition_acc = kahan_cumsum(demolition)
+    cumulative_demolition = np.nan_to_num(cumulative_demolition_acc, nan=0.0)
+
+    renovation_never_share = to_dense('renovation_never_share')
+    small_measure_never_share = to_dense('small_measure_never_share')
+    cumulative_small_measure_ = np.nan_to_num(to_dense('small_measure_acc'), nan=0.0)
+    cumulative_renovation_ = np.nan_to_num(to_dense('renovation_acc'), nan=0.0)
+
+    renovation_max_ = 1.0 - cumulative_demolition - renovation_never_share
+    small_measure_max_ = 1.0 - cumulative_demolition - small_measure_never_share
+    small_measure_total = _clip_lower_zero(np.where(small_measure_max_ < cumulative_small_measure_,
+                                                    small_measure_max_, cumulative_small_measure_))
+    renovation_total = _clip_lower_zero(np.where(renovation_max_ < cumulative_renovation_,
+                                                 renovation_max_, cumulative_renovation_))
+    scurve_total = _clip_lower_zero(small_measure_total + renovation_total)
+    renovation_from_small_measure_ = _clip_lower_zero(renovation_max_ - small_measure_total)
+    renovation = np.where(scurve_total < renovation_max_, renovation_total, renovation_from_small_measure_)
+    renovation_and_small_measure_ = renovation_total - renovation
+    small_measure_ = small_measure_total - renovation_and_small_measure_
+    original_condition_ = (1.0 - cumulative_demolition - renovation - renovation_and_small_measure_ -
+                           small_measure_)
+    if not diagnostics:
+        columns = {
+            'original_condition': original_condition_,
+            'demolition': cumulative_demolition,
+            'small_measure': small_measure_,
+            'renovation': renovation,
+            'renovation_and_small_measure': renovation_and_small_measure_,
+            's_curve_demolition': demolition,
+        }
+        return pd.DataFrame({name: values[codes] for name, values in columns.items()}, index=index)
+    s_curve_sum = (original_condition_ + cumulative_demolition + small_measure_ + renovation +
+                   renovation_and_small_measure_)
+
+    columns = {
+        'original_condition': original_condition_,
+        'demolition': cumulative_demolition,
+        'small_measure': small_measure_,
+        'renovation': renovation,
+        'renovation_and_small_measure': renovation_and_small_measure_,
+        's_curve_demolition': demolition,
+        's_curve_sum': s_curve_sum,
+        's_curve_cumulative_demolition': cumulative_demolition,
+        's_curve_small_measure_total': small_measure_total,
+        's_curve_small_measure_max': small_measure_max_,
+        's_curve_cumulative_small_measure': cumulative_small_measure_,
+        's_curve_small_measure_never_share': small_measure_never_share,
+        'scurve_total': scurve_total,
+        's_curve_renovation_max': renovation_max_,
+        's_curve_cumulative_renovation': cumulative_renovation_,
+        's_curve_renovation_total': renovation_total,
+        'renovation_never_share': renovation_never_share,
+    }
+    s_curves_by_condition = pd.DataFrame({name: values[codes] for name, values in columns.items()}, index=index)
+    s_curves_by_condition['age'] = s_curves_with_building_code['age']
+    return s_curves_by_condition
+
+
 def calculate_scurves_with_building_code(building_code_parameters, scurve_parameters, years, **kwargs):
     # Transform s_curve_parameters into long form with each row representing a building_condition at a certain age
     s_curves = scurve_from_s_curve_parameters(scurve_parameters)
@@ -622,9 +829,13 @@ def scurve_rates_to_long(scurve_rates: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def scurve_rates_with_age(df: pd.DataFrame) -> pd.DataFrame:
+def _max_age(df: pd.DataFrame) -> int:
+    return max(int(df.total_span.max()), 130)+1
+
+
+def scurve_rates_with_age(df: pd.DataFrame, max_age: int | None = None) -> pd.DataFrame:
     # Define age range
-    max_age = max(int(df.total_span.max()), 130)+1
+    max_age = _max_age(df) if max_age is None else max_age
     ages = np.arange(1, max_age)  # 1 to 129
 
     # Expand DataFrame for each age
@@ -660,7 +871,7 @@ def scurve_rates_with_age(df: pd.DataFrame) -> pd.DataFrame:
     df['rate'] = np.select(conditions, choices, default=0.0)
 
     # Compute cumulative sum of rates by category and condition
-    df['rate_acc'] = df.groupby(by=['building_category', 'building_condition'])[['rate']].cumsum()
+    df['rate_acc'] = df.groupby(by=['building_category', 'building_condition'], observed=True)[['rate']].cumsum()
 
     # Reset index and set multi-index
     df = df.reset_index().set_index(['building_category', 'building_condition', 'age'])
@@ -668,6 +879,86 @@ def scurve_rates_with_age(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+BATCH_PARAMETERS = ('earliest_age', 'average_age', 'rush_period', 'last_age', 'rush_share', 'never_share')
+
+
+def scurve_total_span(parameters: np.ndarray) -> np.ndarray:
+    """
+    Age where the s-curves in parameters end, as total_span in scurve_rates.
+
+    Parameters
+    ----------
+    parameters : np.ndarray
+        N x 6 array with the columns in BATCH_PARAMETERS
+
+    Returns
+    -------
+    np.ndarray
+        total_span of each row
+    """
+    earliest_age, average_age, rush_period, last_age = (parameters[:, i] for i in range(4))
+    pre_period = (average_age - (rush_period / 2)) - earliest_age
+    post_period = last_age - (average_age + (rush_period / 2))
+    return earliest_age + pre_period + rush_period + post_period
+
+
+def scurve_rates_batch(parameters: np.ndarray, max_age: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the rate and accumulated rate by age for many s-curves in one pass.
+
+    Gives the same rates as scurve_rates_with_age without building a dataframe for each s-curve, which makes it
+    suitable for sensitivity studies with thousands of parameter variations.
+
+    Parameters
+    ----------
+    parameters : np.ndarray
+        N x 6 array with earliest_age, average_age, rush_period, last_age, rush_share and never_share (BATCH_PARAMETERS)
+    max_age : int, optional
+        Upper bound (exclusive) of ages calculated. Default is one more than the largest total_span, at least 131.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        rate and accumulated rate. Both are N x (max_age - 1) arrays where column j holds age j + 1.
+
+    Raises
+    ------
+    ValueError
+        When parameters is not an N x 6 array
+
+    Examples
+    --------
+    >>> rate, rate_acc = scurve_rates_batch(np.array([[3, 23, 30, 80, 0.8, 0.01], [3, 30, 20, 80, 0.8, 0.01]]))
+    >>> rate.shape
+    (2, 130)
+    """
+    parameters = np.asarray(parameters, dtype='float64')
+    if parameters.ndim != 2 or parameters.shape[1] != len(BATCH_PARAMETERS):
+        msg = f'Expected N x {len(BATCH_PARAMETERS)} array of {", ".join(BATCH_PARAMETERS)}. Got shape {parameters.shape}'
+        raise ValueError(msg)
+    if max_age is None:
+        max_age = max(int(scurve_total_span(parameters).max(initial=0)), 130) + 1
+    earliest_age, average_age, rush_period, last_age, rush_share, never_share = (
+        parameters[:, i, np.newaxis] for i in range(len(BATCH_PARAMETERS)))
+    age = np.arange(1, max_age)[np.newaxis, :]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pre_rush_rate = (1 - rush_share - never_share) * (0.5 / (average_age - earliest_age - (rush_period / 2)))
+        rush_rate = rush_share / rush_period
+        post_rush_rate = (1 - rush_share - never_share) * (0.5 / (last_age - average_age - (rush_period / 2)))
+
+    conditions = [
+        age < earliest_age,
+        age < (average_age - rush_period / 2),
+        age < (average_age + rush_period / 2),
+        age < last_age,
+    ]
+    choices = [0.0, pre_rush_rate, rush_rate, post_rush_rate]
+    rate = np.select(conditions, [np.broadcast_to(c, conditions[0].shape) for c in choices], default=0.0)
+
+    return rate, kahan_cumsum(rate)
+
+
 def scurve_rates(s_curve_parameters: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate s-curve rate from dataframe.
@@ -884,7 +1175,7 @@ def shift_building_condition_rates(s_curve_building_code:pd.DataFrame,
         period = YearRange(minimum_year, period.end)
     pause_length = len(period)
 
-    shifted_cr = cr.loc[pd.IndexSlice[:, :, period.start:], conditions].groupby(level=[0, 1]).shift(pause_length)
+    shifted_cr = cr.loc[pd.IndexSlice[:, :, period.start:], conditions].groupby(level=[0, 1], observed=True).shift(pause_length)
     cr.loc[pd.IndexSlice[:, :, period.start:], conditions] = shifted_cr.fillna(0)
 
     return cr
@@ -960,7 +1251,7 @@ def accumulate_building_condition_rates(building_condition_rates: pd.DataFrame)
         df.loc[pd.IndexSlice[:, :, next_year:], condition_columns].to_numpy()
     )
 
-    df[acc_columns] = df.groupby(level=[0, 1])[temp_columns].cumsum()
+    df[acc_columns] = df.groupby(level=[0, 1], observed=True)[temp_columns].cumsum()
 
     return df[condition_columns + acc_columns]
 
@@ -0,0 +1,154 @@
+"""Process wide and on-disk cache for s-curve rates"""
+import hashlib
+import os
+import pathlib
+import threading
+import typing
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from ebm.model.file_cache import CacheInfo
+
+PARAMETER_COLUMNS = ['building_category', 'building_condition', 'earliest_age', 'average_age', 'rush_period',
+                     'last_age', 'rush_share', 'never_share']
+
+RateArrays = tuple[np.ndarray, np.ndarray]
+
+
+class SCurveRateCache:
+    """
+    Memoizes the yearly rate and accumulated rate of s-curves by age.
+
+    The rates of an s-curve only depend on its own parameter row and the number of ages calculated. Every
+    (building_category, building_condition) row is cached separately, keyed by a hash of the row and the number of
+    ages, so changing one parameter row only calculates the rates of that row again.
+
+    Rates are kept in memory for the lifetime of the process. When a cache directory is set, either as directory or
+    in the environment variable EBM_S_CURVE_CACHE_DIRECTORY, rates are also stored as .npz files in that directory
+    and reused by later processes.
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory: pathlib.Path | str | None = None):
+        self._directory = directory
+        self._entries: dict[str, RateArrays] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> pathlib.Path | None:
+        directory = self._directory if self._directory is not None else os.environ.get('EBM_S_CURVE_CACHE_DIRECTORY')
+        return pathlib.Path(directory) if directory else None
+
+    @staticmethod
+    def supports(s_curve_parameters: pd.DataFrame) -> bool:
+        """
+        Returns
+        -------
+        bool
+            True when s_curve_parameters have the short form parameter columns and at most one row for each
+            building_category and building_condition
+        """
+        if any(c not in s_curve_parameters.columns for c in PARAMETER_COLUMNS):
+            return False
+        return not s_curve_parameters.duplicated(subset=['building_category', 'building_condition']).any()
+
+    def make_key(self, row: tuple, max_age: int) -> str:
+        values = tuple(v.item() if isinstance(v, np.generic) else v for v in row)
+        return hashlib.sha256(repr((self.VERSION, max_age, values)).encode('utf-8')).hexdigest()
+
+    def get(self, s_curve_parameters: pd.DataFrame, max_age: int,
+            compute: typing.Callable[[pd.DataFrame, int], list[RateArrays]]) -> list[RateArrays]:
+        """
+        Return rate and accumulated rate for each row in s_curve_parameters. compute(rows, max_age) is called once
+        with the rows that are not cached, and must return rate arrays in the same order as rows.
+
+        Parameters
+        ----------
+        s_curve_parameters : pd.DataFrame
+            s-curve parameters in short form, see translate_scurve_parameter_to_shortform
+        max_age : int
+            Upper bound (exclusive) of ages calculated
+        compute : Callable
+
+        Returns
+        -------
+        list[tuple[np.ndarray, np.ndarray]]
+            rate and accumulated rate by age, starting at age 1, in the same order as s_curve_parameters
+        """
+        keys = [self.make_key(row, max_age) for row in
+                s_curve_parameters[PARAMETER_COLUMNS].itertuples(index=False, name=None)]
+        rates: list[RateArrays | None] = [self._lookup(key) for key in keys]
+        missing = [i for i, r in enumerate(rates) if r is None]
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return rates
+
+        logger.debug(f'Calculating s-curve rates for {len(missing)} of {len(keys)} parameter rows')
+        computed = compute(s_curve_parameters.iloc[missing], max_age)
+        for i, (rate, rate_acc) in zip(missing, computed, strict=True):
+            rate.setflags(write=False)
+            rate_acc.setflags(write=False)
+            rates[i] = rate, rate_acc
+            self._store(keys[i], (rate, rate_acc))
+        return rates
+
+    def _lookup(self, key: str) -> RateArrays | None:
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        directory = self.directory
+        if directory is None:
+            return None
+        cache_file = directory / f'{key}.npz'
+        if not cache_file.is_file():
+            return None
+        try:
+            with np.load(cache_file) as content:
+                rate, rate_acc = content['rate'], content['rate_acc']
+        except (OSError, ValueError, KeyError) as ex:
+            logger.debug(f'Ignoring unreadable s-curve cache file {cache_file}: {ex}')
+            return None
+        rate.setflags(write=False)
+        rate_acc.setflags(write=False)
+        with self._lock:
+            self._entries[key] = rate, rate_acc
+        return rate, rate_acc
+
+    def _store(self, key: str, rates: RateArrays) -> None:
+        with self._lock:
+            self._entries[key] = rates
+        directory = self.directory
+        if directory is None:
+            return
+        cache_file = directory / f'{key}.npz'
+        temporary_file = directory / f'{key}.{os.getpid()}.{threading.get_ident()}.tmp.npz'
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            np.savez(temporary_file, rate=rates[0], rate_acc=rates[1])
+            temporary_file.replace(cache_file)
+        except OSError as ex:
+            logger.debug(f'Unable to write s-curve cache file {cache_file}: {ex}')
+
+    def invalidate(self) -> None:
+        """Forget every rate kept in memory. Files in the cache directory are left as they are."""
+        with self._lock:
+            self._entries.clear()
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(hits=self.hits, misses=self.misses, entries=len(self._entries))
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+s_curve_rate_cache = SCurveRateCache()
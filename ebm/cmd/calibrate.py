@@ -3,6 +3,7 @@ from typing import NoReturn
 
 import pandas as pd
 from dotenv import load_dotenv
+from ebm.energy_consumption import SORT_LEVELS
 from ebm.model.bema import map_sort_order
 from ebm.model.calibrate_heating_systems import load_area_forecast, load_energy_need, load_heating_systems
 
@@ -54,14 +55,14 @@ def run_calibration(database_manager: DatabaseManager,  # noqa: D417
             by='building_category', key=lambda x: x.map(map_sort_order))
         write_dataframe(en_req, 'energy_requirements')
         grouped = en_req[['building_category', 'm2', 'kwh_m2', 'energy_requirement']].groupby(
-            by=['building_category'], as_index=False).agg({'m2': 'first', 'kwh_m2': 'first', 'energy_requirement': 'sum'})
+            by=['building_category'], as_index=False, observed=True).agg({'m2': 'first', 'kwh_m2': 'first', 'energy_requirement': 'sum'})
         grouped = grouped.sort_values(by='building_category', key=lambda x: x.map(map_sort_order))
         write_dataframe(grouped, 'energy_requirements_sum', sheet_name='sum')
 
     logger.debug('Extract heating systems')
     heating_systems = load_heating_systems(energy_requirements, database_manager)
     if write_to_output:
-        write_dataframe(heating_systems.xs(calibration_year, level='year'), 'heating_systems')
+        write_dataframe(heating_systems.sort_index(level=SORT_LEVELS).xs(calibration_year, level='year'), 'heating_systems')
 
     return heating_systems
 
@@ -0,0 +1,53 @@
+"""Compile an input directory into a validated binary snapshot"""
+import pathlib
+
+from loguru import logger
+
+from ebm import validators
+from ebm.model.file_handler import FileHandler
+from ebm.model.input_snapshot import InputSnapshot
+
+
+def compile_input(file_handler: FileHandler, revalidate: bool = False) -> pathlib.Path:
+    """
+    Validate the input files in file_handler.input_directory and write a compiled snapshot of them.
+
+    FileHandler reads from the snapshot as long as the input files are unchanged since they were compiled. Since the
+    snapshot is only written when every file is valid, validate_input_files skips files served by the snapshot.
+
+    Parameters
+    ----------
+    file_handler : FileHandler
+    revalidate : bool, default False
+        Validate every file even if the validation cache has recorded it as valid
+
+    Returns
+    -------
+    pathlib.Path
+        The snapshot directory
+
+    Raises
+    ------
+    FileNotFoundError
+        When a required input file is missing
+    pa.errors.SchemaErrors
+        When an input file is invalid. No snapshot is written.
+    """
+    source = FileHandler(directory=file_handler.input_directory, use_cache=file_handler.use_cache, use_snapshot=False,
+                         categorical=False)
+    missing_files = source.check_for_missing_files()
+    if missing_files:
+        msg = f'File not found {missing_files[0]}'
+        raise FileNotFoundError(msg)
+
+    logger.info(f'Validating input files in {source.input_directory}')
+    source.validate_input_files(revalidate=revalidate)
+
+    snapshot = InputSnapshot(source.input_directory)
+    snapshot.clear()
+    files = {}
+    for file_name in source.files_to_check:
+        files[file_name] = snapshot.write(file_name, source.get_file(file_name))
+    snapshot.write_manifest(files, schema_version=validators.schema_version())
+    logger.debug(f'Wrote {snapshot.manifest_path}')
+    return snapshot.directory
@@ -3,14 +3,16 @@
 Generate S-curves from calibrated CSV parameters.
 
 This module reads S-curve parameters from a CSV file, optionally filters them using a pandas query,
-and computes S-curves for each parameter set using the `SCurve` model. The results are returned as
+and computes S-curves for every parameter set in one vectorized pass. The results are returned as
 a combined pandas DataFrame and can optionally be saved to a CSV file.
 
 Notes
 -----
 - Requires Python 3.10 or later.
 - Uses `loguru` for logging and `pandas` for data manipulation.
-- The S-curve calculation logic is implemented in `ebm.model.scurve.SCurve`.
+- The S-curve calculation logic is implemented in `ebm.areaforecast.s_curve.scurve_rates_batch`.
+- The CSV may hold thousands of parameter variations, for instance for sensitivity studies. Columns other than the
+  S-curve parameters, like a scenario name, are kept in the result.
 
 Examples
 --------
@@ -60,50 +62,50 @@ import os
 import pathlib
 import sys
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 from pandas.errors import UndefinedVariableError
 
+from ebm.areaforecast.s_curve import BATCH_PARAMETERS, scurve_rates_batch, scurve_total_span, translate_scurve_parameter_to_shortform
 from ebm.cmd.helpers import configure_loglevel, load_environment_from_dotenv
-from ebm.model.scurve import SCurve
 
 
 def generate_scurve_dataframe(s_curve_parameters: pd.DataFrame) -> pd.DataFrame:
-    """Generate a combined DataFrame of S-curves based on input parameters."""
-    calc_scurve_results = []
-
-    for params in s_curve_parameters.itertuples(index=False):
-        logger.debug(params)
-
-        try:
-            scurve = SCurve(
-                earliest_age=params.earliest_age_for_measure,
-                average_age=params.average_age_for_measure,
-                last_age=params.last_age_for_measure,
-                rush_years=params.rush_period_years,
-                never_share=params.never_share,
-                rush_share=params.rush_share,
-            )
-            s_curve_series = scurve.get_rates_per_year_over_building_lifetime()
-        except ValueError:
-            logger.error(
-                "Got ValueError while loading s-curve for {building_category} {building_condition}",
-                building_category=getattr(params, "building_category", "unknown"),
-                building_condition=getattr(params, "condition", "unknown"),
-            )
-            continue
-
-        s_curve_df = s_curve_series.to_frame(name="share")
-        s_curve_df['share_acc'] = s_curve_series.cumsum()
-
-        s_curve_df = s_curve_df.assign(**params._asdict())
-        s_curve_df = s_curve_df.rename(columns={'condition': 'building_condition'}, errors='ignore')
-        calc_scurve_results.append(s_curve_df)
-
-    df = pd.concat(calc_scurve_results) if calc_scurve_results else pd.DataFrame()
-    df = df.reset_index()
-    indexed=df.set_index(["building_category", "building_condition", "age"]) if 'age' in df.columns else df
-    return indexed
+    """
+    Generate a combined DataFrame of S-curves based on input parameters.
+
+    Every parameter row is calculated in one pass by ebm.areaforecast.s_curve.scurve_rates_batch. Rows with
+    negative parameters are logged and skipped. Each S-curve covers age 1 to its last age, or at least 130 years.
+    """
+    shortform = translate_scurve_parameter_to_shortform(s_curve_parameters).reset_index(drop=True)
+    parameters = shortform[list(BATCH_PARAMETERS)].to_numpy(dtype='float64')
+
+    is_negative = (shortform[['earliest_age', 'average_age', 'last_age', 'rush_share', 'never_share']] < 0).any(axis=1)
+    for row in shortform[is_negative].itertuples():
+        logger.error(
+            "Got negative parameter while loading s-curve for {building_category} {building_condition}",
+            building_category=getattr(row, "building_category", "unknown"),
+            building_condition=getattr(row, "building_condition", "unknown"),
+        )
+    s_curve_parameters = s_curve_parameters.reset_index(drop=True)[~is_negative.to_numpy()]
+    parameters = parameters[~is_negative.to_numpy()]
+    if len(parameters) == 0:
+        return pd.DataFrame()
+    logger.debug(f'Calculating {len(parameters)} s-curves')
+
+    rate, rate_acc = scurve_rates_batch(parameters)
+    age = np.arange(1, rate.shape[1] + 1)
+    last_age = np.maximum(scurve_total_span(parameters).astype(int), 130)
+    in_lifetime = age[np.newaxis, :] <= last_age[:, np.newaxis]
+
+    row, column = np.nonzero(in_lifetime)
+    df = s_curve_parameters.iloc[row].reset_index(drop=True)
+    df = df.rename(columns={'condition': 'building_condition'}, errors='ignore')
+    df.insert(0, 'share_acc', rate_acc[row, column])
+    df.insert(0, 'share', rate[row, column])
+    df['age'] = age[column]
+    return df.set_index(["building_category", "building_condition", "age"])
 
 
 def filter_s_curve_parameters(filter_query: str | None, scurve_parameters: pd.DataFrame) ->pd.DataFrame:
@@ -1,5 +1,7 @@
+import functools
 import os
 import pathlib
+import typing
 
 import pandas as pd
 from loguru import logger
@@ -19,7 +21,9 @@ from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
 from ebm.model.file_handler import FileHandler
 from ebm.model.heating_systems_share import transform_heating_systems_share_long, transform_heating_systems_share_wide
-from ebm.services.spreadsheet import add_top_row_filter, make_pretty
+from ebm.services.columnar import OUTPUT_FORMATS, read_columnar_reports, write_columnar_reports
+from ebm.services.spreadsheet import WorkbookSheet, write_workbooks
+from ebm.services.stage_graph import Stage, StageGraph
 
 
 def main():
@@ -36,27 +40,174 @@ def main():
     list(export_energy_model_reports(years, database_manager, output_path))
 
 
-def export_energy_model_reports(years: YearRange, database_manager: DatabaseManager, output_path: pathlib.Path):
+REPORTS = ('area.xlsx', 'heating_system_share.xlsx', 'heat_prod_hp.xlsx', 'energy_use.xlsx', 'energy_purpose.xlsx',
+           'demolition_construction.xlsx')
+"""Reports written by export_energy_model_reports in the order they are returned"""
+
+
+def export_energy_model_reports(years: YearRange, database_manager: DatabaseManager, output_path: pathlib.Path,
+                                reports: typing.Iterable[str] | None = None,
+                                max_workers: int | None = None,
+                                processes: int | None = None,
+                                output_format: str = 'xlsx',
+                                csv_delimiter: str = ',') -> typing.Iterator[pathlib.Path]:
+    """
+    Calculate the energy model and write reports to output_path.
+
+    The model is run as the StageGraph from energy_model_stages. Only the stages needed for reports are run, and
+    stages that do not depend on each other, like area, energy need, heating systems and holiday homes, are run
+    concurrently. When the sheets of every report are ready, the workbooks are written concurrently by write_workbooks
+    in a process pool.
+
+    With output_format parquet, arrow or csv the sheets are written as tables by write_columnar_reports instead,
+    together with a manifest that export_excel_reports uses to write the workbooks later.
+
+    Parameters
+    ----------
+    years : YearRange
+    database_manager : DatabaseManager
+    output_path : pathlib.Path
+        Directory of the reports
+    reports : Iterable[str], optional
+        File names of the reports to write. Every report in REPORTS when not provided.
+    max_workers : int, optional
+        Number of threads running stages. Read from the environment variable EBM_PIPELINE_WORKERS when not
+        provided. With 1 the stages are run one at a time.
+    processes : int, optional
+        Number of processes writing workbooks. Read from the environment variable EBM_REPORT_PROCESSES when not
+        provided, otherwise the number of CPUs. With 1 the workbooks are written one at a time in this process.
+    output_format : str, default 'xlsx'
+        One of OUTPUT_FORMATS
+    csv_delimiter : str, default ','
+        Column separator when output_format is csv
+
+    Returns
+    -------
+    Iterator[pathlib.Path]
+        Path of each report in the order of reports. For columnar output formats the path of each table followed
+        by the manifest. The model is calculated and the reports are written while iterating.
+
+    Raises
+    ------
+    ValueError
+        When reports contains a file name that is not in REPORTS or output_format is not in OUTPUT_FORMATS. The
+        arguments are checked when export_energy_model_reports is called, before the first report is written.
+    """
+    reports = list(REPORTS if reports is None else reports)
+    unknown = [r for r in reports if r not in REPORTS]
+    if unknown:
+        msg = f'Unknown report {", ".join(unknown)}. Expected one of {", ".join(REPORTS)}'
+        raise ValueError(msg)
+    if output_format not in OUTPUT_FORMATS:
+        msg = f'Unknown output_format {output_format}. Expected one of {", ".join(OUTPUT_FORMATS)}'
+        raise ValueError(msg)
+    return _write_energy_model_reports(years, database_manager, output_path, reports, max_workers=max_workers,
+                                       processes=processes, output_format=output_format, csv_delimiter=csv_delimiter)
+
+
+def _write_energy_model_reports(years: YearRange, database_manager: DatabaseManager, output_path: pathlib.Path,
+                                reports: list[str],
+                                max_workers: int | None,
+                                processes: int | None,
+                                output_format: str,
+                                csv_delimiter: str) -> typing.Iterator[pathlib.Path]:
+    """Generator of export_energy_model_reports, called with checked arguments"""
+    if max_workers is None and os.environ.get('EBM_PIPELINE_WORKERS'):
+        max_workers = int(os.environ.get('EBM_PIPELINE_WORKERS'))
+    if processes is None and os.environ.get('EBM_REPORT_PROCESSES'):
+        processes = int(os.environ.get('EBM_REPORT_PROCESSES'))
+
+    graph = StageGraph(energy_model_stages(years, database_manager))
+    results = graph.run(targets=reports, max_workers=max_workers)
+    workbooks = {output_path / report: results.pop(report) for report in reports}
+    if output_format == 'xlsx':
+        yield from write_workbooks(workbooks, max_workers=processes)
+    else:
+        yield from write_columnar_reports(workbooks, output_format, csv_delimiter=csv_delimiter)
+
+
+def export_excel_reports(manifest_file: pathlib.Path, reports: typing.Iterable[str] | None = None,
+                         processes: int | None = None) -> typing.Iterator[pathlib.Path]:
+    """
+    Write the reports of a columnar energy-use result as Excel workbooks.
+
+    The workbooks are written next to manifest_file and look the same as the workbooks written by
+    export_energy_model_reports with output_format xlsx.
+
+    Parameters
+    ----------
+    manifest_file : pathlib.Path
+        The manifest written by export_energy_model_reports
+    reports : Iterable[str], optional
+        File names of the reports to write. Every report in the manifest when not provided.
+    processes : int, optional
+        Number of processes writing workbooks, see export_energy_model_reports
+
+    Returns
+    -------
+    Iterator[pathlib.Path]
+        Path of each report in the order of reports
+    """
+    if processes is None and os.environ.get('EBM_REPORT_PROCESSES'):
+        processes = int(os.environ.get('EBM_REPORT_PROCESSES'))
+    yield from write_workbooks(read_columnar_reports(manifest_file, reports), max_workers=processes)
+
+
+def energy_model_stages(years: YearRange, database_manager: DatabaseManager) -> list[Stage]:
+    """
+    Stages of the energy model from input to the reports in REPORTS.
+
+    Each stage is named after its output. The report stages are named after the file of the report and return its
+    sheets as a list of WorkbookSheet.
+
+    Parameters
+    ----------
+    years : YearRange
+    database_manager : DatabaseManager
+
+    Returns
+    -------
+    list[Stage]
+    """
+    dm = database_manager
+    return [
+        Stage('scurve_parameters', dm.get_scurve_params), # 📍
+        Stage('area_parameters', functools.partial(area_parameters, years, dm)), # 📍
+        Stage('building_code_parameters', dm.file_handler.get_building_code), # 📍
+        Stage('energy_need_kwh_m2', functools.partial(e_n.EnergyNeed.from_database_manager, dm, years)), # 📍
+        Stage('heating_systems_projection', functools.partial(extractors.extract_heating_systems_forecast, years, dm)), # 📍
+        Stage('energy_use_holiday_homes', functools.partial(extractors.extract_energy_use_holiday_homes, dm, years=years)), # 📍
+        Stage('s_curves_by_condition', functools.partial(calculate_s_curves, years=years),
+              ('scurve_parameters', 'building_code_parameters')), # 📌
+        Stage('area_forecast', functools.partial(extractors.extract_area_forecast, years, database_manager=dm),
+              ('s_curves_by_condition', 'building_code_parameters', 'area_parameters')), # 📍
+        Stage('total_energy_need', e_n.transform_total_energy_need, ('energy_need_kwh_m2', 'area_forecast')), # 📌
+        Stage('heating_systems_parameter', h_s_param.heating_systems_parameter_from_projection,
+              ('heating_systems_projection',)), # 📌
+        Stage('energy_use_kwh', energy_use_kwh, ('heating_systems_parameter', 'total_energy_need')), # 📌
+
+        Stage('area.xlsx', area_sheets, ('area_forecast',)),
+        Stage('heating_system_share.xlsx', heating_system_share_sheets, ('heating_systems_projection',)),
+        Stage('heat_prod_hp.xlsx', heat_prod_hp_sheets, ('heating_systems_parameter', 'total_energy_need')),
+        Stage('energy_use.xlsx', energy_use_sheets, ('energy_use_kwh', 'energy_use_holiday_homes')),
+        Stage('energy_purpose.xlsx', energy_purpose_sheets, ('energy_use_kwh',)),
+        Stage('demolition_construction.xlsx', demolition_construction_sheets,
+              ('energy_use_kwh', 'area_forecast', 'building_code_parameters')),
+    ]
+
+
+def area_parameters(years: YearRange, database_manager: DatabaseManager) -> pd.DataFrame:
+    df = database_manager.get_area_parameters()
+    df['year'] = years.start
+    return df
+
+
+def energy_use_kwh(heating_systems_parameter: pd.DataFrame, total_energy_need: pd.DataFrame) -> pd.DataFrame:
+    return e_u.building_group_energy_use_kwh(heating_systems_parameter, total_energy_need)
+
+
+def area_sheets(area_forecast: pd.DataFrame) -> list[WorkbookSheet]:
     logger.info('Area to area.xlsx')
-    logger.debug('Extract area')
-
-    scurve_parameters = database_manager.get_scurve_params() # 📍
-
-    area_parameters = database_manager.get_area_parameters() # 📍
-    area_parameters['year'] = years.start
-
-    building_code_parameters = database_manager.file_handler.get_building_code() # 📍
-
-    s_curves_by_condition = calculate_s_curves(scurve_parameters, building_code_parameters, years) # 📌
-    area_forecast = extractors.extract_area_forecast(years, s_curves_by_condition, building_code_parameters, area_parameters, database_manager) # 📍
-    energy_need_kwh_m2 = extractors.extract_energy_need(years, database_manager) # 📍
-    heating_systems_projection = extractors.extract_heating_systems_forecast(years, database_manager) # 📍
-    energy_use_holiday_homes = extractors.extract_energy_use_holiday_homes(database_manager, years=years)  # 📍
-
-    total_energy_need = e_n.transform_total_energy_need(energy_need_kwh_m2, area_forecast)  # 📌
-    heating_systems_parameter = h_s_param.heating_systems_parameter_from_projection(heating_systems_projection) # 📌
-    energy_use_kwh = e_u.building_group_energy_use_kwh(heating_systems_parameter, total_energy_need) # 📌
-
     existing_area = a_f.filter_existing_area(area_forecast)
 
     logger.debug('Transform fane 1 (wide)')
@@ -66,29 +217,18 @@ def export_energy_model_reports(years: YearRange, database_manager: DatabaseMana
 
     logger.debug('Transform fane 2 (long')
 
-    area_by_year_category_building_code = existing_area.groupby(by='year,building_category,building_code'.split(','))[['m2']].sum()
+    area_by_year_category_building_code = existing_area.groupby(by='year,building_category,building_code'.split(','), observed=True)[['m2']].sum()
     area_by_year_category_building_code = area_by_year_category_building_code.rename(columns={'m2': 'area'})
     area_by_year_category_building_code.insert(0, 'U', 'm2')
     area_long = area_by_year_category_building_code.reset_index().sort_values(
         by=['building_category', 'building_code', 'year'], key=bema.map_sort_order) #🏙️
 
-    logger.debug('Write file area.xlsx')
-
-    area_output = output_path / 'area.xlsx'
-
-    with pd.ExcelWriter(area_output, engine='xlsxwriter') as writer:
-        # Write wide first order matters
-        area_wide.to_excel(writer, sheet_name='wide', index=False) # 🏙️️💾
-        area_long.to_excel(writer, sheet_name='long', index=False) # 🏙️💾
-    logger.debug(f'Adding top row filter to {area_output}')
-    make_pretty(area_output)
-    add_top_row_filter(workbook_file=area_output, sheet_names=['long'])
-    yield area_output
+    # Write wide first order matters
+    return [WorkbookSheet('wide', area_wide), # 🏙️️💾
+            WorkbookSheet('long', area_long, top_row_filter=True)] # 🏙️💾
 
-    logger.success(f'Wrote {area_output}')
-
-    logger.info('Energy use to energy_purpose')
 
+def heating_system_share_sheets(heating_systems_projection: pd.DataFrame) -> list[WorkbookSheet]:
     logger.info('Heating_system_share')
 
     logger.debug('Transform fane 2')
@@ -102,18 +242,12 @@ def export_energy_model_reports(years: YearRange, database_manager: DatabaseMana
 
     heating_systems_share_wide = heating_systems_share_wide.rename(columns={'heating_systems':'Heating technology'})
 
-    logger.debug('Write file heating_system_share.xlsx')
-    heating_system_share_file = output_path / 'heating_system_share.xlsx'
-    with pd.ExcelWriter(heating_system_share_file, engine='xlsxwriter') as writer:
-        # Write wide first order matters
-        heating_systems_share_wide.to_excel(writer, sheet_name='wide', merge_cells=False, index=False) # ♨️💾
-        heating_systems_share_long.to_excel(writer, sheet_name='long', merge_cells=False) # ♨️💾
-    make_pretty(heating_system_share_file)
-    logger.debug(f'Adding top row filter to {heating_system_share_file}')
-    add_top_row_filter(workbook_file=heating_system_share_file, sheet_names=['long'])
-    logger.success(f'Wrote {heating_system_share_file.name}')
-    yield heating_system_share_file
+    # Write wide first order matters
+    return [WorkbookSheet('wide', heating_systems_share_wide, merge_cells=False), # ♨️💾
+            WorkbookSheet('long', heating_systems_share_long, index=True, merge_cells=False, top_row_filter=True)] # ♨️💾
 
+
+def heat_prod_hp_sheets(heating_systems_parameter: pd.DataFrame, total_energy_need: pd.DataFrame) -> list[WorkbookSheet]:
     logger.info('heat_prod_hp')
     logger.debug('Transform heating_system_parameters')
 
@@ -125,15 +259,10 @@ def export_energy_model_reports(years: YearRange, database_manager: DatabaseMana
     production = h_p.heat_pump_production(total_energy_need, air_air, district_heating)
     heat_prod_hp_wide = h_p.heat_prod_hp_wide(production) # 🧮
 
-    logger.debug('Write file heat_prod_hp.xlsx')
-    heat_prod_hp_file = output_path / 'heat_prod_hp.xlsx'
+    return [WorkbookSheet('wide', heat_prod_hp_wide)] # 🧮💾
 
-    with pd.ExcelWriter(heat_prod_hp_file, engine='xlsxwriter') as writer:
-        heat_prod_hp_wide.to_excel(writer, sheet_name='wide', index=False) # 🧮💾
-    make_pretty(heat_prod_hp_file)
-    logger.success(f'Wrote {heat_prod_hp_file.name}')
-    yield heat_prod_hp_file
 
+def energy_use_sheets(energy_use_kwh: pd.DataFrame, energy_use_holiday_homes: pd.DataFrame) -> list[WorkbookSheet]:
     logger.info('Energy_use')
 
     logger.debug('Transform energy_use_kwh')
@@ -146,7 +275,7 @@ def export_energy_model_reports(years: YearRange, database_manager: DatabaseMana
 
     column_order = ['year', 'building_category', 'building_code', 'energy_product', 'kwh']
     energy_use_long = energy_use_kwh[column_order].groupby(
-        by=['building_category', 'building_code', 'energy_product', 'year']).sum() / 1_000_000
+        by=['building_category', 'building_code', 'energy_product', 'year'], observed=True).sum() / 1_000_000
     energy_use_long = energy_use_long.reset_index()[column_order].rename(columns={'kwh': 'energy_use'})
     energy_use_long = energy_use_long.sort_values(
         by=['building_category', 'building_code', 'year'], key=bema.map_sort_order) #🔌
@@ -155,17 +284,13 @@ def export_energy_model_reports(years: YearRange, database_manager: DatabaseMana
     logger.debug('Group by group, product year')
     energy_use_wide = transform_to_sorted_heating_systems(energy_use_gwh_by_building_group, energy_use_holiday_homes, #🔌
                                                           building_column='building_group')
-    logger.debug('Write file energy_use')
-    energy_use_file = output_path / 'energy_use.xlsx'
-    with pd.ExcelWriter(energy_use_file, engine='xlsxwriter') as writer:
-        # Write wide first order matters
-        energy_use_wide.to_excel(writer, sheet_name='wide', index=False) #🔌💾
-        energy_use_long.to_excel(writer, sheet_name='long', index=False) #🔌💾
-    make_pretty(energy_use_file)
-    logger.debug(f'Adding top row filter to {energy_use_file}')
-    add_top_row_filter(workbook_file=energy_use_file, sheet_names=['long'])
-    logger.success(f'Wrote {energy_use_file.name}')
-    yield energy_use_file
+    # Write wide first order matters
+    return [WorkbookSheet('wide', energy_use_wide), #🔌💾
+            WorkbookSheet('long', energy_use_long, top_row_filter=True)] #🔌💾
+
+
+def energy_purpose_sheets(energy_use_kwh: pd.DataFrame) -> list[WorkbookSheet]:
+    logger.info('Energy use to energy_purpose')
 
     logger.debug('Transform fane 1')
     energy_purpose_wide = e_p.group_energy_use_kwh_by_building_group_purpose_year_wide(energy_use_kwh=energy_use_kwh) # 🚿
@@ -173,18 +298,13 @@ def export_energy_model_reports(years: YearRange, database_manager: DatabaseMana
     logger.debug('Transform fane 2')
     energy_purpose_long = e_p.group_energy_use_by_year_category_building_code_purpose(energy_use_kwh=energy_use_kwh) # 🚿
 
-    logger.debug('Write file energy_purpose.xlsx')
-    energy_purpose_output = output_path / 'energy_purpose.xlsx'
-    with pd.ExcelWriter(energy_purpose_output, engine='xlsxwriter') as writer:
-        # Write wide first order matters
-        energy_purpose_wide.to_excel(writer, sheet_name='wide', index=False) # 🚿 💾
-        energy_purpose_long.to_excel(writer, sheet_name='long', index=False) # 🚿💾
-    make_pretty(energy_purpose_output)
-    logger.debug(f'Adding top row filter to {energy_purpose_output}')
-    add_top_row_filter(workbook_file=energy_purpose_output, sheet_names=['long'])
-    logger.success(f'Wrote {energy_purpose_output.name}')
-    yield energy_purpose_output
+    # Write wide first order matters
+    return [WorkbookSheet('wide', energy_purpose_wide), # 🚿 💾
+            WorkbookSheet('long', energy_purpose_long, top_row_filter=True)] # 🚿💾
 
+
+def demolition_construction_sheets(energy_use_kwh: pd.DataFrame, area_forecast: pd.DataFrame,
+                                   building_code_parameters: pd.DataFrame) -> list[WorkbookSheet]:
     area_change = a_f.transform_area_forecast_to_area_change(area_forecast=area_forecast, building_code_parameters=building_code_parameters)
 
     logger.info('demolition_construction')
@@ -195,16 +315,7 @@ def export_energy_model_reports(years: YearRange, database_manager: DatabaseMana
     demolition_construction_long = demolition_construction_long.sort_values(
         by=['building_category', 'building_code', 'year', 'demolition_construction'], key=bema.map_sort_order) # 🏗️
 
-    logger.debug('Write file demolition_construction.xlsx')
-    demolition_construction_file = output_path / 'demolition_construction.xlsx'
-    with pd.ExcelWriter(demolition_construction_file, engine='xlsxwriter') as writer:
-        demolition_construction_long.to_excel(writer, sheet_name='long', index=False) # 🏗️💾
-    make_pretty(demolition_construction_file)
-    logger.debug(f'Adding top row filter to {demolition_construction_file}')
-    add_top_row_filter(workbook_file=demolition_construction_file, sheet_names=['long'])
-    logger.success(f'Wrote {demolition_construction_file.name}')
-
-    yield demolition_construction_file
+    return [WorkbookSheet('long', demolition_construction_long, top_row_filter=True)] # 🏗️💾
 
 
 def load_config():
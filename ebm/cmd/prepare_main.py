@@ -10,9 +10,11 @@ from typing import List
 from loguru import logger
 
 from ebm.__version__ import version
+from ebm.cmd.pipeline import REPORTS
 from ebm.model.building_category import BuildingCategory
 from ebm.model.data_classes import YearRange
 from ebm.model.enums import ReturnCode
+from ebm.services.columnar import OUTPUT_FORMATS
 from ebm.services.files import file_is_writable
 
 TEK = """PRE_TEK49
@@ -84,13 +86,18 @@ def make_arguments(program_name, default_path: pathlib.Path) -> argparse.Namespa
                                      'heating-systems',
                                      'energy-use',
                                      'list-input',
-                                     'create-input'],
+                                     'create-input',
+                                     'compile-input',
+                                     'export-excel'],
                             default='energy-use',
                             help="""
 The calculation step you want to run. The steps are sequential. Any prerequisite to the chosen step will run 
     automatically.
 list-input: List available input datasets bundled with ebm.
-create-input: Create input directory containing all required files in the current working directory.""")
+create-input: Create input directory containing all required files in the current working directory.
+compile-input: Validate the input directory and write a compiled snapshot used by later runs.
+export-excel: Write the Excel reports of an energy-use output directory written with --output-format parquet, arrow
+    or csv.""")
     arg_parser.add_argument('output_file', nargs='?', type=pathlib.Path, default=default_path,
                             help=textwrap.dedent(
                                 f'''The location of the output to be written. default: {default_path}
@@ -122,6 +129,8 @@ create-input: Create input directory containing all required files in the curren
     arg_parser.add_argument('--csv-delimiter', '--delimiter', '-e', type=str, default=',',
                             help='A single character to be used for separating columns when writing csv. ' +
                                  'Default: "," Special characters like ; should be quoted ";"')
+    arg_parser.add_argument('--revalidate', action='store_true',
+                            help='Validate every input file, even files that are unchanged since they were last validated')
     arg_parser.add_argument('--create-input', action='store_true',
                             help='''
 Create input directory containing all required files in the current working directory''')
@@ -147,6 +156,18 @@ Use `list-input` to list available datasets.'''))
 
     arg_parser.add_argument('--horizontal-years', '--horizontal', '--horisontal', action='store_true',
                             help='Show years horizontal (left to right)')
+    arg_parser.add_argument('--report', action='append', type=str, default=None, choices=REPORTS,
+                            metavar='REPORT',
+                            help=textwrap.dedent(f'''\
+Only write this energy-use report, and only calculate what it needs. Repeat to write several reports.
+Available reports: {", ".join(REPORTS)}.
+Default: every report.'''))
+    arg_parser.add_argument('--output-format', type=str, default=None, choices=OUTPUT_FORMATS,
+                            help=textwrap.dedent(f'''\
+Format of the output: {", ".join(OUTPUT_FORMATS)}.
+For energy-use, parquet, arrow and csv write the wide and long table of each report as a separate file with a
+manifest.json. Use export-excel to write the Excel reports from them later.
+Default: xlsx, or csv when the output file ends with .csv.'''))
 
     arguments = arg_parser.parse_args()
     return arguments
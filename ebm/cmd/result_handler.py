@@ -10,6 +10,8 @@ from ebm.model.building_category import BuildingCategory
 from ebm.model.calibrate_heating_systems import group_heating_systems_by_energy_carrier
 from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
+from ebm.services.columnar import OUTPUT_FORMATS
+from ebm.services.record_batches import iter_record_batches, write_record_batches
 from ebm.services.spreadsheet import detect_format_from_values, find_max_column_width
 
 
@@ -18,7 +20,7 @@ def transform_model_to_horizontal(model, value_column = 'm2'):
     if 'energy_requirement' in hz.columns:
         value_column = 'GWh'
         hz['GWh'] = hz['energy_requirement'] / 10**6
-    hz = hz.groupby(by=['building_category', 'building_code', 'building_condition', 'year'], as_index=False).sum()[
+    hz = hz.groupby(by=['building_category', 'building_code', 'building_condition', 'year'], as_index=False, observed=True).sum()[
         ['building_category', 'building_code', 'building_condition', 'year', value_column]]
     hz = hz.pivot(columns=['year'], index=['building_category', 'building_code', 'building_condition'], values=[
         value_column]).reset_index()
@@ -134,6 +136,33 @@ def append_result(output_file: pathlib.Path, df: pd.DataFrame, sheet_name='Sheet
     logger.debug(f'Wrote {output_file} {sheet_name}')
 
 
+def resolve_output_format(output_file: pathlib.Path, output_format: str | None = None) -> str:
+    """
+    Output format of output_file.
+
+    Parameters
+    ----------
+    output_file : pathlib.Path
+    output_format : str, optional
+        One of OUTPUT_FORMATS. csv when output_file ends with .csv and xlsx otherwise when not provided.
+
+    Returns
+    -------
+    str
+
+    Raises
+    ------
+    ValueError
+        When output_format is not in OUTPUT_FORMATS
+    """
+    if output_format is None:
+        return 'csv' if output_file.suffix == '.csv' else 'xlsx'
+    if output_format not in OUTPUT_FORMATS:
+        msg = f'Unknown output_format {output_format}. Expected one of {", ".join(OUTPUT_FORMATS)}'
+        raise ValueError(msg)
+    return output_format
+
+
 class EbmDefaultHandler:
     def extract_model(self,
                       year_range: YearRange,
@@ -220,13 +249,38 @@ class EbmDefaultHandler:
         return area_forecast
 
     @staticmethod
-    def write_tqdm_result(output_file: pathlib.Path, output: pd.DataFrame, csv_delimiter: str=',', reset_index=True):
-        try:
-            from tqdm import tqdm
-        except ImportError:
-            # When tqdm is not installed we use write_result instead
-            write_result(output_file, csv_delimiter, output)
-            return
+    def write_tqdm_result(output_file: pathlib.Path, output: pd.DataFrame, csv_delimiter: str=',',
+                          reset_index: bool | None = None, *, output_format: str | None = None,
+                          batch_size: int = 100_000, sheet_name: str = 'area forecast',
+                          freeze_panes: tuple[int, int] | None = (1, 3)) -> None:
+        """
+        Write output to output_file while showing the progress with tqdm when it is installed.
+
+        The rows are written by write_record_batches in batches by building category from iter_record_batches, through
+        a single open file. Only one batch at a time is copied and converted, so the memory used by the writer is
+        bounded by batch_size rows. output itself is already in memory as a whole.
+
+        Parameters
+        ----------
+        output_file : pathlib.Path
+            The file to write, or - to print output to the console
+        output : pd.DataFrame
+        csv_delimiter : str, default ','
+        reset_index : bool, optional
+            Write the index as columns. Otherwise the index is written as the first columns styled like the header.
+            False for xlsx, like pd.DataFrame.to_excel, and True for the other formats when not provided.
+        output_format : str, optional
+            One of OUTPUT_FORMATS. csv when output_file ends with .csv and xlsx otherwise when not provided.
+        batch_size : int, default 100_000
+            Largest number of rows written at a time
+        sheet_name : str, default 'area forecast'
+            Name of the xlsx sheet
+        freeze_panes : tuple[int, int], optional
+            Rows and columns to freeze in xlsx. The header row and the first three columns by default.
+        """
+        output_format = resolve_output_format(output_file, output_format)
+        if reset_index is None:
+            reset_index = output_format != 'xlsx'
 
         logger.debug(f'Writing to {output_file}')
 
@@ -235,45 +289,33 @@ class EbmDefaultHandler:
                 print(output.to_markdown())
             except ImportError:
                 print(output.to_string())
+            return
+
+        try:
+            from tqdm import tqdm
+            pbar = tqdm(total=len(output), desc='Writing to spreadsheet')
+        except ImportError:
+            pbar = None
+
+        def progress(batch: pd.DataFrame) -> None:
+            if pbar is None or batch.empty:
                 return
+            if 'building_category' in batch.columns:
+                pbar.set_description(f'Writing {batch.building_category.iloc[0]}')
+            elif 'building_category' in batch.index.names:
+                pbar.set_description(f'Writing {batch.index.get_level_values("building_category")[0]}')
+            pbar.update(len(batch))
 
-        if reset_index:
-            logger.debug('Resetting dataframe index')
-            output = output.reset_index()
-
-        chunk_size = 2000
-        logger.debug(f'{chunk_size=}')
-
-        closing_file = time.time()
-        with tqdm(total=len(output), desc="Writing to spreadsheet") as pbar:
-            write_file = time.time()
-            if output_file.suffix == '.csv':
-                for i in range(0, len(output), chunk_size):  # Adjust the chunk size as needed
-                    building_category = output.iloc[i].building_category
-                    pbar.update(chunk_size)
-                    output.iloc[i:i + chunk_size].to_csv(output_file, mode='a', header=(i == 0), index=False,
-                                                         sep=csv_delimiter)
-                    pbar.display(f'Writing {building_category}')
-                closing_file = time.time()
-                pbar.display(f'Wrote {output_file}')
-            else:
-                with pd.ExcelWriter(output_file, engine='xlsxwriter') as excel_writer:
-                    for i in range(0, len(output), chunk_size):  # Adjust the chunk size as needed
-                        building_category = output.iloc[i].name[0] if 'building_category' not in output.columns else \
-                        output.building_category.iloc[i]
-                        pbar.set_description(f'Writing {building_category}')
-                        start_row = 0 if i == 0 else i + 1
-                        page_start = i
-                        page_end = min(i + chunk_size, len(output))
-                        logger.trace(f'{start_row=} {page_start=} {page_end=}')
-                        output.iloc[page_start:page_end].to_excel(excel_writer, startrow=start_row, header=(i == 0),
-                                                                  merge_cells=True, index=not reset_index)
-                        pbar.update(chunk_size)
-                    pbar.set_description(f'Closing {output_file}')
-                    closing_file = time.time()
+        write_file = time.time()
+        try:
+            batches = iter_record_batches(output, reset_index=reset_index, batch_size=batch_size)
+            write_record_batches(batches, output_file, output_format, csv_delimiter=csv_delimiter,
+                                 index=not reset_index, sheet_name=sheet_name, freeze_panes=freeze_panes,
+                                 progress=progress)
+        finally:
+            if pbar is not None:
+                pbar.close()
         logger.success('Wrote {filename}', filename=output_file)
-        logger.debug(f'  wrote dataframe in { closing_file - write_file:.4} seconds')
-        logger.debug(f'  closed file in {time.time() - closing_file:.4} seconds')
-        logger.debug(f'  wrote {int(output_file.stat().st_size/1_000_000):_d} MB in {time.time() - write_file:.4} seconds')
+        logger.debug(f'  wrote {output_file.stat().st_size / 1_000_000:.1f} MB in {time.time() - write_file:.4} seconds')
 
 
@@ -189,7 +189,8 @@ def calculate_building_category_area_forecast(database_manager: DatabaseManager,
     return area_forecast
 
 
-def calculate_heating_systems(energy_requirements, database_manager: DatabaseManager, period) -> pd.DataFrame:
+def calculate_heating_systems(energy_requirements, database_manager: DatabaseManager, period,
+                              sort: bool = True, engine: str = 'pandas') -> pd.DataFrame:
     """
     Calculate heating systems projection, efficiencies and multiplies by energy_requirements for total energy use
     by building_category, TEK, building_condition, purpose and heating_system.
@@ -199,6 +200,10 @@ def calculate_heating_systems(energy_requirements, database_manager: DatabaseMan
     period :
     energy_requirements : pd.DataFrame
     database_manager : ebm.model.database_manager.DatabaseManager
+    sort : bool, default True
+        Sort the result by building_category, building_code, year, building_condition, purpose and heating_systems
+    engine : str, default 'pandas'
+        Engine used by EnergyConsumption.calculate
 
     Returns
     -------
@@ -212,6 +217,6 @@ def calculate_heating_systems(energy_requirements, database_manager: DatabaseMan
     hf = hsp.pad_projection(hf, YearRange(2020, 2022))
     calculator = EnergyConsumption(hf)
     calculator.heating_systems_parameters = calculator.grouped_heating_systems()
-    df = calculator.calculate(energy_requirements)
+    df = calculator.calculate(energy_requirements, sort=sort, engine=engine)
 
     return df
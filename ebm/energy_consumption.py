@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from loguru import logger
 
@@ -35,6 +36,9 @@ TERTIARY_LOAD_ENERGY_PRODUCT = 'tertiary_load_energy_product'
 DOMESTIC_HOT_WATER_ENERGY_PRODUCT = 'domestic_hot_water_energy_product'
 HP_ENERGY_SOURCE = 'hp_source'
 
+SORT_LEVELS = ['building_category', 'building_code', 'year', 'building_condition', 'purpose', HEATING_SYSTEMS]
+"""Index levels used to sort the result of EnergyConsumption.calculate"""
+
 
 class EnergyConsumption:
     def __init__(self, heating_systems_parameters: pd.DataFrame = None):
@@ -58,34 +62,64 @@ class EnergyConsumption:
                       TERTIARY_LOAD_COVERAGE: 'sum', GRUNNLAST_ANDEL: 'sum', PEAK_LOAD_COVERAGE: 'sum',
                       BASE_LOAD_EFFICIENCY: 'sum', PEAK_LOAD_EFFICIENCY: 'sum', TERTIARY_LOAD_EFFICIENCY: 'sum',
                       DHW_EFFICIENCY: 'sum', SPESIFIKT_ELFORBRUK: 'sum', COOLING_EFFICIENCY: 'sum'}
-        grouped = df.groupby(by=['building_category', 'building_code', 'year', HEATING_SYSTEMS]).agg(aggregates)
+        grouped = df.groupby(by=['building_category', 'building_code', 'year', HEATING_SYSTEMS], observed=True).agg(aggregates)
         return grouped.reset_index()
 
-    def calculate(self, energy_requirements: pd.DataFrame) -> pd.DataFrame:
+    def calculate(self, energy_requirements: pd.DataFrame, sort: bool = True, engine: str = 'pandas') -> pd.DataFrame:
         """
         calculate energy usage by from energy_requirements and heating_systems_parameters
 
         Parameters
         ----------
         energy_requirements : pd.DataFrame
+        sort : bool, default True
+            Sort the result by SORT_LEVELS. When False the rows are returned in the order of the merge.
+        engine : str, default 'pandas'
+            'pandas' adjusts the merged frame with boolean slices of the MultiIndex. 'numpy' takes the merged rows by
+            position and calculates every adjustment with masks computed once. Both engines give the same result.
 
         Returns
         -------
         pd.DataFrame
 
+        Raises
+        ------
+        ValueError
+            When engine is not 'pandas' or 'numpy'
         """
+        if engine not in ('pandas', 'numpy'):
+            msg = f'Unknown engine {engine!r}. Expected pandas or numpy'
+            raise ValueError(msg)
         logger.debug('Calculate heating systems')
         if all([col in energy_requirements.columns for col in ['building_category', 'building_code', 'building_condition', 'year', 'purpose']]):
             energy_requirements = energy_requirements.set_index(['building_category', 'building_code', 'building_condition', 'year', 'purpose'])
-        energy_requirements = self._remove_building_code_suffix(energy_requirements)
+        if engine == 'numpy':
+            energy_requirements = self._remove_building_code_suffix_if_present(energy_requirements)
+        else:
+            energy_requirements = self._remove_building_code_suffix(energy_requirements)
         energy_requirements = self._group_and_sum_same_building_code(energy_requirements)
 
         # If _RES of _COM is in building_codethis will not work
         # energy_requirements.index[energy_requirements.index.str.endswith('_RES')]
-        if energy_requirements.index.get_level_values('building_code').str.endswith(
-                '_RES').any() or energy_requirements.index.get_level_values('building_code').str.endswith('_COM').any():
+        building_codes = energy_requirements.index.get_level_values('building_code').unique()
+        if building_codes.str.endswith('_RES').any() or building_codes.str.endswith('_COM').any():
             raise ValueError('Found _RES or _COM in energy_requirements')
         self.heating_systems_parameters = self.heating_systems_parameters.rename(columns={'heating_system_share': HEATING_SYSTEM_SHARE})
+
+        if engine == 'numpy':
+            df = self._calculate_aligned(energy_requirements)
+        else:
+            df = self._calculate_sliced(energy_requirements)
+
+        if sort:
+            df = df.sort_index(level=SORT_LEVELS)
+        return df[[HEATING_SYSTEM_SHARE, ADJUSTED_REQUIREMENT,
+                   HEATING_RV_BASE_TOTAL, BASE_LOAD_ENERGY_PRODUCT, BASE_LOAD_EFFICIENCY,
+                   HEATING_RV_PEAK_TOTAL, PEAK_LOAD_ENERGY_PRODUCT, PEAK_LOAD_EFFICIENCY,
+                   HEATING_RV_TERTIARY_TOTAL, TERTIARY_LOAD_ENERGY_PRODUCT, TERTIARY_LOAD_EFFICIENCY,
+                   DHW_TOTAL, DOMESTIC_HOT_WATER_ENERGY_PRODUCT, COOLING_TOTAL, OTHER_TOTAL, HEAT_PUMP, HP_ENERGY_SOURCE, 'kwh', 'gwh']]
+
+    def _calculate_sliced(self, energy_requirements: pd.DataFrame) -> pd.DataFrame:
         # Merge energy_requirements and heating_systems into df
         df = self._merge_energy_requirement_and_heating_systems(energy_requirements)
 
@@ -111,13 +145,69 @@ class EnergyConsumption:
                             OTHER_TOTAL]].sum(axis=1)
 
         df.loc[:, 'gwh'] = df.loc[:, 'kwh'] / 10 ** 6
+        return df
 
-        df = df.sort_index(level=['building_category', 'building_code', 'year', 'building_condition', 'purpose', HEATING_SYSTEMS])
-        return df[[HEATING_SYSTEM_SHARE, ADJUSTED_REQUIREMENT,
-                   HEATING_RV_BASE_TOTAL, BASE_LOAD_ENERGY_PRODUCT, BASE_LOAD_EFFICIENCY,
-                   HEATING_RV_PEAK_TOTAL, PEAK_LOAD_ENERGY_PRODUCT, PEAK_LOAD_EFFICIENCY,
-                   HEATING_RV_TERTIARY_TOTAL, TERTIARY_LOAD_ENERGY_PRODUCT, TERTIARY_LOAD_EFFICIENCY,
-                   DHW_TOTAL, DOMESTIC_HOT_WATER_ENERGY_PRODUCT, COOLING_TOTAL, OTHER_TOTAL, HEAT_PUMP, HP_ENERGY_SOURCE, 'kwh', 'gwh']]
+    def _calculate_aligned(self, energy_requirements: pd.DataFrame) -> pd.DataFrame:
+        """
+        Same as _calculate_sliced without the MultiIndex slices.
+
+        Only the keys building_category, building_code and year are merged. The energy requirement and heating system
+        rows are then taken by position, and each adjustment is one vectorized expression over masks for purpose and
+        heat pump type that are computed once.
+        """
+        keys = ['building_category', 'building_code', 'year']
+        left = energy_requirements.reset_index()
+        right = self.heating_systems_parameters.reset_index()
+        positions = left[keys].assign(_left=np.arange(len(left))).merge(right[keys].assign(_right=np.arange(len(right))), on=keys)
+        left_positions, right_positions = positions['_left'].to_numpy(), positions['_right'].to_numpy()
+
+        index = pd.MultiIndex.from_arrays(
+            [_take(left[c], left_positions) for c in ['building_category', 'building_condition', 'purpose', 'building_code', 'year']] +
+            [_take(right[HEATING_SYSTEMS], right_positions)],
+            names=['building_category', 'building_condition', 'purpose', 'building_code', 'year', HEATING_SYSTEMS])
+        df = pd.DataFrame({c: _take(right[c], right_positions) for c in [
+            HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, BASE_LOAD_EFFICIENCY, BASE_LOAD_ENERGY_PRODUCT, PEAK_LOAD_COVERAGE,
+            PEAK_LOAD_EFFICIENCY, PEAK_LOAD_ENERGY_PRODUCT, TERTIARY_LOAD_EFFICIENCY, TERTIARY_LOAD_COVERAGE,
+            TERTIARY_LOAD_ENERGY_PRODUCT, DOMESTIC_HOT_WATER_ENERGY_PRODUCT, DHW_EFFICIENCY, SPESIFIKT_ELFORBRUK,
+            COOLING_EFFICIENCY]}, index=index)
+        energy_requirement = pd.Series(_take(left['energy_requirement'], left_positions), index=index)
+        df[ADJUSTED_REQUIREMENT] = (energy_requirement * df[HEATING_SYSTEM_SHARE]).astype(float)
+
+        # Masks are computed for the unique values of each index level and taken by the level codes
+        purposes, purpose_codes = index.levels[2], index.codes[2]
+        heating_rv = np.asarray(purposes == HEATING_RV)[purpose_codes]
+        heating_dhw = np.asarray(purposes == HEATING_DHW)[purpose_codes]
+        cooling = np.asarray(purposes == COOLING)[purpose_codes]
+        other = np.asarray(purposes.isin(EnergyPurpose.other()))[purpose_codes]
+        heating_systems, heating_system_codes = index.levels[5].astype(str), index.codes[5]
+        central_heating = np.asarray(heating_systems.str.startswith('HP Central heating'))[heating_system_codes]
+        air_air = np.asarray(heating_systems.str.startswith('HP'))[heating_system_codes] & ~central_heating
+
+        adjusted = df[ADJUSTED_REQUIREMENT].to_numpy()
+
+        def where(mask: np.ndarray, values: pd.Series) -> np.ndarray:
+            return np.where(mask, values.to_numpy(dtype=float), 0.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            heat_pump = (central_heating & (heating_rv | heating_dhw)) | (air_air & heating_rv)
+            df[HEAT_PUMP] = where(heat_pump, df[ADJUSTED_REQUIREMENT] * df[GRUNNLAST_ANDEL])
+            hp_source = np.full(len(df), None, dtype=object)
+            hp_source[central_heating & (heating_rv | heating_dhw)] = 'Heat pump central heating'
+            hp_source[air_air & heating_rv] = 'Heat pump air-air'
+            df[HP_ENERGY_SOURCE] = hp_source
+
+            df[HEATING_RV_BASE_TOTAL] = where(heating_rv, df[ADJUSTED_REQUIREMENT] * df[GRUNNLAST_ANDEL] / df[BASE_LOAD_EFFICIENCY])
+            df[HEATING_RV_PEAK_TOTAL] = where(heating_rv, df[ADJUSTED_REQUIREMENT] * df[PEAK_LOAD_COVERAGE] / df[PEAK_LOAD_EFFICIENCY])
+            df[HEATING_RV_TERTIARY_TOTAL] = where(
+                heating_rv, df[ADJUSTED_REQUIREMENT] * df[TERTIARY_LOAD_COVERAGE] / df[TERTIARY_LOAD_EFFICIENCY])
+            df[DHW_TOTAL] = where(heating_dhw, adjusted / df[DHW_EFFICIENCY])
+            df[COOLING_TOTAL] = where(cooling, adjusted / df[COOLING_EFFICIENCY])
+            df[OTHER_TOTAL] = where(other, adjusted / df[SPESIFIKT_ELFORBRUK])
+
+        df['kwh'] = df[[HEATING_RV_BASE_TOTAL, HEATING_RV_PEAK_TOTAL, HEATING_RV_TERTIARY_TOTAL, DHW_TOTAL, COOLING_TOTAL,
+                        OTHER_TOTAL]].sum(axis=1)
+        df['gwh'] = df['kwh'] / 10 ** 6
+        return df
 
     def adjust_heat_pump(self, df):
         df[HP_ENERGY_SOURCE] = None
@@ -195,6 +285,13 @@ class EnergyConsumption:
         energy_requirements = energy_requirements.sort_index()
         return energy_requirements
 
+    @staticmethod
+    def _remove_building_code_suffix_if_present(energy_requirements: pd.DataFrame) -> pd.DataFrame:
+        building_codes = energy_requirements.index.get_level_values('building_code').unique().astype(str)
+        if building_codes.str.contains('_RES').any() or building_codes.str.contains('_COM').any():
+            return EnergyConsumption._remove_building_code_suffix(energy_requirements)
+        return energy_requirements
+
     @staticmethod
     def _remove_building_code_suffix(energy_requirements):
         energy_requirements = FilterTek.remove_building_code_suffix(energy_requirements, suffix='_RES')
@@ -202,6 +299,13 @@ class EnergyConsumption:
         return energy_requirements
 
 
+def _take(values: pd.Series, positions: np.ndarray) -> np.ndarray | pd.api.extensions.ExtensionArray:
+    """Values at positions as a numpy array, or an extension array when values has an extension dtype"""
+    if pd.api.types.is_extension_array_dtype(values.dtype):
+        return values.array.take(positions)
+    return values.to_numpy().take(positions)
+
+
 def calibrate_heating_systems(df: pd.DataFrame, factor: pd.DataFrame, multiply=False) -> pd.DataFrame:
     # When factor is empty or all factors are 1.0, there is no need to change anything.
     if len(factor) == 0 or (factor.factor == 1.0).all():
@@ -233,13 +337,13 @@ def calibrate_heating_systems(df: pd.DataFrame, factor: pd.DataFrame, multiply=F
     df_to_subtract = df_from.set_index(['building_category', 'building_code', 'year', 'from', 'to'])
 
     df_to_subtract = df_to_subtract.sort_index()
-    df_to_subtract.loc[:, 'v'] = -df_to_add.reset_index().groupby(by=['building_category', 'building_code', 'year', 'from', 'to']).agg(
+    df_to_subtract.loc[:, 'v'] = -df_to_add.reset_index().groupby(by=['building_category', 'building_code', 'year', 'from', 'to'], observed=True).agg(
         {'v': 'sum'})
 
     # Join add and substract rows
-    addition_grouped = df_to_add.groupby(by=['building_category', 'building_code', 'year', 'to']).agg(
+    addition_grouped = df_to_add.groupby(by=['building_category', 'building_code', 'year', 'to'], observed=True).agg(
         {'v': 'sum', 'heating_systems': 'first', 'heating_system_share': 'first', 'factor': 'first', 'from': 'first'})
-    subtraction_grouped = df_to_subtract.groupby(by=['building_category', 'building_code', 'year', 'from']).agg(
+    subtraction_grouped = df_to_subtract.groupby(by=['building_category', 'building_code', 'year', 'from'], observed=True).agg(
         {'v': 'sum', 'heating_systems': 'first', 'heating_system_share': 'first', 'factor': 'first'})
 
     df_to_sum = original.set_index(['building_category', 'building_code', 'year', 'heating_systems'])
@@ -282,13 +386,13 @@ def calibrate_heating_systems_adder(df: pd.DataFrame, factor: pd.DataFrame) -> p
 
     # Calculate value to subtract
     df_to_subtract = df_from.set_index(['building_category', 'building_code', 'year', 'from', 'to'])
-    df_to_subtract.loc[:, 'v'] = -df_to_add.reset_index().groupby(by=['building_category', 'building_code', 'year', 'from', 'to']).agg(
+    df_to_subtract.loc[:, 'v'] = -df_to_add.reset_index().groupby(by=['building_category', 'building_code', 'year', 'from', 'to'], observed=True).agg(
         {'v': 'sum'})
 
     # Join add and substract rows
-    addition_grouped = df_to_add.groupby(by=['building_category', 'building_code', 'year', 'to']).agg(
+    addition_grouped = df_to_add.groupby(by=['building_category', 'building_code', 'year', 'to'], observed=True).agg(
         {'v': 'sum', 'heating_systems': 'first', 'heating_system_share': 'first', 'factor': 'first', 'from': 'first'})
-    subtraction_grouped = df_to_subtract.groupby(by=['building_category', 'building_code', 'year', 'from']).agg(
+    subtraction_grouped = df_to_subtract.groupby(by=['building_category', 'building_code', 'year', 'from'], observed=True).agg(
         {'v': 'sum', 'heating_systems': 'first', 'heating_system_share': 'first', 'factor': 'first'})
 
     df_to_sum = original.set_index(['building_category', 'building_code', 'year', 'heating_systems'])
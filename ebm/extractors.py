@@ -1,10 +1,12 @@
+import os
+
 import pandas as pd
 from loguru import logger
 
 from ebm.areaforecast.s_curve import calculate_s_curves
 from ebm.heating_system_forecast import HeatingSystemsForecast
 from ebm.holiday_home_energy import calculate_energy_use, transform_holiday_homes_to_horizontal
-from ebm.model.area import calculate_all_area
+from ebm.model.area import calculate_all_area, calculate_all_area_by_building_category
 from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
 from ebm.model.energy_requirement import calculate_for_building_category
@@ -13,17 +15,47 @@ from ebm.model.energy_requirement import calculate_for_building_category
 def extract_area_forecast(years: YearRange,
                           s_curves_by_condition: pd.DataFrame,
                           building_code_parameters: pd.DataFrame, area_parameters: pd.DataFrame,
-                          database_manager:DatabaseManager) -> pd.DataFrame:
+                          database_manager:DatabaseManager, engine: str = 'pandas',
+                          processes: int | None = None) -> pd.DataFrame:
+    """
+    Calculate area by building_category, building_code, building_condition and year.
+
+    Parameters
+    ----------
+    years : YearRange
+    s_curves_by_condition : pd.DataFrame
+    building_code_parameters : pd.DataFrame
+    area_parameters : pd.DataFrame
+    database_manager : DatabaseManager
+    engine : str, default 'pandas'
+        'pandas' or 'numpy', see calculate_all_area
+    processes : int, optional
+        Number of processes used to calculate the building categories. When processes is None the environment
+        variable EBM_AREA_PROCESSES is used. Area is calculated in this process unless processes is greater than 1.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
     logger.debug('Calculating area by condition')
+    if processes is None:
+        processes = int(os.environ.get('EBM_AREA_PROCESSES', '1'))
 
     area_per_person = database_manager.get_area_per_person()
     area_new_residential_buildings = database_manager.get_area_new_residential_buildings()
     construction_population = database_manager.get_construction_population()
     new_buildings_category_share = database_manager.get_new_buildings_category_share()
 
+    if processes > 1:
+        return calculate_all_area_by_building_category(area_new_residential_buildings, area_parameters,
+                                                       area_per_person, building_code_parameters,
+                                                       construction_population, new_buildings_category_share,
+                                                       s_curves_by_condition, years, engine=engine,
+                                                       max_workers=processes)
+
     df = calculate_all_area(area_new_residential_buildings, area_parameters, area_per_person,
                             building_code_parameters, construction_population, new_buildings_category_share,
-                            s_curves_by_condition, years)
+                            s_curves_by_condition, years, engine=engine)
 
     return df
 
@@ -36,10 +68,25 @@ def extract_energy_need(years: YearRange, dm: DatabaseManager) -> pd.DataFrame:
     return energy_need
 
 
-def extract_heating_systems_forecast(years: YearRange, database_manager: DatabaseManager) -> pd.DataFrame:
+def extract_heating_systems_forecast(years: YearRange, database_manager: DatabaseManager,
+                                     engine: str = 'pandas') -> pd.DataFrame:
+    """
+    Project heating system shares from 2023 to years.end and pad the years before 2023.
+
+    Parameters
+    ----------
+    years : YearRange
+    database_manager : DatabaseManager
+    engine : str, default 'pandas'
+        'pandas' or 'numpy', see HeatingSystemsForecast.calculate_forecast
+
+    Returns
+    -------
+    pd.DataFrame
+    """
     forecast_period = YearRange(2023, years.end)
     hsp = HeatingSystemsForecast.new_instance(forecast_period, database_manager)
-    df: pd.DataFrame = hsp.calculate_forecast()
+    df: pd.DataFrame = hsp.calculate_forecast(engine=engine)
     df = hsp.pad_projection(df, YearRange(2020, 2022))
 
     heating_system_forecast = df.copy()
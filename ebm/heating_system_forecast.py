@@ -1,10 +1,15 @@
 # noinspection SpellCheckingInspection
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 from loguru import logger
 
+from ebm.model.array_operations import kahan_sum
 from ebm.model.building_category import NON_RESIDENTIAL, RESIDENTIAL, BuildingCategory
 from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
+from ebm.model.dimension_grid import cross_join_dimensions
 from ebm.model.heating_systems import HeatingSystems
 
 BUILDING_CATEGORY = 'building_category'
@@ -17,8 +22,14 @@ TEK_SHARES = 'heating_system_share'
 
 class HeatingSystemsForecast: # noqa: D101
 
-    def __init__(self, shares_start_year: pd.DataFrame, efficiencies: pd.DataFrame, forecast: pd.DataFrame, building_code_list: list[str], period: YearRange):
-        """Init HeatingSystemsForecast."""
+    def __init__(self, shares_start_year: pd.DataFrame, efficiencies: pd.DataFrame, forecast: pd.DataFrame, building_code_list: list[str], period: YearRange,
+                 validate: bool = True):
+        """
+        Init HeatingSystemsForecast.
+
+        When validate is False the sum of shares in shares_start_year is not checked, for callers that have already
+        checked it. The years in shares_start_year and forecast depend on period and are always checked.
+        """
         self.shares_start_year = shares_start_year
         self.efficiencies = efficiencies
         self.forecast = forecast
@@ -26,7 +37,8 @@ class HeatingSystemsForecast: # noqa: D101
         self.period = period
 
         self._validate_years()
-        check_sum_of_shares(shares_start_year)
+        if validate:
+            check_sum_of_shares(shares_start_year)
 
     def _validate_years(self) -> None:
         """
@@ -42,6 +54,10 @@ class HeatingSystemsForecast: # noqa: D101
         ValueError
             If any of the above validations fail.
 
+        See Also
+        --------
+        year_coverage_errors
+
         """
         start_year = self.shares_start_year[YEAR].unique()
         if len(start_year) != 1:
@@ -51,28 +67,19 @@ class HeatingSystemsForecast: # noqa: D101
         if start_year != self.period.start:
             raise ValueError("Start year in dataframe doesn't match start year for given period.")
 
-        projection = self.forecast.melt(id_vars = [BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS],
-                                        var_name = YEAR, value_name = "Andel_utskiftning")
-        projection[YEAR] = projection[YEAR].astype(int)
-        min_df = projection.groupby([BUILDING_CATEGORY, BUILDING_CODE]).agg(min_year=(YEAR, 'min')).reset_index()
-        min_mismatch = min_df[min_df['min_year'] != (start_year + 1)]
+        errors = year_coverage_errors(self.forecast, start_year, self.period)
+        if not errors.empty:
+            raise ValueError(errors.error.iloc[0])
 
-        if not min_mismatch.empty:
-            raise ValueError("Years don't match between dataframes.")
-
-        projection_period = self.period.subset(1).range()
-
-        def check_years(group: pd.Series): # noqa: ANN202
-            return set(projection_period).issubset(group[YEAR])
-
-        period_match = projection.groupby(by=[BUILDING_CATEGORY, BUILDING_CODE]).apply(check_years).reset_index()
-        if not period_match[period_match[0] == False].empty: # noqa: E712
-            raise ValueError("Years in dataframe not present in given period.")
-
-    def calculate_forecast(self) -> pd.DataFrame:
+    def calculate_forecast(self, engine: str = 'pandas') -> pd.DataFrame:
         """
         Project heating system shares across model years.
 
+        Parameters
+        ----------
+        engine : str, default 'pandas'
+            'pandas' or 'numpy', see project_heating_systems
+
         Returns
         -------
         pd.Dataframe
@@ -88,7 +95,7 @@ class HeatingSystemsForecast: # noqa: D101
                                                                  HeatingSystems,
                                                                  self.period.start)
         projected_shares = expand_building_category_building_code(self.forecast, self.building_code_list)
-        new_shares = project_heating_systems(shares_all_heating_systems, projected_shares, self.period)
+        new_shares = project_heating_systems(shares_all_heating_systems, projected_shares, self.period, engine=engine)
         heating_systems_projection = add_existing_heating_system_shares_to_projection(new_shares,
                                                                            self.shares_start_year,
                                                                            self.period)
@@ -173,12 +180,9 @@ def add_missing_heating_systems(heating_systems_shares: pd.DataFrame,
 
     if not heating_systems:
         heating_systems = HeatingSystems
-    oppvarmingstyper = pd.DataFrame(
-        {HEATING_SYSTEMS: [hs for hs in heating_systems]},
-    )
-
     df_aggregert_0_kombinasjoner = df_aggregert_0[[BUILDING_CATEGORY, BUILDING_CODE]].drop_duplicates()
-    df_aggregert_0_alle_oppvarmingstyper = df_aggregert_0_kombinasjoner.merge(oppvarmingstyper, how = 'cross')
+    df_aggregert_0_alle_oppvarmingstyper = cross_join_dimensions(df_aggregert_0_kombinasjoner,
+                                                                 **{HEATING_SYSTEMS: list(heating_systems)})
 
     df_aggregert_merged = df_aggregert_0_alle_oppvarmingstyper.merge(df_aggregert_0,
                                                                     on = [BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS],
@@ -248,7 +252,7 @@ def aggregere_lik_oppvarming_fjern_0(df:pd.DataFrame) -> pd.DataFrame:
     """
     df_fjern_null = df.query(f"{TEK_SHARES} != 0").copy()
     df_aggregert = df_fjern_null.groupby([BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, YEAR],
-                                         as_index = False)[TEK_SHARES].sum()
+                                         as_index = False, observed=True)[TEK_SHARES].sum()
     return df_aggregert
 
 
@@ -287,7 +291,8 @@ def expand_building_category_building_code(projection: pd.DataFrame,
 
 def project_heating_systems(shares_start_year_all_systems: pd.DataFrame,
                             projected_shares: pd.DataFrame,
-                            period: YearRange) -> pd.DataFrame:
+                            period: YearRange,
+                            engine: str = 'pandas') -> pd.DataFrame:
     """
     Forecast heating system shares over a given period based on initial shares and projected replacement rates.
 
@@ -302,6 +307,12 @@ def project_heating_systems(shares_start_year_all_systems: pd.DataFrame,
     period : YearRange
         The projection period, defined by a start and end year.
 
+    engine : str, default 'pandas'
+        'pandas' or 'numpy'. The numpy engine compiles projected_shares into transition matrices, see
+        compile_heating_system_transitions, and projects the start year shares with one matrix-vector product per
+        building category, building code and year. Both engines return the same dataframe. Input the numpy engine
+        does not support is projected with the pandas engine.
+
     Returns
     -------
     pandas.DataFrame
@@ -318,6 +329,15 @@ def project_heating_systems(shares_start_year_all_systems: pd.DataFrame,
     - The YEAR column is explicitly cast to integer at the end to ensure consistency.
 
     """
+    if engine not in ('pandas', 'numpy'):
+        msg = f'Unknown engine {engine}. Expected pandas or numpy.'
+        raise ValueError(msg)
+    if engine == 'numpy':
+        if _supports_numpy_projection(shares_start_year_all_systems, projected_shares, period):
+            transitions = compile_heating_system_transitions(projected_shares, period)
+            return project_heating_systems_numpy(shares_start_year_all_systems, transitions)
+        logger.debug('project_heating_systems falling back to pandas engine')
+
     df = shares_start_year_all_systems.copy()
     inputfil_oppvarming = projected_shares.copy()
 
@@ -341,7 +361,7 @@ def project_heating_systems(shares_start_year_all_systems: pd.DataFrame,
                                        on=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS], how='inner')
     df_merge['Ny_andel'] = (df_merge[TEK_SHARES] * df_merge['Andel_utskiftning'])
 
-    df_ny_andel_sum = df_merge.groupby([BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, f'{YEAR}_y'], as_index = False)[['Ny_andel']].sum()
+    df_ny_andel_sum = df_merge.groupby([BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, f'{YEAR}_y'], as_index = False, observed=True)[['Ny_andel']].sum()
     df_ny_andel_sum = df_ny_andel_sum.rename(columns={"Ny_andel": "Sum_ny_andel"})
 
     df_merge_sum_ny_andel = df_merge.merge(df_ny_andel_sum, on = [BUILDING_CATEGORY,BUILDING_CODE,HEATING_SYSTEMS, f'{YEAR}_y'])
@@ -383,10 +403,219 @@ def project_heating_systems(shares_start_year_all_systems: pd.DataFrame,
     return nye_andeler_samlet_uten_0
 
 
-def check_sum_of_shares(projected_shares: pd.DataFrame, precision: int = 10) -> None:
+@dataclass(frozen=True)
+class HeatingSystemTransitions:
+    """
+    heating_system_forecast compiled into sparse transition matrices, one for each building_category,
+    building_code and year.
+
+    Entry e replaces the share rates[e, y] of heating system heating_systems[sources[e]] with
+    heating_systems[targets[e]] for the building category and building code keys[groups[e]] in years[y]. Entries
+    are kept in the row order of the forecast.
+    """
+    keys: pd.MultiIndex
+    heating_systems: pd.Index
+    groups: np.ndarray
+    sources: np.ndarray
+    targets: np.ndarray
+    years: np.ndarray
+    rates: np.ndarray
+
+
+def compile_heating_system_transitions(projected_shares: pd.DataFrame, period: YearRange) -> HeatingSystemTransitions:
+    """
+    Compile projected_shares into a HeatingSystemTransitions for the years in period after the start year.
+
+    Parameters
+    ----------
+    projected_shares : pandas.DataFrame
+        heating_system_forecast with expanded building_category and building_code, see
+        expand_building_category_building_code. One column for each year.
+    period : YearRange
+
+    Returns
+    -------
+    HeatingSystemTransitions
+    """
+    id_columns = [BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS]
+    projection_years = set(period.subset(1).range())
+    year_columns = [c for c in projected_shares.columns if c not in id_columns and int(c) in projection_years]
+
+    groups, keys = pd.MultiIndex.from_arrays([projected_shares[BUILDING_CATEGORY],
+                                              projected_shares[BUILDING_CODE]]).factorize()
+    heating_systems, names = pd.factorize(pd.concat([projected_shares[HEATING_SYSTEMS],
+                                                     projected_shares[NEW_HEATING_SYSTEMS]], ignore_index=True))
+    return HeatingSystemTransitions(keys=keys,
+                                    heating_systems=pd.Index(names),
+                                    groups=groups,
+                                    sources=heating_systems[:len(projected_shares)],
+                                    targets=heating_systems[len(projected_shares):],
+                                    years=np.array([int(c) for c in year_columns], dtype=np.int64),
+                                    rates=projected_shares[year_columns].to_numpy(dtype=float))
+
+
+def _supports_numpy_projection(shares: pd.DataFrame, projected_shares: pd.DataFrame, period: YearRange) -> bool:
+    """
+    The numpy engine requires object key columns, one start year, unique keys in shares and projected_shares, a
+    rate for every year and at least one projection year.
+    """
+    key_columns = [BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS]
+    id_columns = [*key_columns, NEW_HEATING_SYSTEMS]
+    if any(shares[c].dtype != object for c in key_columns) or any(projected_shares[c].dtype != object for c in id_columns):
+        return False
+    years = shares[YEAR].to_numpy()
+    if years.size == 0 or (years[0] != years).any():
+        return False
+    if shares.duplicated(key_columns).any() or shares[TEK_SHARES].isna().any():
+        return False
+    if projected_shares.duplicated(id_columns).any():
+        return False
+    projection_years = set(period.subset(1).range())
+    try:
+        year_columns = [c for c in projected_shares.columns if c not in id_columns and int(c) in projection_years]
+    except (TypeError, ValueError):
+        return False
+    return bool(year_columns) and not projected_shares[year_columns].isna().any().any()
+
+
+def _grouped_kahan_sum(cells: np.ndarray, values: np.ndarray, cell_count: int,
+                       order: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sum the rows of values by cells, in the order of order within each cell, the same way as pandas GroupBy.sum.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        sums with one row for each cell and a mask of the sums with at least one value that is not NaN
+    """
+    sort_order = np.lexsort((np.arange(len(cells)) if order is None else order, cells))
+    sorted_cells = cells[sort_order]
+    rank = np.arange(len(sorted_cells)) - np.searchsorted(sorted_cells, sorted_cells, side='left')
+    padded = np.full((cell_count, rank.max(initial=-1) + 1, values.shape[1]), np.nan)
+    padded[sorted_cells, rank] = values[sort_order]
+    return kahan_sum(padded, axis=1), (~np.isnan(padded)).any(axis=1)
+
+
+def project_heating_systems_numpy(shares_start_year_all_systems: pd.DataFrame,
+                                  transitions: HeatingSystemTransitions) -> pd.DataFrame:
+    """
+    Numpy engine for project_heating_systems.
+
+    The share of a heating system in a year is the start year share, less the shares replaced by other heating
+    systems, plus the shares replacing other heating systems. Shares are gathered by position into one vector
+    for each building category and building code and multiplied by the transition matrix of each year.
+
+    Parameters
+    ----------
+    shares_start_year_all_systems : pandas.DataFrame
+        TEK_share values for all heating systems at the start year.
+    transitions : HeatingSystemTransitions
+
+    Returns
+    -------
+    pandas.DataFrame
+        The same dataframe as project_heating_systems(engine='pandas')
+    """
+    shares = shares_start_year_all_systems
+    share_index = pd.MultiIndex.from_arrays([shares[BUILDING_CATEGORY], shares[BUILDING_CODE], shares[HEATING_SYSTEMS]])
+    start_share = shares[TEK_SHARES].to_numpy(dtype=float)
+
+    category = transitions.keys.get_level_values(0)[transitions.groups]
+    building_code = transitions.keys.get_level_values(1)[transitions.groups]
+    source = share_index.get_indexer(pd.MultiIndex.from_arrays(
+        [category, building_code, transitions.heating_systems[transitions.sources]]))
+    target = share_index.get_indexer(pd.MultiIndex.from_arrays(
+        [category, building_code, transitions.heating_systems[transitions.targets]]))
+
+    # Like the inner merge of start year shares and forecast, entries without a start year share are ignored
+    has_source = source >= 0
+    source, target, rates = source[has_source], target[has_source], transitions.rates[has_source]
+    replaced = start_share[source, None] * rates
+
+    replaced_sum, is_source = _grouped_kahan_sum(source, replaced, len(shares))
+    existing = start_share[:, None] - replaced_sum
+
+    has_target = target >= 0
+    replacing = np.where(replaced[has_target] != 0.0, replaced[has_target], np.nan)
+    replacing_sum, is_target = _grouped_kahan_sum(target[has_target], replacing, len(shares), order=source[has_target])
+    replacing_sum = replacing_sum + start_share[:, None]
+
+    # The pandas engine drops a replacing share equal to the existing share of the same heating system as a duplicate
+    is_target = is_target & ~(is_source & (replacing_sum == existing))
+    existing = np.where(is_source & (existing != 0.0), existing, 0.0)
+    replacing_sum = np.where(is_target & (replacing_sum != 0.0), replacing_sum, 0.0)
+    share = existing + replacing_sum
+    is_share = (is_source & (existing != 0.0)) | (is_target & (replacing_sum != 0.0))
+
+    row, year = np.nonzero(is_share)
+    df = pd.DataFrame({YEAR: transitions.years[year],
+                       BUILDING_CATEGORY: shares[BUILDING_CATEGORY].to_numpy()[row],
+                       BUILDING_CODE: shares[BUILDING_CODE].to_numpy()[row],
+                       HEATING_SYSTEMS: shares[HEATING_SYSTEMS].to_numpy()[row],
+                       TEK_SHARES: share[row, year]})
+    df = df.sort_values(by=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, YEAR], kind='stable')
+    return df.reset_index(drop=True)
+
+
+def year_coverage_errors(forecast: pd.DataFrame, start_year: int, period: YearRange) -> pd.DataFrame:
+    """
+    Find the years in forecast that do not match start_year or period.
+
+    Every row of forecast has the same year columns, so the years are checked once for the whole forecast. An empty
+    forecast has no errors.
+
+    Parameters
+    ----------
+    forecast : pd.DataFrame
+        heating_system_forecast with one column for each year
+    start_year : int
+        Year of the start year shares. The first year of forecast must be the year after start_year.
+    period : YearRange
+
+    Returns
+    -------
+    pd.DataFrame
+        columns error and years, with the first year of forecast or the years of period missing in forecast. Empty
+        when every year is covered.
+    """
+    id_columns = [BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS]
+    years = {int(c) for c in forecast.columns if c not in id_columns} if not forecast.empty else set()
+
+    errors = []
+    if years and min(years) != start_year + 1:
+        errors.append(("Years don't match between dataframes.", [min(years)]))
+    missing_years = sorted(set(period.subset(1).range()).difference(years))
+    if years and missing_years:
+        errors.append(('Years in dataframe not present in given period.', missing_years))
+    return pd.DataFrame(errors, columns=['error', 'years'])
+
+
+def sum_of_shares_errors(projected_shares: pd.DataFrame, precision: int = 10) -> pd.DataFrame:
+    """
+    Find building_category, building_code and year where the sum of heating_system_share is not 1.
+
+    Parameters
+    ----------
+    projected_shares: pd.Dataframe
+        Dataframe must contain columns: 'building_category', 'building_code', 'year' and 'heating_system_share'
+    precision: int
+        Precision used for value check (with round), Defaults to 10
+
+    Returns
+    -------
+    pd.DataFrame
+        sum of heating_system_share indexed by building_category, building_code and year. Empty when every sum is 1.
+    """
+    df = projected_shares.groupby(by=[BUILDING_CATEGORY, BUILDING_CODE, YEAR], observed=True)[[TEK_SHARES]].sum()
+    return df[round(df[TEK_SHARES] * 100, precision) != 100.0]  # noqa: PLR2004
+
+
+def check_sum_of_shares(projected_shares: pd.DataFrame, precision: int = 10) -> pd.DataFrame:
     """
     Make sure that the sum of heating_system_share equals 1 per TEK, building category and year.
 
+    Each invalid sum is logged as an error.
+
     Parameters
     ----------
     projected_shares: pd.Dataframe
@@ -394,22 +623,19 @@ def check_sum_of_shares(projected_shares: pd.DataFrame, precision: int = 10) ->
     precision: int
         Precision used for value check (with round), Defaults to 10
 
-    Raises
-    ------
-    ValueError
-        If sum of shares for a building_codeis not equal to 1.
+    Returns
+    -------
+    pd.DataFrame
+        invalid sums, see sum_of_shares_errors
 
     """
-    df = projected_shares.copy()
-    df = df.groupby(by=[BUILDING_CATEGORY, BUILDING_CODE, YEAR])[[TEK_SHARES]].sum()
-    df['check'] = round(df[TEK_SHARES] * 100, precision) == 100.0 # noqa: PLR2004
-    invalid_shares = df[df['check'] == False].copy() # noqa: E712
-    invalid_shares = invalid_shares.drop(columns=['check'])
+    invalid_shares = sum_of_shares_errors(projected_shares, precision)
     if len(invalid_shares) > 0:
         logger.error('Sum of TEK shares not equal to 1 for:')
-        for idx, row in invalid_shares.iterrows():
-            logger.error('{idx}: {row_dict}', idx=idx, row_dict=row.to_dict())
+        for idx, row_dict in invalid_shares.to_dict(orient='index').items():
+            logger.error('{idx}: {row_dict}', idx=idx, row_dict=row_dict)
         logger.warning('Skipping ValueError on sum!=1.0')
+    return invalid_shares
 
 
 def add_existing_heating_system_shares_to_projection(new_shares: pd.DataFrame,
@@ -448,8 +674,9 @@ def add_existing_heating_system_shares_to_projection(new_shares: pd.DataFrame,
 
     def sortering_oppvarmingstyper(df: pd.DataFrame) -> [pd.DataFrame, list[str]]:
         df_kombinasjoner = df.copy()
-        df_kombinasjoner['Sortering'] = df_kombinasjoner[BUILDING_CATEGORY] + df_kombinasjoner[BUILDING_CODE] + \
-                                        df_kombinasjoner[HEATING_SYSTEMS]
+        df_kombinasjoner['Sortering'] = df_kombinasjoner[BUILDING_CATEGORY].astype(str) + \
+                                        df_kombinasjoner[BUILDING_CODE].astype(str) + \
+                                        df_kombinasjoner[HEATING_SYSTEMS].astype(str)
         kombinasjonsliste = list(df_kombinasjoner['Sortering'].unique())
         return df_kombinasjoner, kombinasjonsliste
 
@@ -1,15 +1,18 @@
-import typing
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
 from loguru import logger
 
+from ebm.model.array_operations import forward_fill, kahan_cumsum, kahan_sum
 from ebm.model.building_category import BuildingCategory
 from ebm.model.building_condition import BuildingCondition
 from ebm.model.data_classes import YearRange
-from ebm.model.database_manager import DatabaseManager
 from ebm.model.scurve import SCurve
 
+NUMPY_ENGINE_START_YEAR = 2020
+"""The first year of the period supported by the numpy engine of calculate_all_area"""
+
 
 def transform_area_forecast_to_area_change(area_forecast: pd.DataFrame,
                                            building_code_parameters: pd.DataFrame | None = None) -> pd.DataFrame:
@@ -58,7 +61,7 @@ def transform_area_forecast_to_area_change(area_forecast: pd.DataFrame,
         demolition_by_year[['building_category', 'building_code', 'year', 'demolition_construction', 'm2']],
         construction_by_year.reset_index()[['building_category', 'building_code', 'year', 'demolition_construction', 'm2']],
     ])
-    return area_change.fillna(0.0)
+    return area_change.fillna({'m2': 0.0})
 
 
 def transform_cumulative_demolition_to_yearly_demolition(area_forecast: pd.DataFrame) -> pd.DataFrame:
@@ -98,7 +101,7 @@ def transform_cumulative_demolition_to_yearly_demolition(area_forecast: pd.DataF
     df = area_forecast[area_forecast['building_condition'] == BuildingCondition.DEMOLITION].copy()
     df = df.set_index(['building_category', 'building_code', 'building_condition', 'year']).sort_index()
     df['m2'] = df['m2'].fillna(0)
-    df['diff'] = df.groupby(by=['building_category', 'building_code', 'building_condition']).diff()['m2']
+    df['diff'] = df.groupby(by=['building_category', 'building_code', 'building_condition'], observed=True).diff()['m2']
 
     return df.reset_index()[['building_category', 'building_code', 'year', 'diff']].rename(columns={'diff': 'm2'})
 
@@ -165,7 +168,7 @@ def transform_construction_by_year(area_forecast: pd.DataFrame,
 
     constructed['total'] = constructed.sum(axis=1)
 
-    constructed=constructed.groupby(by=['building_category', 'building_code'], as_index=False).diff()
+    constructed=constructed.groupby(by=['building_category', 'building_code'], as_index=False, observed=True).diff()
     constructed = constructed.reset_index()[['building_category', 'building_code', 'year', 'total']]
     constructed.columns = ['building_category', 'building_code', 'year', 'm2']
     return constructed
@@ -217,7 +220,7 @@ def transform_demolition_construction(energy_use: pd.DataFrame, area_change: pd.
     df = energy_use[energy_use['building_condition']=='renovation_and_small_measure']
 
     energy_use_m2 = (df
-        .groupby(by=['building_category', 'building_condition', 'building_code', 'year'], as_index=False)
+        .groupby(by=['building_category', 'building_condition', 'building_code', 'year'], as_index=False, observed=True)
         .sum()[['building_category',  'building_code', 'year', 'kwh_m2']]
     )
 
@@ -416,7 +419,7 @@ def merge_total_area_by_year(construction_by_building_category_yearly: pd.Series
     total_area_by_year = (existing_area
                               .drop(columns=['year_r'], errors='ignore')
                               .combine_first(construction_by_building_category_yearly.to_frame())
-                              .groupby(by=['building_category', 'building_code']).ffill()
+                              .groupby(by=['building_category', 'building_code'], observed=True).ffill()
     )
     return total_area_by_year
 
@@ -496,7 +499,7 @@ def construction_with_building_code(building_category_demolition_by_year: pd.Ser
 
     df = construction_with_building_code.set_index(['building_category', 'building_code', 'year'])[['constructed_floor_area']]
 
-    df['net_construction_acc'] = df.groupby(by=['building_category', 'building_code'])['constructed_floor_area'].cumsum()
+    df['net_construction_acc'] = df.groupby(by=['building_category', 'building_code'], observed=True)['constructed_floor_area'].cumsum()
     #s.name = 'construction'
 
     return df.rename(columns={'constructed_floor_area': 'net_construction'})
@@ -530,7 +533,7 @@ def sum_building_category_demolition_by_year(demolition_by_year: pd.Series) -> p
         Demolished floor area by building_category and year
 
     """
-    demolition_by_building_category_year = demolition_by_year.groupby(by=['building_category', 'year']).sum()
+    demolition_by_building_category_year = demolition_by_year.groupby(by=['building_category', 'year'], observed=True).sum()
     return demolition_by_building_category_year
 
 
@@ -617,7 +620,7 @@ def _check_index(period: YearRange, values: pd.Series) -> bool:
 
 def calculate_residential_construction(households_by_year: pd.Series, building_category_share: pd.Series,
                                        build_area_sum: pd.Series,
-                                       average_floor_area: typing.Union[pd.Series, int] = 175,
+                                       average_floor_area: pd.Series | int = 175,
                                        period: YearRange = YearRange(2010, 2050)) -> pd.DataFrame:  # noqa: B008
     """
     Calculate various residential construction metrics based on population, household size, and building data.
@@ -741,7 +744,7 @@ def calculate_yearly_constructed_floor_area(build_area_sum: pd.Series, yearly_fl
 
 
 def calculate_yearly_floor_area_change(building_change: pd.Series,
-                                       average_floor_area: typing.Union[pd.Series, int] = 175) -> pd.Series:
+                                       average_floor_area: pd.Series | int = 175) -> pd.Series:
     """
     Calculate the yearly floor area change based on building changes and average floor area.
 
@@ -749,7 +752,7 @@ def calculate_yearly_floor_area_change(building_change: pd.Series,
     ----------
     building_change : pd.Series
         A pandas Series representing the change in the number of buildings.
-    average_floor_area : typing.Union[pd.Series, int], optional
+    average_floor_area : pd.Series | int, optional
         The average floor area per building. Can be a pandas Series or an integer. Default is 175.
 
     Returns
@@ -934,40 +937,47 @@ def calculate_construction_with_demolition(construction_by_building_category_and
         msg = f'Missing required columns in construction_by_building_category_and_year ({", ".join(missing_columns)})'
         raise ValueError(msg)
 
-    demolition_by_building_category: pd.DataFrame = demolition_floor_area_by_year.rename('demolition').to_frame().groupby(['building_category', 'year']).sum()
-    demolition_by_building_category.loc[(list(residential_building_categories), [2020, 2021]), 'demolition'] = 0.0
+    demolition_by_building_category: pd.DataFrame = demolition_floor_area_by_year.rename('demolition').to_frame().groupby(
+        ['building_category', 'year'], observed=True).sum()
+    residential = demolition_by_building_category.index.unique(level='building_category').intersection(
+        list(residential_building_categories))
+    if not residential.empty:
+        demolition_by_building_category.loc[(list(residential), [2020, 2021]), 'demolition'] = 0.0
 
     # not_residential buildings require shifting 1 year forward to align properly. Residential is already shifted for
     # some reason. The shifting must occur before the construction area building_code is applied.
     not_residential = demolition_by_building_category.query(
         make_non_residential_query(residential_building_categories)).index
-    demolition_by_building_category.loc[not_residential, 'demolition'] = demolition_by_building_category.groupby(by=['building_category'])['demolition'].shift(1)
+    demolition_by_building_category.loc[not_residential, 'demolition'] = demolition_by_building_category.groupby(
+        by=['building_category'], observed=True)['demolition'].shift(1)
 
     #construction_with_demolition = construction_by_building_category_and_year.merge(demolition_by_building_category, on=['building_category', 'year'])
     construction_with_demolition = construction_by_building_category_and_year.join(demolition_by_building_category, on=['building_category', 'year'])
     construction_with_demolition = construction_with_demolition.reset_index().set_index(['building_category', 'building_code', 'year'])
     construction_with_demolition['rebuilt'] = construction_with_demolition['demolition']
 
-    construction_with_demolition['rebuilt_acc'] = construction_with_demolition.groupby(by=['building_category', 'building_code'])['rebuilt'].cumsum()
+    construction_with_demolition['rebuilt_acc'] = construction_with_demolition.groupby(
+        by=['building_category', 'building_code'], observed=True)['rebuilt'].cumsum()
     construction_with_demolition['construction'] = construction_with_demolition['rebuilt'] + construction_with_demolition['net_construction']
     construction_with_demolition['area'] = (construction_with_demolition['net_construction_acc'] + construction_with_demolition['rebuilt_acc']).fillna(0.0)
 
     return construction_with_demolition
 
 
-def check_yearly_index( df: pd.DataFrame, year_range: YearRange):
+def check_yearly_index(df: pd.DataFrame, year_range: YearRange) -> pd.DataFrame:
     name = 'population_forecast'
     required = set(year_range)
     present = set(df.index.dropna().astype(int))
     missing = required - present
     if missing:
-        raise ValueError(f"{name} missing values for years: {sorted(missing)}")
+        msg = f'{name} missing values for years: {sorted(missing)}'
+        raise ValueError(msg)
     return df
 
 
 def calculate_construction(building_category_demolition_by_year: pd.Series, years: YearRange,
                            area_per_person: pd.Series, yearly_construction_floor_area: pd.Series,
-                           new_buildings_population: pd.DataFrame, new_buildings_category_shares) -> pd.DataFrame:
+                           new_buildings_population: pd.DataFrame, new_buildings_category_shares: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate construction for different building_categories.
 
@@ -1001,26 +1011,11 @@ def calculate_construction(building_category_demolition_by_year: pd.Series, year
                                                   demolition=demolition)
             c['building_category'] = building_category
         else:
-            share_name, floor_area_name = 'new_house_share', 'floor_area_new_house'
-            if building_category == BuildingCategory.APARTMENT_BLOCK:
-                share_name = 'new_apartment_block_share'
-                floor_area_name = 'flood_area_new_apartment_block'
-            building_category_share = new_buildings_category_shares[share_name]
-            average_floor_area = new_buildings_category_shares[floor_area_name]
-            household_size = new_buildings_population['household_size']
-            population = new_buildings_population['population']
-            households_by_year = calculate_households_by_year(household_size, population)
-            bc_yearly_construction_floor_area=yearly_construction_floor_area[building_category].dropna()
-
-            build_area_sum = pd.Series(
-                data=bc_yearly_construction_floor_area,
-                index=range(years.start, years.start + len(bc_yearly_construction_floor_area)))
-
-            c = calculate_residential_construction(households_by_year=households_by_year,
-                                              building_category_share=building_category_share,
-                                              build_area_sum=build_area_sum,
-                                              average_floor_area=average_floor_area,
-                                              period=years)
+            c = calculate_residential_building_category_construction(
+                building_category=building_category, years=years,
+                yearly_construction_floor_area=yearly_construction_floor_area,
+                new_buildings_population=new_buildings_population,
+                new_buildings_category_shares=new_buildings_category_shares)
 
             c['building_category'] = building_category
 
@@ -1030,10 +1025,96 @@ def calculate_construction(building_category_demolition_by_year: pd.Series, year
     return all_construction
 
 
-def calculate_all_area(area_new_residential_buildings, area_parameters, area_per_person,
-                       building_code_parameters, construction_population, new_buildings_category_share,
-                       s_curves_by_condition, years):
+def calculate_residential_building_category_construction(building_category: str, years: YearRange,
+                                                         yearly_construction_floor_area: pd.DataFrame,
+                                                         new_buildings_population: pd.DataFrame,
+                                                         new_buildings_category_shares: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculate construction for the residential building_category house or apartment_block.
 
+    Parameters
+    ----------
+    building_category : str
+        house or apartment_block
+    years : YearRange
+        period for construction
+    yearly_construction_floor_area : pd.DataFrame
+        constructed floor area by year for the first years of the period, with a column for each building_category
+    new_buildings_population : pd.DataFrame
+        population and household_size by year
+    new_buildings_category_shares : pd.DataFrame
+        share and average floor area of new houses and apartment blocks by year
+
+    Returns
+    -------
+    pd.DataFrame
+        see calculate_residential_construction
+    """
+    share_name, floor_area_name = 'new_house_share', 'floor_area_new_house'
+    if building_category == BuildingCategory.APARTMENT_BLOCK:
+        share_name = 'new_apartment_block_share'
+        floor_area_name = 'flood_area_new_apartment_block'
+    building_category_share = new_buildings_category_shares[share_name]
+    average_floor_area = new_buildings_category_shares[floor_area_name]
+    household_size = new_buildings_population['household_size']
+    population = new_buildings_population['population']
+    households_by_year = calculate_households_by_year(household_size, population)
+    bc_yearly_construction_floor_area=yearly_construction_floor_area[building_category].dropna()
+
+    build_area_sum = pd.Series(
+        data=bc_yearly_construction_floor_area,
+        index=range(years.start, years.start + len(bc_yearly_construction_floor_area)))
+
+    return calculate_residential_construction(households_by_year=households_by_year,
+                                              building_category_share=building_category_share,
+                                              build_area_sum=build_area_sum,
+                                              average_floor_area=average_floor_area,
+                                              period=years)
+
+
+def calculate_all_area(area_new_residential_buildings: pd.DataFrame, area_parameters: pd.DataFrame, area_per_person: pd.Series,
+                       building_code_parameters: pd.DataFrame, construction_population: pd.DataFrame,
+                       new_buildings_category_share: pd.DataFrame, s_curves_by_condition: pd.DataFrame, years: YearRange,
+                       engine: str = 'pandas') -> pd.DataFrame:
+    """
+    Calculate floor area by building_category, building_code, building_condition and year.
+
+    Parameters
+    ----------
+    area_new_residential_buildings : pd.DataFrame
+    area_parameters : pd.DataFrame
+    area_per_person : pd.Series
+    building_code_parameters : pd.DataFrame
+    construction_population : pd.DataFrame
+    new_buildings_category_share : pd.DataFrame
+    s_curves_by_condition : pd.DataFrame
+    years : YearRange
+    engine : str, default 'pandas'
+        'pandas' or 'numpy'. The numpy engine calculates area on dense
+        (building_category, building_code, year, building_condition) arrays and returns an identical dataframe. It
+        falls back to pandas for input it does not support.
+
+    Returns
+    -------
+    pd.DataFrame
+        area_forecast with m2 and the construction columns for every building_condition
+
+    See Also
+    --------
+    calculate_all_area_numpy
+    """
+    if engine not in ('pandas', 'numpy'):
+        msg = f'Unknown engine {engine}. Expected pandas or numpy.'
+        raise ValueError(msg)
+    if engine == 'numpy':
+        if _supports_numpy_area_engine(area_parameters, building_code_parameters, s_curves_by_condition, years):
+            return calculate_all_area_numpy(area_new_residential_buildings=area_new_residential_buildings,
+                                            area_parameters=area_parameters, area_per_person=area_per_person,
+                                            building_code_parameters=building_code_parameters,
+                                            construction_population=construction_population,
+                                            new_buildings_category_share=new_buildings_category_share,
+                                            s_curves_by_condition=s_curves_by_condition, years=years)
+        logger.debug('calculate_all_area falling back to pandas engine')
 
     s_curve_demolition = s_curves_by_condition['s_curve_demolition']
     cconditions = s_curves_by_condition[[
@@ -1071,5 +1152,209 @@ def calculate_all_area(area_new_residential_buildings, area_parameters, area_per
         how='left').copy()
 
     df = df.set_index([ 'building_category', 'building_code', 'building_condition', 'year']).copy()
-    df[['net_construction_acc', 'rebuilt_acc']] = df.groupby(by=['building_category', 'building_code', 'building_condition'])[['net_construction_acc', 'rebuilt_acc']].ffill()
+    df[['net_construction_acc', 'rebuilt_acc']] = df.groupby(by=['building_category', 'building_code', 'building_condition'],
+                                                             observed=True)[['net_construction_acc', 'rebuilt_acc']].ffill()
     return df.reset_index()
+
+
+def calculate_all_area_by_building_category(area_new_residential_buildings: pd.DataFrame, area_parameters: pd.DataFrame,
+                                            area_per_person: pd.Series, building_code_parameters: pd.DataFrame,
+                                            construction_population: pd.DataFrame,
+                                            new_buildings_category_share: pd.DataFrame,
+                                            s_curves_by_condition: pd.DataFrame, years: YearRange, engine: str = 'pandas',
+                                            max_workers: int | None = None) -> pd.DataFrame:
+    """
+    Calculate area like calculate_all_area with each building_category calculated in a separate process.
+
+    Construction, demolition and existing area of a building_category do not depend on other building categories, so
+    the inputs are partitioned by building_category and calculate_all_area is called on each partition in a
+    ProcessPoolExecutor. The partitions are concatenated in sorted building_category order, which gives the same
+    dataframe as calculate_all_area on all building categories.
+
+    Parameters
+    ----------
+    See calculate_all_area
+    max_workers : int, optional
+        Number of processes. The ProcessPoolExecutor default, the number of CPUs, is used when max_workers is None.
+        With max_workers=1 the partitions are calculated one by one in this process.
+
+    Returns
+    -------
+    pd.DataFrame
+        The same dataframe as calculate_all_area
+    """
+    building_categories = sorted(set(area_parameters.building_category).union(
+        s_curves_by_condition.index.unique(level='building_category')))
+    partitions = []
+    for building_category in building_categories:
+        partitions.append({
+            'area_new_residential_buildings': area_new_residential_buildings,
+            'area_parameters': area_parameters[area_parameters.building_category == building_category],
+            'area_per_person': area_per_person,
+            'building_code_parameters': building_code_parameters,
+            'construction_population': construction_population,
+            'new_buildings_category_share': new_buildings_category_share,
+            's_curves_by_condition': s_curves_by_condition[
+                s_curves_by_condition.index.get_level_values('building_category') == building_category],
+            'years': years,
+            'engine': engine})
+
+    if max_workers == 1:
+        area_by_building_category = [_calculate_building_category_area(partition) for partition in partitions]
+    else:
+        logger.debug(f'Calculating area for {len(partitions)} building categories in parallel')
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            area_by_building_category = list(executor.map(_calculate_building_category_area, partitions))
+    return pd.concat(area_by_building_category, ignore_index=True)
+
+
+def _calculate_building_category_area(partition: dict) -> pd.DataFrame:
+    return calculate_all_area(**partition)
+
+
+def _supports_numpy_area_engine(area_parameters: pd.DataFrame, building_code_parameters: pd.DataFrame,
+                                s_curves_by_condition: pd.DataFrame, years: YearRange) -> bool:
+    """
+    The numpy engine requires s_curves_by_condition indexed by a sorted (building_category, building_code, year)
+    where building_code are the codes in building_code_parameters, the building categories are those in
+    area_parameters and year are the years starting in NUMPY_ENGINE_START_YEAR.
+    """
+    index = s_curves_by_condition.index
+    if index.names != ['building_category', 'building_code', 'year'] or years.start != NUMPY_ENGINE_START_YEAR:
+        return False
+    if not index.is_monotonic_increasing or not index.is_unique:
+        return False
+    categories, codes, index_years = (index.unique(level=level) for level in range(3))
+    if index_years.to_list() != list(years.year_range):
+        return False
+    building_codes = building_code_parameters.building_code
+    if building_codes.duplicated().any() or set(building_codes) != set(codes):
+        return False
+    if area_parameters.duplicated(subset=['building_category', 'building_code']).any():
+        return False
+    return set(area_parameters.building_category) == set(categories)
+
+
+def _is_residential(categories: pd.Index) -> np.ndarray:
+    """True for each building category in categories that is residential"""
+    return categories.isin([b for b in BuildingCategory if b.is_residential()])
+
+
+def _building_category_construction_numpy(*, categories: pd.Index, years: YearRange, area_per_person: pd.Series,
+                                          yearly_construction_floor_area: pd.DataFrame,
+                                          new_buildings_population: pd.DataFrame,
+                                          new_buildings_category_shares: pd.DataFrame) -> np.ndarray:
+    """Constructed floor area by building_category and year, as calculated by calculate_construction"""
+    check_yearly_index(new_buildings_population, years)
+    year_index = years.to_index()
+    constructed_floor_area = np.empty((len(categories), len(year_index)))
+
+    is_residential = _is_residential(categories)
+    non_residential = categories[~is_residential]
+    population = new_buildings_population['population'].loc[year_index].to_numpy()
+    total_area = area_per_person.loc[non_residential].to_numpy()[:, np.newaxis] * population[np.newaxis, :]
+    yearly_constructed = np.zeros(total_area.shape)
+    yearly_constructed[:, 1:] = total_area[:, 1:] - total_area[:, :-1]
+    constructed_floor_area[~is_residential] = np.nan_to_num(yearly_constructed, nan=0.0) + 0.0
+    constructed_floor_area[~is_residential, 0] = 0.0
+
+    for position in np.flatnonzero(is_residential):
+        c = calculate_residential_building_category_construction(
+            building_category=categories[position], years=years,
+            yearly_construction_floor_area=yearly_construction_floor_area,
+            new_buildings_population=new_buildings_population,
+            new_buildings_category_shares=new_buildings_category_shares)
+        constructed_floor_area[position] = c.constructed_floor_area.reindex(year_index).to_numpy()
+    return constructed_floor_area
+
+
+def calculate_all_area_numpy(*, area_new_residential_buildings: pd.DataFrame, area_parameters: pd.DataFrame,
+                             area_per_person: pd.Series, building_code_parameters: pd.DataFrame,
+                             construction_population: pd.DataFrame, new_buildings_category_share: pd.DataFrame,
+                             s_curves_by_condition: pd.DataFrame, years: YearRange) -> pd.DataFrame:
+    """
+    Numpy engine for calculate_all_area.
+
+    Area is held in dense (building_category, building_code, year) arrays ordered like the index of
+    s_curves_by_condition. Combinations missing from s_curves_by_condition have NaN shares, like in the pandas engine.
+    Construction, demolition and the accumulated sums are calculated with array arithmetic, and the shares by
+    building_condition are applied by broadcasting. Grouped sums and cumulative sums use Kahan
+    summation like pandas, so the result is identical to calculate_all_area(engine='pandas').
+
+    Parameters
+    ----------
+    See calculate_all_area
+
+    Returns
+    -------
+    pd.DataFrame
+        The same dataframe as calculate_all_area(engine='pandas')
+    """
+    conditions = ['original_condition', 'small_measure', 'renovation', 'renovation_and_small_measure', 'demolition']
+    categories, codes, year_index = (s_curves_by_condition.index.unique(level=level) for level in range(3))
+    index = pd.MultiIndex.from_product([categories, codes, year_index], names=s_curves_by_condition.index.names)
+    if len(index) != len(s_curves_by_condition):
+        # s-curves are missing for building codes older than the building lifetime late in the period
+        s_curves_by_condition = s_curves_by_condition.reindex(index)
+    shape = len(categories), len(codes), len(year_index)
+    year_values = year_index.to_numpy()
+
+    area = area_parameters.set_index(['building_category', 'building_code'])['area']
+    area = area.reindex(pd.MultiIndex.from_product([categories, codes])).to_numpy(dtype='float64').reshape(shape[:2])
+    existing_area = np.broadcast_to(area[:, :, np.newaxis], shape)
+
+    # Demolition by building_category and year. Non-residential demolition is shifted one year forward, residential
+    # demolition is zero the first two years.
+    s_curve_demolition = s_curves_by_condition['s_curve_demolition'].to_numpy().reshape(shape)
+    demolition = kahan_sum(existing_area * s_curve_demolition, axis=1)
+    is_residential = _is_residential(categories)
+    demolition[np.ix_(is_residential, np.isin(year_values, [2020, 2021]))] = 0.0
+    demolition[~is_residential, 1:] = demolition[~is_residential, :-1]
+    demolition[~is_residential, 0] = np.nan
+
+    # Construction by building_category, building_code and year. Only building codes in use a given year has rows.
+    constructed_floor_area = _building_category_construction_numpy(
+        categories=categories, years=years, area_per_person=area_per_person,
+        yearly_construction_floor_area=area_new_residential_buildings, new_buildings_population=construction_population,
+        new_buildings_category_shares=new_buildings_category_share)
+    building_code = building_code_parameters.set_index('building_code').loc[codes]
+    period_start = building_code.period_start_year.to_numpy()[:, np.newaxis]
+    period_end = building_code.period_end_year.to_numpy()[:, np.newaxis]
+    min_year = max(building_code_parameters.period_start_year.min(), NUMPY_ENGINE_START_YEAR)
+    has_construction = ((period_start <= year_values) & (year_values <= period_end) &
+                        (period_end >= years.start) & (year_values >= min_year))
+    has_construction = np.broadcast_to(has_construction[np.newaxis, :, :], shape)
+
+    net_construction = np.where(has_construction, constructed_floor_area[:, np.newaxis, :], np.nan)
+    net_construction_acc = kahan_cumsum(net_construction)
+    rebuilt = np.where(has_construction, demolition[:, np.newaxis, :], np.nan)
+    rebuilt_acc = kahan_cumsum(rebuilt)
+    construction = rebuilt + net_construction
+    construction_area = np.where(has_construction, np.nan_to_num(net_construction_acc + rebuilt_acc, nan=0.0), np.nan)
+
+    total_area = forward_fill(np.where(np.isnan(existing_area), construction_area, existing_area))
+    shares = s_curves_by_condition[conditions].to_numpy().reshape((*shape, len(conditions)))
+    m2 = shares * total_area[..., np.newaxis]
+
+    rows = len(index) * len(conditions)
+    is_original = np.zeros((*shape, len(conditions)), dtype=bool)
+    is_original[..., 0] = True
+
+    def original_condition_only(values: np.ndarray) -> np.ndarray:
+        return np.where(is_original, values[..., np.newaxis], np.nan).reshape(rows)
+
+    df = pd.DataFrame({
+        'building_category': np.repeat(index.get_level_values(0).to_numpy(), len(conditions)),
+        'building_code': np.repeat(index.get_level_values(1).to_numpy(), len(conditions)),
+        'building_condition': np.tile(np.array(conditions, dtype=object), len(index)),
+        'year': np.repeat(index.get_level_values(2).to_numpy(), len(conditions)),
+        'm2': m2.reshape(rows),
+    })
+    for column in s_curves_by_condition.columns:
+        df[column] = np.repeat(s_curves_by_condition[column].to_numpy(), len(conditions))
+    df['construction'] = original_condition_only(construction)
+    df['rebuilt'] = original_condition_only(rebuilt)
+    df['net_construction'] = original_condition_only(net_construction)
+    df['net_construction_acc'] = original_condition_only(forward_fill(net_construction_acc))
+    df['rebuilt_acc'] = original_condition_only(forward_fill(rebuilt_acc))
+    return df
@@ -0,0 +1,77 @@
+"""numpy counterparts of the pandas group operations used by the model"""
+import numpy as np
+
+
+def kahan_cumsum(values: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum along the last axis skipping NaN, where NaN is kept in the result.
+
+    Uses Kahan summation like pandas GroupBy.cumsum, so the result is identical to a grouped cumsum where each group
+    is a row along the last axis.
+
+    Parameters
+    ----------
+    values : np.ndarray
+
+    Returns
+    -------
+    np.ndarray
+    """
+    accumulated = np.zeros(values.shape[:-1])
+    compensation = np.zeros(values.shape[:-1])
+    result = np.full(values.shape, np.nan)
+    for position in range(values.shape[-1]):
+        value = values[..., position]
+        is_value = ~np.isnan(value)
+        y = value - compensation
+        t = accumulated + y
+        compensation = np.where(is_value, t - accumulated - y, compensation)
+        accumulated = np.where(is_value, t, accumulated)
+        result[..., position] = np.where(is_value, t, np.nan)
+    return result
+
+
+def kahan_sum(values: np.ndarray, axis: int = -1) -> np.ndarray:
+    """
+    Sum along axis skipping NaN. The sum of only NaN is 0.0.
+
+    Uses Kahan summation like pandas GroupBy.sum, so the result is identical to a grouped sum where each group is a
+    row along axis.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    axis : int, default -1
+
+    Returns
+    -------
+    np.ndarray
+    """
+    values = np.moveaxis(values, axis, -1)
+    accumulated = np.zeros(values.shape[:-1])
+    compensation = np.zeros(values.shape[:-1])
+    for position in range(values.shape[-1]):
+        value = values[..., position]
+        is_value = ~np.isnan(value)
+        y = value - compensation
+        t = accumulated + y
+        compensation = np.where(is_value, t - accumulated - y, compensation)
+        accumulated = np.where(is_value, t, accumulated)
+    return accumulated
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """
+    Propagate the last value that is not NaN forward along the last axis, like pandas GroupBy.ffill.
+
+    Parameters
+    ----------
+    values : np.ndarray
+
+    Returns
+    -------
+    np.ndarray
+    """
+    positions = np.where(np.isnan(values), 0, np.arange(values.shape[-1]))
+    np.maximum.accumulate(positions, axis=-1, out=positions)
+    return np.take_along_axis(values, positions, axis=-1)
@@ -1,5 +1,7 @@
 from types import MappingProxyType
 
+from pandas.api.types import CategoricalDtype
+
 from ebm.model.building_category import NON_RESIDENTIAL, RESIDENTIAL, BuildingCategory
 from ebm.model.building_condition import BuildingCondition
 
@@ -102,7 +104,8 @@ def map_sort_order(column):
     pandas.Series
         A Series with values mapped to integers according to the corresponding
         sort order. If the column name does not match any predefined mapping,
-        the original Series is returned unchanged.
+        the original Series is returned unchanged. Ordered categoricals, see
+        ebm.model.dimension_dtypes, already sort in BeMa order and are returned unchanged.
 
     Notes
     -----
@@ -138,6 +141,8 @@ def map_sort_order(column):
       non_residential      3
       all               last
     """
+    if isinstance(column.dtype, CategoricalDtype) and column.dtype.ordered:
+        return column
     if column.name=='building_category':
         return column.map(_building_mix_order)
     if column.name=='building_group':
@@ -1,6 +1,7 @@
 import typing
 from enum import EnumType, StrEnum, unique
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 
@@ -138,14 +139,24 @@ def expand_building_categories(df: pd.DataFrame, unique_columns: typing.List[str
     """
     if unique_columns:
         df = df.drop_duplicates(subset=unique_columns, ignore_index=True, keep='last')
-    groups = df[df.building_category.isin([RESIDENTIAL, NON_RESIDENTIAL])]
+    is_group = df.building_category.isin([RESIDENTIAL, NON_RESIDENTIAL])
+    groups = df[is_group]
     specific = df[~df.building_category.isin(groups.building_category)]
+    if groups.empty:
+        return specific.copy()
 
-    expanded_groups = [expand_building_category(row) for _, row in groups.iterrows()]
+    members = {RESIDENTIAL: [b for b in BuildingCategory if b.is_residential()],
+               NON_RESIDENTIAL: [b for b in BuildingCategory if b.is_non_residential()]}
+    counts = groups.building_category.map({group: len(categories) for group, categories in members.items()}).to_numpy(dtype=int)
+    building_category = np.array([b for group in groups.building_category for b in members[group]], dtype=object)
 
-    filtered = [d[~d.building_category.isin(specific.building_category)] for d in expanded_groups]
+    expanded = groups.drop(columns=['building_category']).iloc[np.repeat(np.arange(len(groups)), counts)]
+    expanded.insert(0, 'building_category', building_category)
+    # Each expanded group is numbered from 0 like a DataFrame made from the group row
+    expanded.index = np.arange(len(expanded)) - np.repeat(np.cumsum(counts) - counts, counts)
+    expanded = expanded[~expanded.building_category.isin(specific.building_category)]
 
-    return pd.concat(filtered + [specific]).reindex()
+    return pd.concat([expanded, specific])
 
 
 def collapse_building_category(building_category: pd.Series) -> pd.Series:
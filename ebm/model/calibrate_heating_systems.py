@@ -65,7 +65,8 @@ def load_energy_need(area_forecast: pd.DataFrame, database_manager: DatabaseMana
 
 def load_heating_systems(energy_requirements: pd.DataFrame, database_manager: DatabaseManager) -> pd.DataFrame:
     heating_systems = calculate_heating_systems(energy_requirements=energy_requirements,
-                                                database_manager=database_manager, period=YearRange(2020, 2050))
+                                                database_manager=database_manager, period=YearRange(2020, 2050),
+                                                sort=False, engine='numpy')
 
     return heating_systems
 
@@ -114,7 +115,7 @@ def group_heating_systems_by_energy_carrier(df: pd.DataFrame) -> pd.DataFrame:
 
     energy_use = pd.concat([rv_gl, rv_sl, rv_el, cooling, spesifikt_elforbruk, tappevann, rv_hp])
 
-    sums = energy_use.groupby(by=['building_group', 'energy_source', 'year']).sum() / (10**6)
+    sums = energy_use.groupby(by=['building_group', 'energy_source', 'year'], observed=True).sum() / (10**6)
     df = sums.reset_index()
     df = df.rename(columns={'building_group': 'building_category'})
     try:
@@ -183,7 +184,7 @@ class DistributionOfHeatingSystems:
         df.loc[df['building_category'].isin(['apartment_block']), 'building_group'] = 'Boligblokk'
         df.loc[df['building_category'].isin(['house']), 'building_group'] = 'Småhus'
 
-        distribution_of_heating_systems_by_building_group = df.groupby(by=['building_group', 'heating_systems'])[
+        distribution_of_heating_systems_by_building_group = df.groupby(by=['building_group', 'heating_systems'], observed=True)[
             ['heating_system_share']].mean()
         return distribution_of_heating_systems_by_building_group
 
@@ -1,10 +1,174 @@
+import functools
 import pathlib
+from collections.abc import Iterable
 from typing import List, Optional
 
+import numpy as np
 import pandas as pd
+from loguru import logger
 from pandera.typing.common import DataFrameBase
 
-from ebm.model.building_category import BuildingCategory
+from ebm.model.building_category import NON_RESIDENTIAL, RESIDENTIAL, BuildingCategory
+from ebm.model.energy_purpose import EnergyPurpose
+
+# alias -> (values, rank). Values of a lower rank take precedence over values of a higher rank.
+ColumnAliases = dict[str, tuple[tuple, int]]
+
+
+def building_category_aliases() -> ColumnAliases:
+    """
+    Aliases of building_category. A specific building category takes precedence over residential and
+    non_residential, which take precedence over default.
+
+    Returns
+    -------
+    ColumnAliases
+    """
+    residential = tuple(str(bc) for bc in BuildingCategory if bc.is_residential())
+    non_residential = tuple(str(bc) for bc in BuildingCategory if not bc.is_residential())
+    return {RESIDENTIAL: (residential, 1),
+            NON_RESIDENTIAL: (non_residential, 1),
+            'default': (tuple(str(bc) for bc in BuildingCategory), 2)}
+
+
+def default_aliases(values: Iterable, alias: str = 'default') -> ColumnAliases:
+    """
+    Expand alias into values. A specific value takes precedence over alias.
+
+    Returns
+    -------
+    ColumnAliases
+    """
+    return {alias: (tuple(str(v) for v in values), 1)}
+
+
+def purpose_aliases() -> ColumnAliases:
+    return default_aliases(EnergyPurpose)
+
+
+def unique_column_aliases(default_building_code: Iterable[str] | None = None) -> dict[str, ColumnAliases]:
+    """
+    Aliases of building_category and building_code used by explode_unique_columns.
+
+    Parameters
+    ----------
+    default_building_code : Iterable[str], optional
+        building codes replacing default. The building codes in data/original/building_code_parameters.csv are used
+        when not provided.
+
+    Returns
+    -------
+    dict[str, ColumnAliases]
+    """
+    building_codes = default_building_code if default_building_code is not None else _original_building_codes()
+    return {'building_category': building_category_aliases(),
+            'building_code': default_aliases(building_codes)}
+
+
+@functools.lru_cache(maxsize=1)
+def _original_building_codes() -> tuple[str, ...]:
+    building_code_parameters = pathlib.Path(__file__).parent.parent / 'data' / 'original' / 'building_code_parameters.csv'
+    return tuple(pd.read_csv(building_code_parameters)['building_code'].unique())
+
+
+def expand_aliases(df: pd.DataFrame | DataFrameBase,
+                   column_aliases: dict[str, ColumnAliases],
+                   unique_columns: Iterable[str] | None = None) -> pd.DataFrame:
+    """
+    Expand aliases like default, residential and non_residential into the values they represent in one pass.
+
+    Every column in column_aliases is expanded with a join against a mapping table from each value to the values it
+    represents and its rank. Values that are not aliases are split on '+' and have rank 0. When unique_columns is given,
+    only the row with the lowest rank is kept for each combination of unique_columns. Rank is compared column by
+    column in the order of column_aliases, so the first column takes precedence: with building_category before
+    building_code a (house, default) row is preferred over a (default, TEK07) row. When rows of the same combination of
+    unique_columns have the same rank, the aliases are expanded one by one with explode_column_alias, in reverse order
+    of column_aliases, so that the row kept is the same as before expand_aliases was introduced.
+
+    Rows are returned in the order of df with expanded values in the order of the aliases. The index of each row is
+    the index of the row it was expanded from.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+    column_aliases : dict[str, ColumnAliases]
+        Aliases by column, see building_category_aliases and default_aliases
+    unique_columns : Iterable[str], optional
+        Columns to use for de-duplication. No de-duplication is done when not provided.
+
+    Returns
+    -------
+    pd.DataFrame
+
+    Raises
+    ------
+    ValueError
+        When a column in column_aliases is not in df
+
+    Examples
+    --------
+    >>> d_f = pd.DataFrame({'building_code': ['TEK07', 'default'], 'v': [1, 2]})
+    >>> expand_aliases(d_f, {'building_code': default_aliases(['TEK07', 'TEK10'])}, unique_columns=['building_code'])
+      building_code  v
+    0         TEK07  1
+    1         TEK10  2
+    """
+    missing = [column for column in column_aliases if column not in df.columns]
+    if missing:
+        msg = f"The DataFrame (df) must contain the column: {', '.join(missing)}"
+        raise ValueError(msg)
+
+    columns = list(df.columns)
+    expanded = pd.DataFrame(df).reset_index(drop=True)
+    expanded['_row'] = np.arange(len(expanded))
+    ranks = []
+    for position, (column, aliases) in enumerate(column_aliases.items()):
+        rank = f'_rank_{position}'
+        mapping = _alias_mapping(expanded[column].unique(), aliases).rename(columns={'_value': column, '_rank': rank})
+        expanded = expanded.rename(columns={column: '_alias'}).merge(mapping, on='_alias', how='inner')
+        expanded = expanded.drop(columns=['_alias'])
+        ranks.append(rank)
+
+    if unique_columns:
+        unique_columns = list(unique_columns)
+        expanded = expanded.sort_values(by=ranks, kind='stable')
+        kept = expanded.drop_duplicates(unique_columns, keep='first')
+        if _has_ties(expanded, kept, unique_columns + ranks):
+            logger.debug('expand_aliases falling back to explode_column_alias for rows with the same rank')
+            return _explode_aliases(df, column_aliases, unique_columns)
+        expanded = kept.sort_index()
+
+    result = expanded[columns]
+    result.index = df.index.take(expanded['_row'].to_numpy())
+    return result
+
+
+def _has_ties(expanded: pd.DataFrame, kept: pd.DataFrame, columns: list[str]) -> bool:
+    """True when more than one row in expanded has the unique columns and ranks of a kept row"""
+    return len(expanded[columns].merge(kept[columns], on=columns, how='inner')) > len(kept)
+
+
+def _explode_aliases(df: pd.DataFrame, column_aliases: dict[str, ColumnAliases], unique_columns: list[str]) -> pd.DataFrame:
+    """Expand column_aliases one alias at a time, the way explode_unique_columns did before expand_aliases"""
+    for column, aliases in reversed(column_aliases.items()):
+        for alias, (values, _rank) in aliases.items():
+            df = explode_column_alias(df, column=column, values=list(values), alias=alias, de_dup_by=unique_columns)
+    return df
+
+
+def _alias_mapping(values: np.ndarray, aliases: ColumnAliases) -> pd.DataFrame:
+    """Mapping table with columns _alias, _value and _rank for every value in values"""
+    table = _alias_table(tuple((alias, expanded, rank) for alias, (expanded, rank) in aliases.items()))
+    specific = [(value, token, 0) for value in values if value not in aliases
+                for token in (value.split('+') if isinstance(value, str) else [value])]
+    return pd.concat([table[table['_alias'].isin(values)],
+                      pd.DataFrame(specific, columns=['_alias', '_value', '_rank'])], ignore_index=True)
+
+
+@functools.lru_cache(maxsize=32)
+def _alias_table(aliases: tuple) -> pd.DataFrame:
+    return pd.DataFrame([(alias, value, rank) for alias, expanded, rank in aliases for value in expanded],
+                        columns=['_alias', '_value', '_rank'])
 
 
 def explode_building_category_column(df: pd.DataFrame, unique_columns: List[str]) -> pd.DataFrame:
@@ -23,19 +187,7 @@ def explode_building_category_column(df: pd.DataFrame, unique_columns: List[str]
         pd.DataFrame
             The DataFrame with exploded 'building_category' columns.
     """
-    df = explode_column_alias(df=df, column='building_category',
-                              values=[bc for bc in BuildingCategory if bc.is_residential()],
-                              alias='residential',
-                              de_dup_by=unique_columns)
-    df = explode_column_alias(df=df, column='building_category',
-                              values=[bc for bc in BuildingCategory if not bc.is_residential()],
-                              alias='non_residential',
-                              de_dup_by=unique_columns)
-    df = explode_column_alias(df=df, column='building_category',
-                              values=[bc for bc in BuildingCategory],
-                              alias='default',
-                              de_dup_by=unique_columns)
-    return df
+    return expand_aliases(df, {'building_category': building_category_aliases()}, unique_columns)
 
 
 def explode_building_code_column(df: pd.DataFrame, unique_columns: List[str],
@@ -57,13 +209,8 @@ def explode_building_code_column(df: pd.DataFrame, unique_columns: List[str],
         pd.DataFrame
             The DataFrame with exploded 'building_code' columns.
         """
-    # Hvor skal building_code_list hentes fra?
-    building_code_list = pd.read_csv(pathlib.Path(__file__).parent.parent / 'data' / 'original' /'building_code_parameters.csv')['building_code'].unique() if default_building_code is None else default_building_code
-    df = explode_column_alias(df=df,
-                              column='building_code',
-                              values=building_code_list,
-                              de_dup_by=unique_columns)
-    return df
+    aliases = unique_column_aliases(default_building_code)['building_code']
+    return expand_aliases(df, {'building_code': aliases}, unique_columns)
 
 
 def explode_unique_columns(df: pd.DataFrame| DataFrameBase,
@@ -72,6 +219,8 @@ def explode_unique_columns(df: pd.DataFrame| DataFrameBase,
     """
     Explodes 'building_code' and 'building_category' columns in df.
 
+    A specific building_category takes precedence over residential and non_residential, which take precedence over
+    default. Within the same building_category a specific building_code takes precedence over default.
 
     Parameters
     ----------
@@ -87,10 +236,7 @@ def explode_unique_columns(df: pd.DataFrame| DataFrameBase,
     pd.DataFrame
         The DataFrame with exploded columns.
     """
-
-    df = explode_building_code_column(df, unique_columns, default_building_code=default_building_code)
-    df = explode_building_category_column(df, unique_columns)
-    return df
+    return expand_aliases(df, unique_column_aliases(default_building_code), unique_columns)
 
 
 def explode_column_alias(df, column, values: list|dict=None, alias='default', de_dup_by: list[str]=None):
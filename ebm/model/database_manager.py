@@ -1,4 +1,3 @@
-import itertools
 import typing
 
 import pandas as pd
@@ -10,7 +9,7 @@ from ebm.model.building_category import BuildingCategory, expand_building_catego
 from ebm.model.column_operations import explode_building_category_column, explode_building_code_column, explode_unique_columns
 from ebm.model.data_classes import TEKParameters, YearRange
 from ebm.model.dataframemodels import EnergyNeedYearlyImprovements, PolicyImprovement, YearlyReduction
-from ebm.model.energy_purpose import EnergyPurpose
+from ebm.model.dimension_grid import building_purpose_grid
 from ebm.model.file_handler import FileHandler
 
 # TODO:
@@ -69,20 +68,7 @@ class DatabaseManager:
         -------
         pd.DataFrame
         """
-        data = []
-        columns = [list(BuildingCategory), self.get_building_code_list().tolist(), EnergyPurpose]
-        column_headers = ['building_category', 'building_code', 'building_condition', 'purpose']
-        if years:
-            columns.append(years)
-            column_headers.append('year')
-
-        for bc, tek, purpose, *year in itertools.product(*columns):
-            row = [bc, tek, 'original_condition', purpose]
-            if years:
-                row.append(year[0])
-            data.append(row)
-
-        return pd.DataFrame(data=data, columns=column_headers)
+        return building_purpose_grid(self.get_building_code_list().tolist(), years=years)
 
     def get_building_codes(self) -> pd.DataFrame:
         """
@@ -2,8 +2,7 @@ from typing import cast
 
 import pandas as pd
 import pandera as pa
-from ebm.model.column_operations import explode_column_alias, explode_unique_columns
-from ebm.model.energy_purpose import EnergyPurpose
+from ebm.model.column_operations import expand_aliases, purpose_aliases, unique_column_aliases
 from pandera.typing import Series
 from pandera.typing.common import DataFrameBase
 
@@ -66,8 +65,7 @@ class YearlyReduction(pa.DataFrameModel):
             df['end_year'] = 2050
         df = df.query('function=="yearly_reduction"')
 
-        df = explode_unique_columns(df, unique_columns=unique_columns)
-        df = explode_column_alias(df, column='purpose', values=[p for p in EnergyPurpose], alias='default', de_dup_by=unique_columns)
+        df = expand_aliases(df, {'purpose': purpose_aliases(), **unique_column_aliases()}, unique_columns=unique_columns)
 
         df['yearly_efficiency_improvement'] = df['value']
         df = df[['building_category', 'building_code', 'purpose', 'function', 'start_year', 'end_year', 'yearly_efficiency_improvement']]
@@ -101,9 +99,7 @@ class PolicyImprovement(pa.DataFrameModel):
         if 'end_year' not in df.columns:
             df['end_year'] = 2050
         unique_columns = ('building_category', 'building_code', 'purpose', 'function')
-        df = explode_unique_columns(df, unique_columns=unique_columns)
-        df = explode_column_alias(df, column='purpose', values=[p for p in EnergyPurpose], alias='default',
-                                  de_dup_by=unique_columns)
+        df = expand_aliases(df, {'purpose': purpose_aliases(), **unique_column_aliases()}, unique_columns=unique_columns)
 
         df['improvement_at_end_year'] = df['value']
 
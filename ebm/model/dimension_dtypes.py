@@ -0,0 +1,137 @@
+"""Ordered categorical dtypes for the model dimensions building_category, building_code, purpose and so on"""
+import functools
+import typing
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from ebm.model.bema import BUILDING_CATEGORY_ORDER, BUILDING_CONDITION_ORDER, BUILDING_GROUP_ORDER, PURPOSE_ORDER, TEK_ORDER
+from ebm.model.building_category import NON_RESIDENTIAL, RESIDENTIAL, BuildingCategory
+from ebm.model.building_condition import BuildingCondition
+from ebm.model.energy_purpose import EnergyPurpose
+from ebm.model.heating_systems import HeatingSystems
+
+ENERGY_PRODUCT_ORDER = ('Electricity', 'DH', 'Bio', 'Fossil', 'Solar', 'Ingen')
+ALIASES = frozenset(['default', 'all', RESIDENTIAL, NON_RESIDENTIAL])
+
+
+def _by_order(order: typing.Mapping, *members: typing.Iterable) -> tuple[str, ...]:
+    """Keys of order sorted by their value followed by members not in order"""
+    categories = [str(k) for k, _ in sorted(order.items(), key=lambda kv: kv[1])]
+    for values in members:
+        categories.extend(str(v) for v in values)
+    return tuple(dict.fromkeys(categories))
+
+
+DIMENSION_CATEGORIES: typing.Mapping[str, tuple[str, ...]] = {
+    'building_category': _by_order({**BUILDING_GROUP_ORDER, **BUILDING_CATEGORY_ORDER}, BuildingCategory),
+    'building_group': _by_order(BUILDING_GROUP_ORDER),
+    'building_code': _by_order(TEK_ORDER),
+    'building_condition': _by_order(BUILDING_CONDITION_ORDER, BuildingCondition),
+    'purpose': _by_order(PURPOSE_ORDER, EnergyPurpose, ['default']),
+    'heating_systems': tuple(str(h) for h in HeatingSystems),
+    'energy_product': ENERGY_PRODUCT_ORDER,
+}
+"""Categories of each model dimension in BeMa sort order"""
+
+
+@functools.lru_cache(maxsize=128)
+def dimension_dtype(dimension: str, extra: tuple[str, ...] = ()) -> CategoricalDtype:
+    """
+    Ordered categorical dtype of dimension.
+
+    Parameters
+    ----------
+    dimension : str
+        Name of a dimension in DIMENSION_CATEGORIES
+    extra : tuple[str, ...], optional
+        Values to add after the registered categories, for instance building codes from the input
+
+    Returns
+    -------
+    CategoricalDtype
+
+    Raises
+    ------
+    KeyError
+        When dimension is not a known dimension
+    """
+    categories = DIMENSION_CATEGORIES[dimension]
+    return CategoricalDtype(categories + tuple(e for e in extra if e not in categories), ordered=True)
+
+
+def to_dimension_categorical(values: pd.Series | pd.Index, dimension: str | None = None) -> pd.Series | pd.Index:
+    """
+    Convert values to the ordered categorical of dimension.
+
+    Values that are not registered for the dimension are added as categories after the registered ones in sorted
+    order, so no value is lost. Values that are already of the same dtype are returned as they are.
+
+    Parameters
+    ----------
+    values : pd.Series or pd.Index
+    dimension : str, optional
+        Name of the dimension. values.name is used when not provided.
+
+    Returns
+    -------
+    pd.Series or pd.Index
+    """
+    dimension = dimension if dimension is not None else values.name
+    if isinstance(values.dtype, CategoricalDtype) and values.dtype.ordered:
+        unique = values.dtype.categories
+    else:
+        unique = pd.unique(values[values.notna()].astype(str))
+    extra = tuple(sorted(v for v in unique if v not in DIMENSION_CATEGORIES[dimension]))
+    dtype = dimension_dtype(dimension, extra)
+    if values.dtype == dtype:
+        return values
+    return values.astype(dtype)
+
+
+def has_aliases(values: pd.Series | pd.Index) -> bool:
+    """True when values contains an alias like default and residential, or values joined with +"""
+    if isinstance(values.dtype, CategoricalDtype):
+        values = values.dtype.categories
+    values = pd.Series(pd.unique(values[values.notna()]), dtype=object).astype(str)
+    return bool(values.isin(ALIASES).any() or values.str.contains('+', regex=False).any())
+
+
+def to_categorical(df: pd.DataFrame, dimensions: typing.Iterable[str] | None = None) -> pd.DataFrame:
+    """
+    Convert every dimension column and index level in df to ordered categoricals.
+
+    Sorting the returned frame by a dimension uses the BeMa sort order without key=map_sort_order. Columns with
+    aliases like default and residential are left as they are, since the aliases are replaced when the input is
+    expanded.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+    dimensions : Iterable[str], optional
+        Dimensions to convert. Every dimension in DIMENSION_CATEGORIES when not provided.
+
+    Returns
+    -------
+    pd.DataFrame
+        A new DataFrame. Other columns are unchanged.
+
+    Examples
+    --------
+    >>> df = to_categorical(pd.DataFrame({'building_category': ['office', 'house'], 'v': [1, 2]}))
+    >>> df.sort_values('building_category').building_category.to_list()
+    ['house', 'office']
+    """
+    dimensions = set(DIMENSION_CATEGORIES if dimensions is None else dimensions)
+    columns = {c: to_dimension_categorical(df[c]) for c in df.columns
+               if c in dimensions and df[c].ndim == 1 and not has_aliases(df[c])}
+    df = df.assign(**columns) if columns else df.copy()
+
+    levels = [name for name in df.index.names if name in dimensions and not has_aliases(df.index.get_level_values(name))]
+    if levels:
+        if isinstance(df.index, pd.MultiIndex):
+            df.index = df.index.set_levels([to_dimension_categorical(df.index.levels[df.index.names.index(name)], name)
+                                            for name in levels], level=levels)
+        else:
+            df.index = to_dimension_categorical(df.index)
+    return df
@@ -0,0 +1,110 @@
+"""Cached grids of every combination of model dimensions like building_category, building_code, purpose and year"""
+import functools
+import typing
+
+import numpy as np
+import pandas as pd
+
+from ebm.model.building_category import BuildingCategory
+from ebm.model.data_classes import YearRange
+from ebm.model.energy_purpose import EnergyPurpose
+
+DEFAULT_BUILDING_CODES = ('PRE_TEK49', 'TEK49', 'TEK69', 'TEK87', 'TEK97', 'TEK07', 'TEK10', 'TEK17')
+
+
+def dimension_index(**dimensions: typing.Iterable) -> pd.MultiIndex:
+    """
+    Every combination of the values in dimensions as a MultiIndex named by the dimensions.
+
+    The combinations are ordered like itertools.product over the dimensions in the order given. Each level holds the
+    unique values of one dimension and the rows are codes into the levels, so the grid is built in one allocation
+    without creating a row at a time. Grids are cached by their dimensions and reused for the rest of the run.
+
+    Parameters
+    ----------
+    **dimensions : Iterable
+        Values of each dimension, for instance building_category=list(BuildingCategory), year=YearRange(2020, 2050)
+
+    Returns
+    -------
+    pd.MultiIndex
+
+    Examples
+    --------
+    >>> dimension_index(building_code=['TEK07', 'TEK10'], year=YearRange(2020, 2021))
+    MultiIndex([('TEK07', 2020),
+                ('TEK07', 2021),
+                ('TEK10', 2020),
+                ('TEK10', 2021)],
+               names=['building_code', 'year'])
+    """
+    # The type is part of the key so that a grid of BuildingCategory is not returned for the equal str values
+    key = tuple((name, tuple((type(value), value) for value in values)) for name, values in dimensions.items())
+    return _dimension_index(key)
+
+
+@functools.lru_cache(maxsize=64)
+def _dimension_index(key: tuple) -> pd.MultiIndex:
+    return pd.MultiIndex.from_product([[value for _, value in values] for _, values in key],
+                                      names=[name for name, _ in key])
+
+
+def dimension_grid(**dimensions: typing.Iterable) -> pd.DataFrame:
+    """
+    Every combination of the values in dimensions as a DataFrame with one column for each dimension.
+
+    See dimension_index.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    return dimension_index(**dimensions).to_frame(index=False)
+
+
+def cross_join_dimensions(df: pd.DataFrame, **dimensions: typing.Iterable) -> pd.DataFrame:
+    """
+    Combine every row in df with every combination of the values in dimensions.
+
+    The result is the same as df.merge(dimension_grid(**dimensions), how='cross').
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+    **dimensions : Iterable
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    index = dimension_index(**dimensions)
+    rows = len(df)
+    df = df.iloc[np.repeat(np.arange(rows), len(index))].reset_index(drop=True)
+    for level, name in enumerate(index.names):
+        df[name] = np.tile(index.get_level_values(level).to_numpy(), rows)
+    return df
+
+
+def building_purpose_grid(building_codes: typing.Iterable[str] = DEFAULT_BUILDING_CODES,
+                          years: YearRange | None = None) -> pd.DataFrame:
+    """
+    Every combination of building_category, building_code, purpose and optionally year in original_condition.
+
+    Parameters
+    ----------
+    building_codes : Iterable[str], optional
+    years : YearRange, optional
+
+    Returns
+    -------
+    pd.DataFrame
+        columns building_category, building_code, building_condition, purpose and year when years is given
+    """
+    dimensions = {'building_category': list(BuildingCategory),
+                  'building_code': building_codes,
+                  'purpose': list(EnergyPurpose)}
+    if years:
+        dimensions['year'] = years
+    df = dimension_grid(**dimensions)
+    df.insert(2, 'building_condition', 'original_condition')
+    return df
@@ -1,5 +1,123 @@
-def transform_total_energy_need(energy_need_kwh_m2, area_forecast):
-    total_energy_need = area_forecast.reset_index().set_index(
+import typing
+
+import pandas as pd
+
+from ebm.model.building_category import BuildingCategory
+from ebm.model.building_condition import BuildingCondition
+from ebm.model.data_classes import YearRange
+from ebm.model.database_manager import DatabaseManager
+from ebm.model.dimension_grid import dimension_grid
+from ebm.model.energy_purpose import EnergyPurpose
+from ebm.model.energy_requirement import energy_need_improvements_kwh_m2, gather_building_codes
+
+ENERGY_NEED_INDEX = ['building_category', 'building_code', 'purpose', 'building_condition', 'year']
+
+
+class EnergyNeed:
+    """
+    Energy need kwh/m2 kept as the separate factors of energy_need_improvements.
+
+    kwh_m2 is the product of original kwh_m2, behaviour factor, reduction by building condition, yearly reduction and
+    policy reduction. The factors are only multiplied out by to_dataframe for the building categories and years
+    requested, so a slice does not pay for the full building_category, building_code, purpose, building_condition and
+    year grid.
+
+    Examples
+    --------
+    >>> energy_need = EnergyNeed.from_database_manager(database_manager)
+    >>> energy_need.to_dataframe(building_category=['house'], year=[2023])
+    """
+
+    def __init__(self, energy_need_original_condition: pd.DataFrame, reduction_per_condition: pd.DataFrame,
+                 policy_improvement: pd.DataFrame, yearly_improvement: pd.DataFrame,
+                 years: YearRange | None = None):
+        self.energy_need_original_condition = energy_need_original_condition
+        self.reduction_per_condition = reduction_per_condition
+        self.policy_improvement = policy_improvement
+        self.yearly_improvement = yearly_improvement
+        self.years = years if years is not None else YearRange(2020, 2050)
+        self.building_codes = gather_building_codes(policy_improvement, energy_need_original_condition,
+                                                    yearly_improvement, reduction_per_condition)
+
+    @classmethod
+    def from_database_manager(cls, database_manager: DatabaseManager, years: YearRange | None = None) -> 'EnergyNeed':
+        return cls(energy_need_original_condition=database_manager.get_energy_req_original_condition(years),
+                   reduction_per_condition=database_manager.get_energy_req_reduction_per_condition(),
+                   policy_improvement=database_manager.get_energy_need_policy_improvement(),
+                   yearly_improvement=database_manager.get_energy_need_yearly_improvements(),
+                   years=years)
+
+    def to_dataframe(self, building_category: typing.Iterable[str] | None = None,
+                     year: typing.Iterable[int] | None = None) -> pd.DataFrame:
+        """
+        Multiply out energy need for building_category and year.
+
+        The result has the same rows and columns as energy_need_improvements filtered by building_category and year,
+        with a new RangeIndex.
+
+        Parameters
+        ----------
+        building_category : Iterable[str], optional
+            Building categories to include. Every building category when None.
+        year : Iterable[int], optional
+            Years to include. Every year in years when None.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        building_categories = list(BuildingCategory)
+        if building_category is not None:
+            selected = set(building_category)
+            building_categories = [c for c in building_categories if c in selected]
+        years = list(self.years)
+        if year is not None:
+            selected = set(year)
+            years = [y for y in years if y in selected]
+
+        df_years = dimension_grid(building_category=building_categories, building_code=self.building_codes,
+                                  purpose=list(EnergyPurpose),
+                                  building_condition=list(BuildingCondition.existing_conditions()), year=years)
+
+        original_condition = self.energy_need_original_condition
+        original_condition = original_condition[original_condition.building_category.isin(building_categories)]
+        if 'year' in original_condition.columns:
+            original_condition = original_condition[original_condition.year.isin(years)]
+
+        df = energy_need_improvements_kwh_m2(energy_need_original_condition=original_condition,
+                                             reduction_per_condition=self.reduction_per_condition,
+                                             policy_improvement=self.policy_improvement,
+                                             yearly_improvement=self.yearly_improvement,
+                                             df_years=df_years,
+                                             years=self.years)
+        df = df.drop_duplicates(ENERGY_NEED_INDEX, keep='first')
+        return df.reset_index(drop=True)
+
+
+def transform_total_energy_need(energy_need_kwh_m2: pd.DataFrame | EnergyNeed, area_forecast: pd.DataFrame) -> pd.DataFrame:
+    """
+    Multiply energy need kwh_m2 with area m2 into energy_requirement.
+
+    When energy_need_kwh_m2 is an EnergyNeed, energy need is only calculated for the building categories and years in
+    area_forecast.
+
+    Parameters
+    ----------
+    energy_need_kwh_m2 : pd.DataFrame or EnergyNeed
+        Energy need indexed by building_category, building_code, purpose, building_condition and year
+    area_forecast : pd.DataFrame
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    area_forecast = area_forecast.reset_index()
+    if isinstance(energy_need_kwh_m2, EnergyNeed):
+        energy_need_kwh_m2 = energy_need_kwh_m2.to_dataframe(
+            building_category=area_forecast.building_category.unique(),
+            year=area_forecast.year.unique()).set_index(ENERGY_NEED_INDEX)
+
+    total_energy_need = area_forecast.set_index(
         ['building_category', 'building_code', 'building_condition', 'year']).merge(energy_need_kwh_m2, left_index=True,
                                                                           right_index=True)
     total_energy_need['energy_requirement'] = total_energy_need.kwh_m2 * total_energy_need.m2
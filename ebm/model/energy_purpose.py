@@ -75,7 +75,7 @@ def group_energy_use_kwh_by_building_group_purpose_year_wide(energy_use_kwh: pd.
     df.loc['house', 'building_group'] = 'house'
     df.loc['apartment_block', 'building_group'] = 'apartment_block'
 
-    summed = df.groupby(by=['building_group', 'purpose', 'year']).sum().reset_index()
+    summed = df.groupby(by=['building_group', 'purpose', 'year'], observed=True).sum().reset_index()
     summed = summed[['building_group', 'purpose', 'year', 'GWh']]
 
     hz = summed.pivot(columns=['year'], index=['building_group', 'purpose'], values=['GWh']).reset_index()
@@ -98,7 +98,7 @@ def group_energy_use_by_year_category_building_code_purpose(energy_use_kwh: pd.D
 
     df.loc[:, 'GWh'] = (df['m2'] * df['kwh_m2']) / 1_000_000
 
-    df = df.reset_index().groupby(by=['year', 'building_category', 'building_code', 'purpose'], as_index=False).sum()
+    df = df.reset_index().groupby(by=['year', 'building_category', 'building_code', 'purpose'], as_index=False, observed=True).sum()
     df = df[['year', 'building_category', 'building_code', 'purpose', 'GWh']]
     df = df.sort_values(by=['year', 'building_category', 'building_code', 'purpose'],
                         key=lambda x: x.map(BUILDING_CATEGORY_ORDER) if x.name == 'building_category' else x.map(
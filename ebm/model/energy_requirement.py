@@ -4,14 +4,19 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
+from ebm.model.array_operations import forward_fill
 from ebm.model.building_category import BuildingCategory
 from ebm.model.building_condition import BuildingCondition
 from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
+from ebm.model.dimension_grid import dimension_grid
 from ebm.model.energy_purpose import EnergyPurpose
 from ebm.model.file_handler import FileHandler
 from ebm.services.files import make_unique_path
 
+REDUCTION_KEYS = ['building_category', 'building_code', 'purpose']
+CONDITION_KEYS = ['building_category', 'building_code', 'purpose', 'building_condition']
+
 
 def yearly_reduction(x: pd.DataFrame) -> np.array:
     if x.year < x.period_start_year:
@@ -82,7 +87,8 @@ def gather_building_codes(*dataframes):
 
 def energy_need_improvements_kwh_m2(energy_need_original_condition: pd.DataFrame,
                                     reduction_per_condition: pd.DataFrame, policy_improvement: pd.DataFrame,
-                                    yearly_improvement: pd.DataFrame, df_years: pd.DataFrame) -> pd.DataFrame:
+                                    yearly_improvement: pd.DataFrame, df_years: pd.DataFrame,
+                                    years: YearRange | None = None) -> pd.DataFrame:
 
     energy_need_original_condition = energy_need_original_condition.copy()
 
@@ -97,11 +103,12 @@ def energy_need_improvements_kwh_m2(energy_need_original_condition: pd.DataFrame
     energy_requirements = erq_all_years.drop(columns=['index', 'level_0'], errors='ignore')
 
     return calculate_energy_reduction(energy_requirements, policy_improvement, reduction_per_condition,
-                                           yearly_improvement)
+                                           yearly_improvement, years=years)
 
 
 def calculate_energy_reduction( energy_requirements: pd.DataFrame, policy_improvement: pd.DataFrame,
-                               reduction_per_condition: pd.DataFrame, yearly_improvement: pd.DataFrame) -> pd.DataFrame:
+                               reduction_per_condition: pd.DataFrame, yearly_improvement: pd.DataFrame,
+                               years: YearRange | None = None) -> pd.DataFrame:
     """
     Calculate and combine all reduction factors for energy needs into a single Dataframe.
 
@@ -111,29 +118,112 @@ def calculate_energy_reduction( energy_requirements: pd.DataFrame, policy_improv
     policy_improvement : pd.DataFrame
     reduction_per_condition : pd.DataFrame
     yearly_improvement : pd.DataFrame
+    years : YearRange, optional
+        Years used to calculate the yearly reduction. Defaults to the years in energy_requirements. Use it when
+        energy_requirements only hold some of the years.
 
     Returns
     -------
     pd.DataFrame
     """
     reduction_condition = calculate_reduction_condition(reduction_per_condition)
+    if _supports_reduction_factors(energy_requirements, reduction_condition, yearly_improvement):
+        merged = calculate_reduction_factors(energy_requirements, policy_improvement, reduction_condition,
+                                             yearly_improvement, years=years)
+        return apply_energy_requirement_reductions(merged)
+    logger.debug('calculate_energy_reduction falling back to merging reduction factors')
+
     condition_factor = energy_requirements.merge(
         right=reduction_condition, on=['building_category', 'building_code', 'building_condition', 'purpose'], how='left')
 
     reduction_policy = calculate_reduction_policy(policy_improvement, energy_requirements)
-    reduction_yearly = calculate_reduction_yearly(energy_requirements, yearly_improvement)
+    reduction_yearly = calculate_reduction_yearly(energy_requirements if years is None else years.to_dataframe(),
+                                                  yearly_improvement)
 
     merged = merge_energy_requirement_reductions(condition_factor, reduction_yearly, reduction_policy)
 
     return merged
 
 
+def calculate_reduction_factors(energy_requirements: pd.DataFrame, policy_improvement: pd.DataFrame,
+                                reduction_condition: pd.DataFrame, yearly_improvement: pd.DataFrame,
+                                years: YearRange | None = None) -> pd.DataFrame:
+    """
+    Add the columns of reduction_condition, reduction_yearly and reduction_policy to energy_requirements.
+
+    The factors are calculated on arrays with one row for each (building_category, building_code, purpose) and one
+    column for each year and picked for every row in energy_requirements by position. The result is the same as
+    merging energy_requirements with reduction_condition, calculate_reduction_yearly and calculate_reduction_policy,
+    without the intermediate dataframes. Rows without a factor get NaN.
+
+    Parameters
+    ----------
+    energy_requirements : pd.DataFrame
+        Must include columns building_category, building_code, purpose, building_condition and year
+    policy_improvement : pd.DataFrame
+        see calculate_reduction_policy
+    reduction_condition : pd.DataFrame
+        The result of calculate_reduction_condition with at most one row for each building_category, building_code,
+        purpose and building_condition
+    yearly_improvement : pd.DataFrame
+        see calculate_reduction_yearly. At most one row for each building_category, building_code and purpose.
+    years : YearRange, optional
+        Years used to calculate the yearly reduction. Defaults to the years in energy_requirements.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    df = energy_requirements.reset_index(drop=True)
+
+    condition_keys = pd.MultiIndex.from_frame(df[CONDITION_KEYS])
+    condition_position = pd.MultiIndex.from_frame(reduction_condition[CONDITION_KEYS]).get_indexer(condition_keys)
+    for column in reduction_condition.columns.difference(CONDITION_KEYS, sort=False):
+        df[column] = pd.api.extensions.take(reduction_condition[column].to_numpy(), condition_position, allow_fill=True)
+
+    keys = pd.MultiIndex.from_frame(df[REDUCTION_KEYS])
+    unique_keys = keys.unique()
+    key_position = unique_keys.get_indexer(keys)
+    if years is None:
+        year_position, years = pd.factorize(df['year'])
+    else:
+        years = np.array(years.year_range)
+        year_position = pd.Index(years).get_indexer(df['year'])
+
+    reduction_yearly = reduction_yearly_values(yearly_improvement, years)
+    yearly_position = pd.MultiIndex.from_frame(yearly_improvement[REDUCTION_KEYS]).get_indexer(keys)
+    df['reduction_yearly'] = np.where((yearly_position >= 0) & (year_position >= 0),
+                                      reduction_yearly[yearly_position, year_position], np.nan)
+
+    reduction_policy = reduction_policy_values(policy_improvement, unique_keys, years)
+    df['reduction_policy'] = reduction_policy[key_position, year_position]
+    return df
+
+
+def _supports_reduction_factors(energy_requirements: pd.DataFrame, reduction_condition: pd.DataFrame,
+                                yearly_improvement: pd.DataFrame) -> bool:
+    """
+    calculate_reduction_factors gives the same result as merging when reduction_condition and yearly_improvement
+    have at most one row for each key and no column in reduction_condition is already in energy_requirements.
+    """
+    if reduction_condition.duplicated(subset=CONDITION_KEYS).any():
+        return False
+    if yearly_improvement.duplicated(subset=REDUCTION_KEYS).any():
+        return False
+    condition_columns = reduction_condition.columns.difference(CONDITION_KEYS)
+    return not condition_columns.isin(energy_requirements.columns).any()
+
+
 def merge_energy_requirement_reductions(condition_factor: pd.DataFrame, yearly_improvements: pd.DataFrame, reduction_policy: pd.DataFrame) -> pd.DataFrame:
     m_nrg_yi = condition_factor.merge(
         right=yearly_improvements.copy(), on=['building_category', 'building_code', 'purpose', 'year'], how='left')
     m_nrg_yi = m_nrg_yi.merge(
         right=reduction_policy.copy(), on=['building_category', 'building_code', 'purpose', 'year'], how='left')
-    merged = m_nrg_yi.copy()
+    return apply_energy_requirement_reductions(m_nrg_yi.copy())
+
+
+def apply_energy_requirement_reductions(merged: pd.DataFrame) -> pd.DataFrame:
+    """Multiply original_kwh_m2 with behaviour_factor and the reduction factors. Missing factors are 1.0."""
     merged = merged.rename(columns={'kwh_m2': 'original_kwh_m2'})
     merged.loc[:, 'reduction_yearly'] = merged.loc[:, 'reduction_yearly'].fillna(1.0)
 
@@ -152,16 +242,15 @@ def calculate_reduction_yearly( df_years: pd.DataFrame, yearly_improvement: pd.D
     """
     Calculate factor for yearly reduction for each entry in the DataFrame yearly_improvement.
 
-    This method merges the yearly improvement data with the policy improvement data, adjusts the
-    efficiency start year if the period end year is greater, and calculates the yearly reduction
-    based on the yearly efficiency improvement.
+    The reduction is 1.0 before start_year, (1.0 - yearly_efficiency_improvement) ** (year - start_year + 1) from
+    start_year to end_year, and the reduction of the last year up to end_year after end_year.
 
     Parameters
     ----------
     df_years : pd.DataFrame
         DataFrame containing all years for which to calculate factors. Must include column 'year'.
     yearly_improvement : pd.DataFrame
-        DataFrame containing yearly improvement information. Must include columns 'yearly_efficiency_improvement', and 'efficiency_start_year'.
+        DataFrame containing yearly improvement information. Must include columns 'yearly_efficiency_improvement', 'start_year' and 'end_year'.
 
     Returns
     -------
@@ -178,34 +267,60 @@ def calculate_reduction_yearly( df_years: pd.DataFrame, yearly_improvement: pd.D
         logger.debug(f'Got columns {", ".join(df_years.columns)}')
         raise ValueError('df_years does not contain column year')
 
-    years = pd.DataFrame(data=[y for y in df_years.year.unique()], columns=['year'])
+    years = df_years.year.unique()
+    reduction_yearly = reduction_yearly_values(yearly_improvement, years)
 
-    df = yearly_improvement.merge(right=years, how='cross')
-    rows_in_range = df[(df.year >= df.start_year) & (df.year <= df.end_year)].index
+    df = pd.DataFrame({column: np.repeat(yearly_improvement[column].to_numpy(), len(years))
+                       for column in REDUCTION_KEYS})
+    df['year'] = np.tile(years, len(yearly_improvement))
+    df['reduction_yearly'] = reduction_yearly.ravel()
+    return df
 
-    df.loc[rows_in_range, 'yearly_change'] = (1.0 - df.loc[rows_in_range, 'yearly_efficiency_improvement'])
-    df.loc[rows_in_range, 'pow'] = (df.loc[rows_in_range, 'year'] - df.loc[rows_in_range, 'start_year']) + 1
-    df.loc[rows_in_range, 'reduction_yearly'] =  df.loc[rows_in_range, 'yearly_change'] ** df.loc[rows_in_range, 'pow']
 
-    df.loc[df[df.start_year > df.year].index, 'reduction_yearly'] = df.loc[
-        df[df.start_year > df.year].index, 'reduction_yearly'].fillna(1.0)
-    df.loc[:, 'reduction_yearly'] = df.loc[:, 'reduction_yearly'].ffill()
+def reduction_yearly_values(yearly_improvement: pd.DataFrame, years: np.ndarray) -> np.ndarray:
+    """
+    Yearly reduction factor for each row in yearly_improvement and each year in years.
 
-    return df[['building_category', 'building_code', 'purpose', 'year', 'reduction_yearly']]
+    Years after end_year are forward filled in row major order, like a forward fill of yearly_improvement cross joined
+    with years.
+
+    Parameters
+    ----------
+    yearly_improvement : pd.DataFrame
+        Must include columns 'yearly_efficiency_improvement', 'start_year' and 'end_year'
+    years : np.ndarray
+
+    Returns
+    -------
+    np.ndarray
+        shape (len(yearly_improvement), len(years))
+    """
+    start_year = yearly_improvement['start_year'].to_numpy(dtype='float64')[:, np.newaxis]
+    end_year = yearly_improvement['end_year'].to_numpy(dtype='float64')[:, np.newaxis]
+    yearly_change = 1.0 - yearly_improvement['yearly_efficiency_improvement'].to_numpy(dtype='float64')[:, np.newaxis]
+    year = np.asarray(years, dtype='float64')[np.newaxis, :]
+
+    in_range = (year >= start_year) & (year <= end_year)
+    shape = (len(yearly_improvement), len(years))
+    reduction = np.power(np.broadcast_to(yearly_change, shape), year - start_year + 1.0,
+                         out=np.full(shape, np.nan), where=in_range)
+    reduction[np.broadcast_to(year < start_year, shape)] = 1.0
+    return forward_fill(reduction.ravel()).reshape(shape)
 
 
 def calculate_reduction_policy( policy_improvement: pd.DataFrame, all_things: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate the reduction policy for each entry in the DataFrame.
 
-    This method computes the reduction policy by first calculating the number of years since the
-    start of the period. It then applies the `yearly_reduction` function to each relevant entry
-    to determine the reduction policy.
+    The reduction policy is interpolated linearly from the start of the period to 1.0 - improvement_at_end_year at
+    end_year. A period starts at 1.0 or at the end of the previous period of the same building_category,
+    building_code and purpose.
 
     Parameters
     ----------
     policy_improvement : pd.DataFrame
-        DataFrame containing policy improvement information. Must include columns 'year' and 'period_start_year'.
+        DataFrame containing policy improvement information. Must include columns 'start_year', 'end_year' and
+        'improvement_at_end_year'.
     all_things: pd.DataFrame
         DataFrame containing every combination of building_category, TEK, purpose, year
 
@@ -214,53 +329,79 @@ def calculate_reduction_policy( policy_improvement: pd.DataFrame, all_things: pd
     pd.DataFrame
         DataFrame with the calculated 'reduction_policy' column and updated entries.
     """
-    policy_improvement = policy_improvement.sort_values(
-        by=['building_category', 'building_code', 'purpose', 'start_year', 'end_year'])
-
-    policy_improvement[['building_category_s', 'TEK_s', 'purpose_s', 'start_year_s', 'end_year_s']] = \
-    policy_improvement[
-        ['building_category', 'building_code', 'purpose', 'start_year', 'end_year']]
-
-    policy_improvement = policy_improvement.set_index(
-        ['building_category', 'building_code', 'purpose', 'start_year', 'end_year'], drop=True)
-
-    shifted = policy_improvement.shift(1).reset_index()
-
-    shifted = shifted.query('building_category==building_category_s & building_code==TEK_s & purpose==purpose_s')
-    shifted['improvement_at_start_year'] = shifted['improvement_at_end_year']
-    shifted = shifted[['building_category', 'building_code', 'purpose', 'start_year', 'end_year', 'improvement_at_start_year']]
+    df = all_things[[*REDUCTION_KEYS, 'year']].drop_duplicates()
+    df = df.sort_values(by=[*REDUCTION_KEYS, 'year']).reset_index(drop=True)
 
-    start_year_from_previous = shifted
+    keys = pd.MultiIndex.from_frame(df[REDUCTION_KEYS])
+    unique_keys = keys.unique()
+    year_position, years = pd.factorize(df['year'])
+    reduction_policy = reduction_policy_values(policy_improvement, unique_keys, years)
+    df['reduction_policy'] = reduction_policy[unique_keys.get_indexer(keys), year_position]
 
-    policy_improvement = policy_improvement.merge(
-        right=start_year_from_previous,
-        left_on=['building_category', 'building_code', 'purpose', 'start_year', 'end_year'],
-        right_on=['building_category', 'building_code', 'purpose', 'start_year', 'end_year'],
-        how='left')
-
-    policy_improvement[['start_year', 'end_year']] = policy_improvement[['start_year', 'end_year']].astype(int)
-    policy_improvement = policy_improvement.set_index(
-        ['building_category', 'building_code', 'purpose', 'start_year', 'end_year'], drop=True)
-    policy_improvement['improvement_at_start_year'] = 1.0-policy_improvement['improvement_at_start_year'].fillna(0.0)
-
-    policy_improvement = policy_improvement[['improvement_at_start_year', 'improvement_at_end_year']].reset_index()
+    return df
 
-    df = all_things[['building_category', 'building_code', 'purpose', 'year']].merge(
-        right=policy_improvement,
-        on=['building_category', 'building_code', 'purpose'], how='left')
 
-    df['num_values'] = df['end_year'] - df['start_year'] + 1.0
-    df['n'] = (df.year - df.start_year).clip(upper=df.num_values-1, lower=0)
+def reduction_policy_values(policy_improvement: pd.DataFrame, keys: pd.MultiIndex, years: np.ndarray) -> np.ndarray:
+    """
+    Policy reduction factor for each (building_category, building_code, purpose) in keys and each year in years.
 
-    df['step'] = ((1.0-df['improvement_at_end_year']) - df['improvement_at_start_year']) / (df['num_values']-1.0)
+    A year covered by one of the periods in policy_improvement uses the first period that covers it. Other years use
+    the first period of the key, and keys without policy improvement are 1.0.
 
-    df['reduction_policy'] = df['improvement_at_start_year'] + (df['n']) * df['step']
-    df['reduction_policy'] = df['reduction_policy'].fillna(1.0)
-    df['_col_to_filter'] = (df['year'] < df['start_year']) | (df['year'] > df['end_year'])
-    df = df.sort_values(by=['building_category', 'building_code', 'purpose', 'year', '_col_to_filter'])
-    df = df.drop_duplicates(['building_category', 'building_code', 'purpose', 'year'])
+    Parameters
+    ----------
+    policy_improvement : pd.DataFrame
+        Must include columns building_category, building_code, purpose, start_year, end_year and
+        improvement_at_end_year
+    keys : pd.MultiIndex
+        Unique building_category, building_code, purpose
+    years : np.ndarray
 
-    return df[['building_category', 'building_code', 'purpose', 'year', 'reduction_policy']]
+    Returns
+    -------
+    np.ndarray
+        shape (len(keys), len(years))
+    """
+    policy = policy_improvement.sort_values(by=[*REDUCTION_KEYS, 'start_year', 'end_year'])
+    policy_keys = pd.MultiIndex.from_frame(policy[REDUCTION_KEYS])
+    is_first = ~policy_keys.duplicated()
+    group = np.cumsum(is_first) - 1
+    period = np.arange(len(policy)) - np.flatnonzero(is_first)[group]
+
+    improvement_at_end_year = policy['improvement_at_end_year'].to_numpy(dtype='float64')
+    previous_improvement = np.concatenate([[np.nan], improvement_at_end_year[:-1]])
+    improvement_at_start_year = 1.0 - np.where(is_first | np.isnan(previous_improvement), 0.0, previous_improvement)
+
+    shape = (is_first.sum(), period.max() + 1 if len(policy) else 0)
+    start_year, end_year, at_start_year, at_end_year = (np.full(shape, np.nan) for _ in range(4))
+    start_year[group, period] = policy['start_year'].to_numpy(dtype='float64')
+    end_year[group, period] = policy['end_year'].to_numpy(dtype='float64')
+    at_start_year[group, period] = improvement_at_start_year
+    at_end_year[group, period] = improvement_at_end_year
+
+    reduction = np.ones((len(keys), len(years)))
+    key_group = policy_keys[is_first].get_indexer(keys)
+    has_policy = key_group >= 0
+    if not has_policy.any():
+        return reduction
+
+    # (key, period, year)
+    year = np.asarray(years, dtype='float64')[np.newaxis, np.newaxis, :]
+    start_year, end_year = start_year[key_group[has_policy], :, np.newaxis], end_year[key_group[has_policy], :, np.newaxis]
+    at_start_year = at_start_year[key_group[has_policy], :, np.newaxis]
+    at_end_year = at_end_year[key_group[has_policy], :, np.newaxis]
+
+    num_values = end_year - start_year + 1.0
+    n = np.minimum(np.maximum(year - start_year, 0), num_values - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = ((1.0 - at_end_year) - at_start_year) / (num_values - 1.0)
+        by_period = at_start_year + n * step
+    by_period[np.isnan(by_period)] = 1.0
+
+    in_period = (year >= start_year) & (year <= end_year)
+    chosen = np.where(in_period.any(axis=1), in_period.argmax(axis=1), 0)
+    reduction[has_policy] = np.take_along_axis(by_period, chosen[:, np.newaxis, :], axis=1)[:, 0, :]
+    return reduction
 
 
 def calculate_reduction_condition( reduction_per_condition: pd.DataFrame) -> pd.DataFrame:
@@ -280,9 +421,8 @@ def calculate_reduction_condition( reduction_per_condition: pd.DataFrame) -> pd.
     pd.DataFrame
         DataFrame with the calculated 'reduction_condition' column and filtered entries.
     """
-    reduction_per_condition['reduction_condition'] = 1.0 - reduction_per_condition['reduction_share']
-    reduction_per_condition.loc[:, 'reduction_condition'] = reduction_per_condition.loc[:,
-                                                            'reduction_condition'].fillna(1.0)
+    reduction_condition = 1.0 - reduction_per_condition['reduction_share'].to_numpy(dtype='float64')
+    reduction_per_condition['reduction_condition'] = np.where(np.isnan(reduction_condition), 1.0, reduction_condition)
     return reduction_per_condition
 
 
@@ -336,7 +476,7 @@ def make_df_building_category_code_purpose_yearly(period: YearRange | None,
     Notes
     -----
     - All non-DataFrame inputs are converted to single-column DataFrames.
-    - Cross joins are implemented using ``pandas.DataFrame.merge(..., how="cross")``.
+    - The grid is built by ``ebm.model.dimension_grid.dimension_grid`` and cached for the rest of the run.
     - The output is guaranteed to contain one row per unique combination
       of the input dimensions.
 
@@ -368,11 +508,8 @@ def make_df_building_category_code_purpose_yearly(period: YearRange | None,
     purpose = ensure_iterable(purpose, list(EnergyPurpose), 'purpose')
     building_condition = ensure_iterable(building_condition, list(BuildingCondition.existing_conditions()), 'building_condition')
 
-    df = pd.MultiIndex.from_product(
-        [building_category, building_code, purpose, building_condition, period.year_range],
-        names=['building_category', 'building_code', 'purpose', 'building_condition', 'year']).to_frame(index=False)
-
-    return df
+    return dimension_grid(building_category=building_category, building_code=building_code, purpose=purpose,
+                          building_condition=building_condition, year=period.year_range)
 
 
 def main() -> None:
@@ -21,113 +21,88 @@ from ebm.energy_consumption import (
 )
 from ebm.model import energy_need as e_n
 from ebm.model import heating_systems_parameter as h_s_param
+from ebm.model.building_category import BuildingCategory
 from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
+from ebm.model.heating_systems import heating_system_components
+
+LOAD_DESCRIPTORS = (
+    # purpose, load, heating_system, load_share, load_efficiency, energy_product
+    ('heating_rv', 'base', 'base', GRUNNLAST_ANDEL, BASE_LOAD_EFFICIENCY, BASE_LOAD_ENERGY_PRODUCT),
+    ('heating_rv', 'peak', 'peak', PEAK_LOAD_COVERAGE, PEAK_LOAD_EFFICIENCY, PEAK_LOAD_ENERGY_PRODUCT),
+    ('heating_rv', 'tertiary', 'tertiary', TERTIARY_LOAD_COVERAGE, TERTIARY_LOAD_EFFICIENCY, TERTIARY_LOAD_ENERGY_PRODUCT),
+    ('heating_dhw', 'dhw', None, None, DHW_EFFICIENCY, DOMESTIC_HOT_WATER_ENERGY_PRODUCT),
+    ('cooling', 'base', None, None, COOLING_EFFICIENCY, None),
+    ('electrical_equipment', 'base', None, None, None, None),
+    ('fans_and_pumps', 'base', None, None, None, None),
+    ('lighting', 'base', None, None, None, None),
+)
+"""
+Where each purpose and load gets its parameters in heating_systems_parameter, in the order of the rows made by
+delivered_energy_factors.
 
+heating_system is the component of heating_systems covering the load. load_share, load_efficiency and energy_product
+are columns in heating_systems_parameter. None means no component, 1.0 for load_share and load_efficiency and
+Electricity for energy_product.
+"""
 
-def base_load(heating_systems_projection: pd.DataFrame) -> pd.DataFrame:
-    heating_systems_projection['heating_system'] = '-'
-    df = heating_systems_projection[
-        ['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, BASE_LOAD_EFFICIENCY,
-         BASE_LOAD_ENERGY_PRODUCT, 'heating_system']].copy()
-    df = df.rename(columns={GRUNNLAST_ANDEL: 'load_share', BASE_LOAD_EFFICIENCY: 'load_efficiency',
-                            BASE_LOAD_ENERGY_PRODUCT: 'energy_product'})
-    df.loc[:, 'load'] = 'base'
-    df.loc[:, 'purpose'] = 'heating_rv'
-    df['heating_system'] = df.heating_systems.apply(lambda s: s.split('-')[0])
-    df['heating_system'] = df['heating_system'].str.strip()
-    return df
-
-
-def peak_load(heating_systems_projection:pd.DataFrame) -> pd.DataFrame:
-    df = heating_systems_projection[
-        ['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, PEAK_LOAD_COVERAGE, PEAK_LOAD_EFFICIENCY,
-         PEAK_LOAD_ENERGY_PRODUCT, 'heating_system']].copy()
-    df = df.rename(columns={PEAK_LOAD_COVERAGE: 'load_share', PEAK_LOAD_EFFICIENCY: 'load_efficiency',
-                            PEAK_LOAD_ENERGY_PRODUCT: 'energy_product'})
-    df.loc[:, 'load'] = 'peak'
-    df.loc[:, 'purpose'] = 'heating_rv'
-    df['heating_system'] = df.heating_systems.apply(lambda s: s.split('-')[1:2]).explode('heating_system')
-    df['heating_system'] = df['heating_system'].str.strip()
-    return df
-
-
-def tertiary_load(heating_systems_projection: pd.DataFrame) ->pd.DataFrame:
-    df = heating_systems_projection[
-        ['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, TERTIARY_LOAD_COVERAGE, TERTIARY_LOAD_EFFICIENCY,
-         TERTIARY_LOAD_ENERGY_PRODUCT, 'heating_system']].copy()
-    df = df.rename(columns={TERTIARY_LOAD_COVERAGE: 'load_share', TERTIARY_LOAD_EFFICIENCY: 'load_efficiency',
-                            TERTIARY_LOAD_ENERGY_PRODUCT: 'energy_product'})
-    df.loc[:, 'load'] = 'tertiary'
-    df.loc[:, 'purpose'] = 'heating_rv'
-    df['heating_system'] = df.heating_systems.apply(lambda s: s.split('-')[2:3]).explode('heating_system')
-    df['heating_system'] = df['heating_system'].str.strip()
-    return df
-
-
-def heating_rv(heating_systems_projection: pd.DataFrame) -> pd.DataFrame:
-    df = heating_systems_projection.copy()
-
-    base = base_load(df)
-    peak = peak_load(df)
-    tertiary = tertiary_load(df)
-
-    return pd.concat([base, peak, tertiary])
-
-
-def heating_dhw(heating_systems_projection: pd.DataFrame) ->pd.DataFrame:
-    df = heating_systems_projection[
-        ['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, DHW_EFFICIENCY,
-         DOMESTIC_HOT_WATER_ENERGY_PRODUCT]].copy()
-    df.loc[:, GRUNNLAST_ANDEL] = 1.0
-    df = df.rename(columns={GRUNNLAST_ANDEL: 'load_share', DHW_EFFICIENCY: 'load_efficiency',
-                            DOMESTIC_HOT_WATER_ENERGY_PRODUCT: 'energy_product'})
-
-    df.loc[:, 'load'] = 'dhw'
-    df['purpose'] = 'heating_dhw'
-    return df
-
-
-def cooling(heating_systems_projection: pd.DataFrame) -> pd.DataFrame:
-    df = heating_systems_projection[
-        ['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, COOLING_EFFICIENCY,
-         BASE_LOAD_ENERGY_PRODUCT]].copy()
-    df.loc[:, GRUNNLAST_ANDEL] = 1.0
-    df.loc[:, BASE_LOAD_ENERGY_PRODUCT] = 'Electricity'
-    df = df.rename(columns={GRUNNLAST_ANDEL: 'load_share', COOLING_EFFICIENCY: 'load_efficiency',
-                            BASE_LOAD_ENERGY_PRODUCT: 'energy_product'})
-
-    df.loc[:, 'load'] = 'base'
-    df.loc[:, 'purpose'] = 'cooling'
-    return df
-
-
-def other(heating_systems_projection: pd.DataFrame) -> pd.DataFrame:
-    df = heating_systems_projection[
-        ['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, BASE_LOAD_EFFICIENCY,
-         BASE_LOAD_ENERGY_PRODUCT]].copy()
-    df.loc[:, GRUNNLAST_ANDEL] = 1.0
-    df.loc[:, BASE_LOAD_EFFICIENCY] = 1.0
-    df.loc[:, BASE_LOAD_ENERGY_PRODUCT] = 'Electricity'
-    df = df.rename(columns={GRUNNLAST_ANDEL: 'load_share', BASE_LOAD_EFFICIENCY: 'load_efficiency',
-                            BASE_LOAD_ENERGY_PRODUCT: 'energy_product'})
-    df.loc[:, 'load'] = 'base'
-    df.loc[:, '_purposes'] = 'electrical_equipment,fans_and_pumps,lighting'
-    df = df.assign(**{'purpose': df['_purposes'].str.split(',')}).explode('purpose')
-    df = df.drop(columns=['_purposes'], errors='ignore')
 
-    return df.reset_index().drop(columns=['index'], errors='ignore')
+def load_descriptors() -> pd.DataFrame:
+    """
+    LOAD_DESCRIPTORS as a DataFrame with the columns purpose, load, heating_system, load_share, load_efficiency and
+    energy_product.
+    """
+    return pd.DataFrame(list(LOAD_DESCRIPTORS),
+                        columns=['purpose', 'load', 'heating_system', 'load_share', 'load_efficiency', 'energy_product'])
 
 
-def all_purposes(heating_systems_projection: pd.DataFrame) -> pd.DataFrame:
-    return pd.concat([heating_rv(heating_systems_projection), heating_dhw(heating_systems_projection),
-               cooling(heating_systems_projection), other(heating_systems_projection)])
+def delivered_energy_factors(heating_systems_parameter: pd.DataFrame) -> pd.DataFrame:
+    """
+    Efficiency factor of every heating system, load and purpose in heating_systems_parameter.
 
+    Builds one row for each row in heating_systems_parameter and each row in LOAD_DESCRIPTORS in one pass. Only the
+    columns used by energy_use_kwh are copied from heating_systems_parameter. building_group is Residential for
+    residential building categories and Non-residential for the rest.
 
-def efficiency_factor(heating_systems: pd.DataFrame) -> pd.DataFrame:
-    df = heating_systems
-    df.loc[:, 'efficiency_factor'] = df.loc[:, 'heating_system_share'] * df.loc[:, 'load_share'] / df.loc[:, 'load_efficiency']
+    Parameters
+    ----------
+    heating_systems_parameter : pd.DataFrame
+        heating systems parameters by building_category, building_code, year and heating_systems
 
+    Returns
+    -------
+    pd.DataFrame
+        building_category, building_code, year, heating_systems, heating_system_share, load_share, load_efficiency,
+        energy_product, heating_system, load, purpose, building_group and efficiency_factor
+    """
+    parameter = heating_systems_parameter
+    row_count = len(parameter)
+    descriptors = load_descriptors()
+
+    positions = np.tile(np.arange(row_count), len(descriptors))
+    df = parameter[['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE]].take(positions)
+    df = df.reset_index(drop=True)
+
+    def column_or(column: str | None, value: float | str) -> np.ndarray:
+        if column is None:
+            return np.full(row_count, value, dtype=object if isinstance(value, str) else None)
+        return parameter[column].to_numpy()
+
+    df['load_share'] = np.concatenate([column_or(c, 1.0) for c in descriptors.load_share])
+    df['load_efficiency'] = np.concatenate([column_or(c, 1.0) for c in descriptors.load_efficiency])
+    df['energy_product'] = np.concatenate([column_or(c, 'Electricity').astype(object) for c in descriptors.energy_product])
+
+    components = {load: heating_system_components(parameter.heating_systems, load).to_numpy()
+                  for load in descriptors.heating_system.dropna().unique()}
+    no_component = np.full(row_count, np.nan, dtype=object)
+    df['heating_system'] = np.concatenate([components.get(load, no_component) for load in descriptors.heating_system])
+
+    df['load'] = np.repeat(descriptors.load.to_numpy(dtype=object), row_count)
+    df['purpose'] = np.repeat(descriptors.purpose.to_numpy(dtype=object), row_count)
+    residential = [bc for bc in BuildingCategory if bc.is_residential()]
+    df['building_group'] = np.where(df.building_category.isin(residential),
+                                    'Residential', 'Non-residential').astype(object)
+    df['efficiency_factor'] = df['heating_system_share'] * df['load_share'] / df['load_efficiency']
     return df
 
 
@@ -205,11 +180,7 @@ def energy_use_kwh(energy_need: pd.DataFrame, efficiency_factor: pd.DataFrame, e
     >>> out = energy_use_kwh(energy_need, efficiency_factor, energy_column='energy_requirement')
     >>> out[['kwh', 'kwh_m2']].head()
     """
-    nrj = energy_need.copy()
-
-    df = nrj.reset_index().merge(efficiency_factor,
-                                 left_on=['building_category', 'building_code', 'purpose', 'year'],
-                                 right_on=['building_category', 'building_code', 'purpose', 'year'])
+    df = _inner_join(energy_need.reset_index(), efficiency_factor, on=['building_category', 'building_code', 'purpose', 'year'])
 
     df['kwh'] = efficiency_kwh(df[energy_column], df['heating_system_share'], df['load_share'], df['load_efficiency'])
     if 'kwh_m2' in df.columns:
@@ -222,6 +193,29 @@ def energy_use_kwh(energy_need: pd.DataFrame, efficiency_factor: pd.DataFrame, e
     return df
 
 
+def _inner_join(left: pd.DataFrame, right: pd.DataFrame, on: list[str]) -> pd.DataFrame:
+    """
+    Same as left.merge(right, on=on) with less memory.
+
+    Only the key columns are merged. The rows of left and right are then taken by position, which avoids the copies
+    made when merge concatenates and consolidates both sides. Falls back to merge when the frames share non-key columns
+    or the keys have different dtypes.
+    """
+    right_columns = [c for c in right.columns if c not in on]
+    if set(right_columns).intersection(left.columns) or any(left[k].dtype != right[k].dtype for k in on):
+        return left.merge(right, on=on)
+
+    positions = left[on].assign(_left=np.arange(len(left))).merge(right[on].assign(_right=np.arange(len(right))), on=on)
+    left_positions, right_positions = positions['_left'].to_numpy(), positions['_right'].to_numpy()
+    del positions
+
+    df = left.take(left_positions)
+    df.index = pd.RangeIndex(len(df))
+    for column in right_columns:
+        df[column] = right[column].take(right_positions).to_numpy()
+    return df
+
+
 def efficiency_kwh(energy_need: pd.Series,
                    heating_system_share: pd.Series, load_share: pd.Series, load_efficiency: pd.Series) -> pd.Series:
     """
@@ -266,19 +260,30 @@ def efficiency_kwh(energy_need: pd.Series,
 
 
 def building_group_energy_use_kwh(heating_systems_parameter: pd.DataFrame, energy_need: pd.DataFrame) -> pd.DataFrame:
-    df = all_purposes(heating_systems_parameter)
-    df.loc[:, 'building_group'] = 'Non-residential'
-    df.loc[df.building_category.isin(['house', 'apartment_block']), 'building_group'] = 'Residential'
+    """
+    Delivered energy in kWh by energy need row, heating system, load and purpose.
 
-    efficiency_factor_df = efficiency_factor(df)
-    df = energy_use_kwh(energy_need=energy_need, efficiency_factor=efficiency_factor_df)
+    The efficiency factors are built by delivered_energy_factors and joined with energy_need once.
 
-    return df
+    Parameters
+    ----------
+    heating_systems_parameter : pd.DataFrame
+        heating systems parameters by building_category, building_code, year and heating_systems
+    energy_need : pd.DataFrame
+        total energy need with the column energy_requirement
+
+    Returns
+    -------
+    pd.DataFrame
+        energy_need merged with the efficiency factors and the columns kwh, kwh_m2 and m2_share
+    """
+    efficiency_factor_df = delivered_energy_factors(heating_systems_parameter)
+    return energy_use_kwh(energy_need=energy_need, efficiency_factor=efficiency_factor_df)
 
 
 def energy_use_gwh_by_building_group(energy_use_kwh: pd.DataFrame) -> pd.DataFrame:
     energy_use_by_building_group = energy_use_kwh[['building_group', 'year', 'energy_product', 'kwh']].groupby(
-        by=['building_group', 'energy_product', 'year']).sum() / 1_000_000
+        by=['building_group', 'energy_product', 'year'], observed=True).sum() / 1_000_000
     energy_use_wide = energy_use_by_building_group.reset_index().pivot(columns=['year'],
                                                                        index=['building_group', 'energy_product'],
                                                                        values=['kwh'])
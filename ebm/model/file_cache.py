@@ -0,0 +1,106 @@
+"""Process wide cache for input files read by FileHandler"""
+import pathlib
+import threading
+import typing
+from dataclasses import dataclass
+
+import pandas as pd
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    """Hit and miss counters for FileCache"""
+    hits: int
+    misses: int
+    entries: int
+
+
+class FileCache:
+    """
+    Memoizes dataframes read from disk.
+
+    Entries are keyed by the resolved file path and read options. Every lookup compares the modification time and
+    size of the file with the values recorded when the file was read, so a file changed on disk is read again.
+
+    The cached dataframe is never handed out. FileCache.get returns a copy, so callers are free to alter the
+    returned dataframe without affecting later reads.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple, tuple[int, int, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_key(file_path: pathlib.Path, read_options: dict) -> tuple:
+        return str(file_path.resolve()), repr(sorted(read_options.items()))
+
+    def get(self, file_path: pathlib.Path,
+            reader: typing.Callable[..., pd.DataFrame],
+            **read_options) -> pd.DataFrame:
+        """
+        Return a copy of the dataframe in file_path. reader(file_path, **read_options) is called when the file is
+        not cached, or when the file has changed since it was cached.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+        reader : Callable
+            Function used to read file_path, typically pd.read_csv or pd.read_excel
+        read_options : dict
+            Keyword arguments passed on to reader. Different read_options are cached separately.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        stat = file_path.stat()
+        key = self._make_key(file_path, read_options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self.hits += 1
+                return entry[2].copy()
+            self.misses += 1
+
+        df = reader(file_path, **read_options)
+        with self._lock:
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, df)
+        return df.copy()
+
+    def invalidate(self, file_path: pathlib.Path | None = None) -> None:
+        """
+        Remove cached entries for file_path. When file_path is None every entry is removed.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path, optional
+        """
+        with self._lock:
+            if file_path is None:
+                logger.debug('Clearing file cache')
+                self._entries.clear()
+                return
+            resolved = str(pathlib.Path(file_path).resolve())
+            for key in [k for k in self._entries if k[0] == resolved]:
+                del self._entries[key]
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns
+        -------
+        CacheInfo
+            Number of hits, misses and current entries
+        """
+        with self._lock:
+            return CacheInfo(hits=self.hits, misses=self.misses, entries=len(self._entries))
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+file_cache = FileCache()
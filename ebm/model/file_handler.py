@@ -2,13 +2,19 @@ import os
 import pathlib
 import shutil
 import typing
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
+import pandera as pa
 from loguru import logger
 from pandera.errors import SchemaError, SchemaErrors
 
 import ebm.validators as validators
 from ebm.model.defaults import default_calibrate_energy_consumption, default_calibrate_heating_rv
+from ebm.model.dimension_dtypes import to_categorical
+from ebm.model.file_cache import CacheInfo, file_cache
+from ebm.model.input_snapshot import InputSnapshot, file_sha256
+from ebm.model.validation_cache import ValidationCache
 
 
 class FileHandler:
@@ -39,7 +45,8 @@ class FileHandler:
 
     input_directory: pathlib.Path
 
-    def __init__(self, directory: typing.Union[str, pathlib.Path, None] = None):
+    def __init__(self, directory: typing.Union[str, pathlib.Path, None] = None, use_cache: bool | None = None,
+                 use_snapshot: bool | None = None, categorical: bool | None = None):
         """
         Constructor for FileHandler Object. Sets FileHandler.input_directory.
 
@@ -48,12 +55,33 @@ class FileHandler:
         directory : pathlib.Path | None | (str)
             When directory is None the constructor will attempt to read directory location from
                 environment variable EBM_INPUT_DIRECTORY
+        use_cache : bool, optional
+            Read input files through the process wide file cache. When use_cache is None the constructor reads
+                the environment variable EBM_FILE_CACHE. The cache is enabled unless EBM_FILE_CACHE is FALSE.
+        use_snapshot : bool, optional
+            Read input files from a compiled snapshot when the input file is unchanged since it was compiled. When
+                use_snapshot is None the constructor reads the environment variable EBM_INPUT_SNAPSHOT. The snapshot
+                is used unless EBM_INPUT_SNAPSHOT is FALSE.
+        categorical : bool, optional
+            Convert dimension columns like building_category and building_code to ordered categoricals when files are
+                read, see ebm.model.dimension_dtypes. When categorical is None the constructor reads the environment
+                variable EBM_CATEGORICAL_DIMENSIONS. Columns are converted when EBM_CATEGORICAL_DIMENSIONS is TRUE.
         """
         if directory is None:
             # Use 'input' as fall back when EBM_INPUT_DIRECTORY is not set in environment.
             directory = os.environ.get('EBM_INPUT_DIRECTORY', 'input')
+        if use_cache is None:
+            use_cache = os.environ.get('EBM_FILE_CACHE', 'TRUE').upper() != 'FALSE'
+        self.use_cache = use_cache
+        if use_snapshot is None:
+            use_snapshot = os.environ.get('EBM_INPUT_SNAPSHOT', 'TRUE').upper() != 'FALSE'
+        self.use_snapshot = use_snapshot
+        if categorical is None:
+            categorical = os.environ.get('EBM_CATEGORICAL_DIMENSIONS', 'FALSE').upper() == 'TRUE'
+        self.categorical = categorical
 
         self.input_directory = directory if isinstance(directory, pathlib.Path) else pathlib.Path(directory)
+        self.snapshot = InputSnapshot(self.input_directory)
         self.files_to_check = [self.BUILDING_CODE_PARAMS, self.S_CURVE, self.POPULATION_FORECAST,
                                self.NEW_BUILDINGS_RESIDENTIAL, self.AREA_NEW_RESIDENTIAL_BUILDINGS,
                                self.AREA, self.BEHAVIOUR_FACTOR, self.ENERGY_NEED_ORIGINAL_CONDITION,
@@ -92,12 +120,14 @@ class FileHandler:
             raise NotADirectoryError(msg)
         return default_data_directory
 
-    def get_file(self, file_name: str) -> pd.DataFrame:
+    def get_file(self, file_name: str, categorical: bool | None = None) -> pd.DataFrame:
         """
         Finds and returns a file by searching in the folder defined by self.input_folder
 
         Parameters:
         - file_name (str): Name of the file to retrieve.
+        - categorical (bool, optional): Convert dimension columns to ordered categoricals. Defaults to
+          FileHandler.categorical.
 
         Returns:
         - file_df (pd.DataFrame): DataFrame containing file data.
@@ -108,13 +138,15 @@ class FileHandler:
 
         try:
             if file_path.suffix == '.xlsx':
-                file_df = pd.read_excel(file_path)
+                file_df = self._read_file(file_path, pd.read_excel)
             elif file_path.suffix == '.csv':
-                file_df = pd.read_csv(file_path)
+                file_df = self._read_file(file_path, pd.read_csv)
             else:
                 msg = f'{file_name} is not of type xlsx or csv'
                 logger.error(msg)
                 raise ValueError(msg)
+            if self.categorical if categorical is None else categorical:
+                file_df = to_categorical(file_df)
             return file_df
         except FileNotFoundError as ex:
             logger.exception(ex)
@@ -130,6 +162,55 @@ class FileHandler:
             logger.error(f'Unable to open {file_path}. Unable to read file.')
             raise
 
+    def _read_file(self, file_path: pathlib.Path, reader: typing.Callable[..., pd.DataFrame], **read_options) -> pd.DataFrame:
+        """
+        Read file_path using reader. The file is read through the file cache when FileHandler.use_cache is True.
+
+        When FileHandler.use_snapshot is True and the compiled snapshot of file_path is current, the snapshot is read
+        instead. Reads with read_options always use the source file.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+        reader : Callable
+            pd.read_csv, pd.read_excel or a function with a similar signature
+        read_options : dict
+            Keyword arguments passed on to reader
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        if self.use_snapshot and not read_options and self.snapshot.is_current(file_path.name):
+            logger.debug(f'Using snapshot of {file_path.name}')
+            file_path, reader = self.snapshot.snapshot_path(file_path.name), self.snapshot.read
+        if self.use_cache:
+            return file_cache.get(file_path, reader, **read_options)
+        return reader(file_path, **read_options)
+
+    def invalidate_cache(self, file_name: str | None = None) -> None:
+        """
+        Drop cached content for file_name in the input directory. Without file_name every cached file is dropped.
+
+        Parameters
+        ----------
+        file_name : str, optional
+        """
+        if file_name is None:
+            file_cache.invalidate()
+        else:
+            file_cache.invalidate(pathlib.Path(self.input_directory) / file_name)
+
+    @staticmethod
+    def cache_info() -> CacheInfo:
+        """
+        Returns
+        -------
+        CacheInfo
+            hits, misses and number of entries in the file cache
+        """
+        return file_cache.cache_info()
+
     def get_building_code(self) -> pd.DataFrame:
         """
         Get TEK parameters DataFrame.
@@ -173,7 +254,7 @@ class FileHandler:
         """
         file_path = self.input_directory / self.POPULATION_FORECAST
         logger.debug(f'{file_path=}')
-        return pd.read_csv(file_path, dtype={"household_size": "float64"})
+        return self._read_file(file_path, pd.read_csv, dtype={"household_size": "float64"})
 
     def get_construction_building_category_share(self) -> pd.DataFrame:
         """
@@ -198,8 +279,7 @@ class FileHandler:
         """
         file_path = self.input_directory / self.AREA_NEW_RESIDENTIAL_BUILDINGS
         logger.debug(f'{file_path=}')
-        return pd.read_csv(file_path,
-                           index_col=0, header=0)
+        return self._read_file(file_path, pd.read_csv, index_col=0, header=0)
 
     def get_area_parameters(self) -> pd.DataFrame:
         """
@@ -417,25 +497,86 @@ class FileHandler:
             shutil.copy(source_file, target_file)
             logger.info( f'Creating missing file  {target_file}')
 
-    def validate_input_files(self):
+    def validate_input_files(self, revalidate: bool = False, max_workers: int | None = None):
         """
         Validates the input files for correct formatting and content using the validators module
 
+        The files are read and validated concurrently in a thread pool, which also loads them into the file cache.
+        Every file is validated before an error is raised. Each failing file is logged, and the failure cases of every
+        invalid file are raised together as one SchemaErrors.
+
+        Files with a current compiled snapshot were validated when the snapshot was compiled and are skipped. Other
+        files are skipped when their content hash is recorded as valid in the validation cache. The cache is
+        discarded whenever validators.schema_version changes.
+
+        Parameters
+        ----------
+        revalidate : bool, default False
+            Validate every file, ignoring the snapshot and the validation cache
+        max_workers : int, optional
+            Number of threads. The ThreadPoolExecutor default is used when max_workers is None.
+
         Raises
         ------
         pa.errors.SchemaErrors
             If any invalid data for formatting is found when validating files. The validation is lazy, meaning
-            multiple errors may be listed in the exception.
+            multiple errors may be listed in the exception. SchemaErrors.failure_cases has a file column with the
+            name of the invalid file.
         """
-        for file_to_validate in self.files_to_check:
-            df = self.get_file(file_to_validate)
-            validator = getattr(validators, file_to_validate[:-4].lower())
+        validation_cache = ValidationCache(self.input_directory, validators.schema_version())
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='validate_input') as executor:
+            futures = {file_name: executor.submit(self._validate_file, file_name, validation_cache, revalidate)
+                       for file_name in self.files_to_check}
 
+        schema_errors = {}
+        for file_name, future in futures.items():
             try:
-                validator.validate(df, lazy=True)
-            except (SchemaErrors, SchemaError):
-                logger.error(f'Got error while validating {file_to_validate}')
-                raise
+                sha256 = future.result()
+            except (SchemaErrors, SchemaError) as ex:
+                logger.error(f'Got error while validating {file_name}')
+                schema_errors[file_name] = ex
+                continue
+            if sha256:
+                validation_cache.mark_valid(file_name, sha256)
+        validation_cache.save()
+
+        if schema_errors:
+            raise combine_schema_errors(schema_errors)
+
+    def _validate_file(self, file_name: str, validation_cache: ValidationCache, revalidate: bool) -> str | None:
+        """
+        Read and validate file_name.
+
+        Returns
+        -------
+        str | None
+            sha256 of the validated file, or None when validation was skipped
+        """
+        if not revalidate and self.is_validated_by_snapshot(file_name):
+            logger.debug(f'Skipping validation of {file_name}. Validated by compiled snapshot.')
+            self.get_file(file_name)
+            return None
+        sha256 = file_sha256(self.input_directory / file_name)
+        df = self.get_file(file_name, categorical=False)
+        if not revalidate and validation_cache.is_valid(file_name, sha256):
+            logger.debug(f'Skipping validation of {file_name}. Unchanged since last validation.')
+            return None
+        validator = getattr(validators, file_name[:-4].lower())
+        validator.validate(df, lazy=True)
+        return sha256
+
+    def is_validated_by_snapshot(self, file_name: str) -> bool:
+        """
+        Check if file_name is read from a compiled snapshot that was validated by the current validators.
+
+        Returns
+        -------
+        bool
+            True when file_name is served by a current snapshot compiled with the current validators
+        """
+        if not self.use_snapshot or not self.snapshot.is_current(file_name):
+            return False
+        return self.snapshot.manifest().get('schema_version') == validators.schema_version()
 
     def is_calibrated(self) -> bool:
         """
@@ -461,3 +602,31 @@ class FileHandler:
             return True
         return False
 
+
+
+def combine_schema_errors(errors: typing.Mapping[str, SchemaError | SchemaErrors]) -> SchemaErrors:
+    """
+    Combine the validation errors of several input files into one SchemaErrors.
+
+    Parameters
+    ----------
+    errors : Mapping[str, SchemaError | SchemaErrors]
+        The error raised by the validator of each invalid file, by file name
+
+    Returns
+    -------
+    SchemaErrors
+        The schema errors of every file. The schema is named after the invalid files, and failure_cases has the file
+        name of each failure case in the column file.
+    """
+    schema_errors = {file_name: ex.schema_errors if isinstance(ex, SchemaErrors) else [ex] for file_name, ex in errors.items()}
+    all_errors = [schema_error for file_errors in schema_errors.values() for schema_error in file_errors]
+    combined = SchemaErrors(pa.DataFrameSchema(name=', '.join(errors)), all_errors, pd.DataFrame())
+
+    failure_cases = []
+    for file_name, file_errors in schema_errors.items():
+        file_failure_cases = SchemaErrors(pa.DataFrameSchema(name=file_name), file_errors, pd.DataFrame()).failure_cases
+        failure_cases.append(file_failure_cases.assign(file=file_name))
+    failure_cases = pd.concat(failure_cases, ignore_index=True)
+    combined.failure_cases = failure_cases[['file'] + [c for c in failure_cases.columns if c != 'file']]
+    return combined
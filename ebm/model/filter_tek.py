@@ -125,7 +125,7 @@ class FilterTek:
         agg_building_code = building_code_to_merge.groupby(by=['building_category',
                                            'building_condition',
                                            'purpose',
-                                           'year']).agg(aggregates)
+                                           'year'], observed=True).agg(aggregates)
         agg_building_code = agg_building_code.reset_index()
 
         agg_building_code['building_code'] = new_building_code_name
@@ -43,7 +43,7 @@ def heat_prod_hp(production: pd.DataFrame, group_by:list|None=None) -> pd.DataFr
     grouping = ['building_group', 'year'] if not group_by else group_by
     production.loc[production['building_category'].isin(['house', 'apartment_block']), 'building_group'] = 'Residential'
     production.loc[production['building_group'] != 'Residential', 'building_group'] = 'Non-residential'
-    return production.groupby(by=grouping+['hp_source']).agg({'RV_HP': 'sum'}) / 1_000_000
+    return production.groupby(by=grouping+['hp_source'], observed=True).agg({'RV_HP': 'sum'}) / 1_000_000
 
 
 def heat_prod_hp_wide(production: pd.DataFrame) -> pd.DataFrame:
@@ -1,5 +1,11 @@
+import functools
 from enum import StrEnum, unique
 
+import numpy as np
+import pandas as pd
+
+HEATING_SYSTEM_LOADS = ('base', 'peak', 'tertiary')
+
 
 @unique
 class HeatingSystems(StrEnum):
@@ -19,3 +25,125 @@ class HeatingSystems(StrEnum):
 
     def __repr__(self):
         return f'{self.__class__.__name__}.{self.name}'
+
+
+def split_heating_systems(heating_systems: str) -> tuple[str, ...]:
+    """
+    Split a composite heating system like 'HP - Bio - Electricity' into its components ('HP', 'Bio', 'Electricity').
+
+    The components are the heating systems of the base, peak and tertiary load in that order.
+    """
+    return tuple(component.strip() for component in str(heating_systems).split('-'))
+
+
+@functools.lru_cache(maxsize=1)
+def heating_system_catalogue() -> pd.DataFrame:
+    """
+    Components of every heating system in HeatingSystems.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by heating_systems with the columns base, peak and tertiary. Loads that the heating system does not
+        cover are NaN. The same DataFrame is returned on every call and must not be changed.
+
+    Examples
+    --------
+    >>> heating_system_catalogue().loc['HP - Bio - Electricity'].to_list()
+    ['HP', 'Bio', 'Electricity']
+    """
+    return _component_frame([str(h) for h in HeatingSystems])
+
+
+def _component_frame(heating_systems: list) -> pd.DataFrame:
+    rows = [split_heating_systems(h) if isinstance(h, str) else () for h in heating_systems]
+    too_many = [h for h, r in zip(heating_systems, rows, strict=True) if len(r) > len(HEATING_SYSTEM_LOADS)]
+    if too_many:
+        msg = f'Heating systems with more than {len(HEATING_SYSTEM_LOADS)} components: {", ".join(too_many)}'
+        raise ValueError(msg)
+    rows = [r + (np.nan,) * (len(HEATING_SYSTEM_LOADS) - len(r)) for r in rows]
+    return pd.DataFrame(rows, index=pd.Index(heating_systems, name='heating_systems', dtype=object),
+                        columns=list(HEATING_SYSTEM_LOADS), dtype=object)
+
+
+def _lookup_components(heating_systems: pd.Series) -> tuple[np.ndarray, pd.DataFrame]:
+    """Factorize heating_systems and look up the components of each unique value in heating_system_catalogue"""
+    codes, uniques = pd.factorize(heating_systems)
+    uniques = list(uniques.astype(object))
+    catalogue = heating_system_catalogue()
+    missing = [h for h in uniques if h not in catalogue.index]
+    components = catalogue.reindex(uniques)
+    if missing:
+        components.loc[missing] = _component_frame(missing)
+    return codes, components
+
+
+def heating_system_components(heating_systems: pd.Series, load: str) -> pd.Series:
+    """
+    Heating system of load for every composite heating system in heating_systems.
+
+    The unique values of heating_systems are looked up in heating_system_catalogue, so each heating system is only
+    parsed once. Values that are not in HeatingSystems are split on '-' as before. Values that are not str have no
+    components.
+
+    Parameters
+    ----------
+    heating_systems : pd.Series
+        Composite heating systems like 'HP - Bio - Electricity'
+    load : str
+        One of base, peak or tertiary
+
+    Returns
+    -------
+    pd.Series
+        Component heating system with the index of heating_systems. NaN when the heating system does not cover load.
+
+    Raises
+    ------
+    ValueError
+        When load is not base, peak or tertiary, or a heating system has more than three components
+    """
+    if load not in HEATING_SYSTEM_LOADS:
+        msg = f'Unknown load {load!r}. Expected one of {", ".join(HEATING_SYSTEM_LOADS)}'
+        raise ValueError(msg)
+    codes, components = _lookup_components(heating_systems)
+    values = np.append(components[load].to_numpy(dtype=object), np.nan)
+    return pd.Series(values[codes], index=heating_systems.index, name=load, dtype=object)
+
+
+def explode_heating_system_components(df: pd.DataFrame, column: str = 'heating_systems',
+                                      target: str = 'heating_system') -> pd.DataFrame:
+    """
+    Repeat each row in df once for every component of its heating system.
+
+    Same as splitting column on '-' and exploding it into target, but each unique heating system is only looked up
+    once in heating_system_catalogue. Rows where column is not a str are kept once with NaN in target.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+    column : str, default 'heating_systems'
+        Column with composite heating systems
+    target : str, default 'heating_system'
+        Column for the component heating system
+
+    Returns
+    -------
+    pd.DataFrame
+        Rows of df repeated in order base, peak, tertiary with the index of the original row.
+
+    Raises
+    ------
+    ValueError
+        When a heating system has more than three components
+    """
+    codes, components = _lookup_components(df[column])
+    table = components.to_numpy(dtype=object)
+    table = np.vstack([table, np.full((1, table.shape[1]), np.nan, dtype=object)])
+    present = pd.notna(table)
+    present[~present.any(axis=1), 0] = True
+
+    row_present = present[codes]
+    positions = np.repeat(np.arange(len(df)), row_present.sum(axis=1))
+    values = table[codes][row_present]
+    return df.iloc[positions].assign(**{target: values})
@@ -1,6 +1,7 @@
 import pandas as pd
 
 from ebm.energy_consumption import EnergyConsumption
+from ebm.model.heating_systems import explode_heating_system_components
 
 
 def heating_systems_parameter_from_projection(heating_systems_projection: pd.DataFrame) -> pd.DataFrame:
@@ -11,7 +12,6 @@ def heating_systems_parameter_from_projection(heating_systems_projection: pd.Dat
 
 def expand_heating_system_parameters(heating_systems_parameter):
     df = heating_systems_parameter
-    df = df.assign(**{'heating_system': df['heating_systems'].str.split('-')}).explode('heating_system')
-    df['heating_system'] = df['heating_system'].str.strip()
+    df = explode_heating_system_components(df, column='heating_systems', target='heating_system')
     df['load_share'] = df['base_load_coverage']
     return df
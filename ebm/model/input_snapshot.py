@@ -0,0 +1,194 @@
+"""Compiled binary snapshot of an input directory"""
+import hashlib
+import json
+import os
+import pathlib
+from datetime import datetime
+
+import pandas as pd
+from loguru import logger
+
+from ebm.__version__ import version
+
+
+class InputSnapshot:
+    """
+    A compiled copy of the input files in an input directory.
+
+    Every input file is stored as a Parquet file where string columns are categorical encoded. manifest.json records
+    the sha256 content hash, size, modification time and original column types of each source file. A snapshot file is
+    used when the size and modification time of its source file are exactly as recorded. When either differs, the
+    snapshot is only used if the sha256 hash of the source file is unchanged.
+
+    The snapshot is only written after the input files are validated, so a current snapshot file is known to be valid.
+
+    See Also
+    --------
+    ebm.cmd.compile_input.compile_input
+    """
+
+    DIRECTORY = '.ebm_snapshot'
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, input_directory: pathlib.Path):
+        self.input_directory = pathlib.Path(input_directory)
+        self.directory = self.input_directory / self.DIRECTORY
+        self._manifest = None
+        self._manifest_mtime = None
+        self._source_hashes: dict[str, tuple[int, int, str]] = {}
+
+    def __repr__(self):
+        return f'InputSnapshot(directory="{self.directory}")'
+
+    @property
+    def manifest_path(self) -> pathlib.Path:
+        return self.directory / self.MANIFEST
+
+    def manifest(self) -> dict | None:
+        """
+        Load manifest.json from the snapshot directory. The manifest is read again when the file has changed.
+
+        Returns
+        -------
+        dict | None
+            The manifest, or None when the input directory has no snapshot
+        """
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._manifest, self._manifest_mtime = None, None
+            return None
+        if mtime != self._manifest_mtime:
+            self._manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def snapshot_path(self, file_name: str) -> pathlib.Path:
+        return self.directory / pathlib.Path(file_name).with_suffix('.parquet').name
+
+    def is_current(self, file_name: str) -> bool:
+        """
+        Check if the snapshot of file_name can be used instead of the source file in the input directory.
+
+        Parameters
+        ----------
+        file_name : str
+
+        Returns
+        -------
+        bool
+            True when file_name is in the manifest, the snapshot file exists and the source file has the size and
+            modification time recorded in the manifest, or else the same sha256 hash.
+        """
+        manifest = self.manifest()
+        if not manifest or file_name not in manifest['files']:
+            return False
+        source_file = self.input_directory / file_name
+        if not self.snapshot_path(file_name).is_file():
+            return False
+        try:
+            source_stat = source_file.stat()
+        except FileNotFoundError:
+            return False
+        entry = manifest['files'][file_name]
+        if source_stat.st_size == entry['size'] and source_stat.st_mtime_ns == entry.get('mtime_ns'):
+            return True
+        return self._source_sha256(source_file, source_stat) == entry['sha256']
+
+    def _source_sha256(self, source_file: pathlib.Path, source_stat: os.stat_result) -> str:
+        """sha256 of source_file, remembered until the size or modification time of the file changes"""
+        size, mtime_ns, sha256 = self._source_hashes.get(source_file.name, (None, None, None))
+        if (size, mtime_ns) != (source_stat.st_size, source_stat.st_mtime_ns):
+            sha256 = file_sha256(source_file)
+            self._source_hashes[source_file.name] = (source_stat.st_size, source_stat.st_mtime_ns, sha256)
+        return sha256
+
+    def read(self, snapshot_file: pathlib.Path) -> pd.DataFrame:
+        """
+        Read a snapshot file. Categorical encoded columns are restored to the type they had in the source file.
+
+        Parameters
+        ----------
+        snapshot_file : pathlib.Path
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        df = pd.read_parquet(snapshot_file)
+        entry = next(e for e in self.manifest()['files'].values() if e['snapshot'] == snapshot_file.name)
+        for column in entry['categorical_columns']:
+            df[column] = df[column].astype(object)
+        return df
+
+    def clear(self) -> None:
+        """Remove every file in the snapshot directory"""
+        if not self.directory.is_dir():
+            return
+        for file in self.directory.iterdir():
+            file.unlink()
+
+    def write(self, file_name: str, df: pd.DataFrame) -> dict:
+        """
+        Write df as the snapshot of file_name in the input directory.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the source file
+        df : pd.DataFrame
+            The content of the source file
+
+        Returns
+        -------
+        dict
+            The manifest entry for file_name
+        """
+        self.directory.mkdir(exist_ok=True)
+        source_file = self.input_directory / file_name
+        categorical_columns = [c for c in df.columns if df[c].dtype == object]
+        encoded = df.astype({c: 'category' for c in categorical_columns})
+        snapshot_file = self.snapshot_path(file_name)
+        source_stat = source_file.stat()
+        encoded.to_parquet(snapshot_file, index=False)
+        logger.debug(f'Wrote {snapshot_file}')
+        return {'snapshot': snapshot_file.name,
+                'sha256': file_sha256(source_file),
+                'size': source_stat.st_size,
+                'mtime_ns': source_stat.st_mtime_ns,
+                'rows': len(df),
+                'dtypes': {c: str(t) for c, t in df.dtypes.items()},
+                'categorical_columns': categorical_columns}
+
+    def write_manifest(self, files: dict[str, dict], schema_version: str | None = None) -> pathlib.Path:
+        """
+        Write manifest.json. The manifest must be written last, as it makes the snapshot visible to FileHandler.
+
+        Parameters
+        ----------
+        files : dict[str, dict]
+            Manifest entries by source file name as returned by InputSnapshot.write
+        schema_version : str, optional
+            validators.schema_version used when validating the files
+
+        Returns
+        -------
+        pathlib.Path
+            The manifest file
+        """
+        manifest = {'ebm_version': version,
+                    'created': datetime.now().isoformat(timespec='seconds'),
+                    'schema_version': schema_version,
+                    'files': files}
+        self.manifest_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        return self.manifest_path
+
+
+def file_sha256(file_path: pathlib.Path) -> str:
+    """
+    Returns
+    -------
+    str
+        The hex digest of the sha256 hash of the content in file_path
+    """
+    return hashlib.sha256(pathlib.Path(file_path).read_bytes()).hexdigest()
@@ -0,0 +1,98 @@
+"""Cache of input file validation results in the user cache directory"""
+import hashlib
+import json
+import os
+import pathlib
+import sys
+
+from loguru import logger
+
+
+def default_cache_directory() -> pathlib.Path:
+    """
+    The directory where ebm keeps caches between runs.
+
+    The directory is read from the environment variable EBM_CACHE_DIRECTORY. When it is not set, the user cache
+    directory of the platform is used: %LOCALAPPDATA%/ebm/cache on Windows, otherwise $XDG_CACHE_HOME/ebm or
+    ~/.cache/ebm.
+
+    Returns
+    -------
+    pathlib.Path
+    """
+    if os.environ.get('EBM_CACHE_DIRECTORY'):
+        return pathlib.Path(os.environ['EBM_CACHE_DIRECTORY'])
+    if sys.platform == 'win32' and os.environ.get('LOCALAPPDATA'):
+        return pathlib.Path(os.environ['LOCALAPPDATA']) / 'ebm' / 'cache'
+    if os.environ.get('XDG_CACHE_HOME'):
+        return pathlib.Path(os.environ['XDG_CACHE_HOME']) / 'ebm'
+    return pathlib.Path.home() / '.cache' / 'ebm'
+
+
+class ValidationCache:
+    """
+    Remembers which input files passed validation.
+
+    Results are stored in the validation directory of the ebm cache directory, in one file for each input directory,
+    keyed by the sha256 content hash of each file. The input directory itself is never written to. The cache is
+    discarded when it was written under another validators.schema_version. Only successful validations are recorded,
+    so invalid files are always validated again and report their errors.
+
+    Parameters
+    ----------
+    input_directory : pathlib.Path
+    schema_version : str
+        validators.schema_version
+    cache_directory : pathlib.Path, optional
+        The ebm cache directory. default_cache_directory() when not provided.
+    """
+
+    def __init__(self, input_directory: pathlib.Path, schema_version: str, cache_directory: pathlib.Path | None = None):
+        self.input_directory = pathlib.Path(input_directory).resolve()
+        cache_directory = pathlib.Path(cache_directory) if cache_directory is not None else default_cache_directory()
+        directory_hash = hashlib.sha256(str(self.input_directory).encode('utf-8')).hexdigest()[:16]
+        self.path = cache_directory / 'validation' / f'{directory_hash}.json'
+        self.schema_version = schema_version
+        self._valid_files = self._load()
+
+    def __repr__(self):
+        return f'ValidationCache(path="{self.path}", schema_version="{self.schema_version}")'
+
+    def _load(self) -> dict[str, str]:
+        if not self.path.is_file():
+            return {}
+        try:
+            content = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as ex:
+            logger.debug(f'Ignoring unreadable validation cache {self.path}: {ex}')
+            return {}
+        if content.get('schema_version') != self.schema_version:
+            logger.debug(f'Ignoring validation cache {self.path} from schema_version {content.get("schema_version")}')
+            return {}
+        if content.get('input_directory') != str(self.input_directory):
+            logger.debug(f'Ignoring validation cache {self.path} for {content.get("input_directory")}')
+            return {}
+        return content.get('files', {})
+
+    def is_valid(self, file_name: str, sha256: str) -> bool:
+        """
+        Returns
+        -------
+        bool
+            True when file_name with the content hash sha256 has passed validation
+        """
+        return self._valid_files.get(file_name) == sha256
+
+    def mark_valid(self, file_name: str, sha256: str) -> None:
+        self._valid_files[file_name] = sha256
+
+    def save(self) -> None:
+        """Write the cache to disk. A cache directory that cannot be written is not an error, the cache is just not kept."""
+        content = {'schema_version': self.schema_version,
+                   'input_directory': str(self.input_directory),
+                   'files': self._valid_files}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(content, indent=2), encoding='utf-8')
+        except OSError as ex:
+            logger.debug(f'Unable to write validation cache {self.path}: {ex}')
@@ -256,7 +256,7 @@ def reduced_household_size_kwh(df: pd.DataFrame, area_flat: pd.DataFrame) -> pd.
 def reduction_by_year(filtered_df: pd.DataFrame) -> pd.DataFrame:
     kwh = (
         filtered_df.query('year>=2020')
-        .groupby(by=['year'])[
+        .groupby(by=['year'], observed=True)[
             [
                 'net_construction_kwh',
                 'reduced_household_size_kwh',
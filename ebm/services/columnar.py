@@ -0,0 +1,189 @@
+"""Write and read report sheets as Parquet, Arrow IPC or CSV files described by a manifest"""
+import json
+import pathlib
+import time
+import typing
+
+import pandas as pd
+from loguru import logger
+
+from ebm.services.spreadsheet import WorkbookSheet
+
+OUTPUT_FORMATS = ('xlsx', 'parquet', 'arrow', 'csv')
+"""Output formats of energy-use and write_tqdm_result"""
+COLUMNAR_SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _json_name(name: object) -> object:
+    """Column or index name as a JSON value. numpy scalars like the years of a wide table become Python numbers."""
+    return name.item() if hasattr(name, 'item') else name
+
+
+def write_table(df: pd.DataFrame, table_file: pathlib.Path, output_format: str, index: bool = False,
+                csv_delimiter: str = ',') -> dict:
+    """
+    Write df to table_file as Parquet with zstd compression, Arrow IPC with zstd compression or CSV.
+
+    Parquet and Arrow require string column names, so the columns are written with their names converted to str.
+    The original names are returned for read_table.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+    table_file : pathlib.Path
+    output_format : str
+        'parquet', 'arrow' or 'csv'
+    index : bool, default False
+        Write the index levels as the first columns
+    csv_delimiter : str, default ','
+
+    Returns
+    -------
+    dict
+        Description of the table with the keys file, rows, columns and index
+
+    Raises
+    ------
+    ValueError
+        When output_format is not a columnar format, df has MultiIndex columns or two columns have the same name as str
+    """
+    if output_format not in COLUMNAR_SUFFIXES:
+        msg = f'Unknown output_format {output_format}. Expected one of {", ".join(COLUMNAR_SUFFIXES)}'
+        raise ValueError(msg)
+    if isinstance(df.columns, pd.MultiIndex):
+        msg = f'Cannot write MultiIndex columns to {table_file.name}'
+        raise ValueError(msg)
+    index_names = [_json_name(name) for name in df.index.names] if index else []
+    columns = [_json_name(name) for name in df.columns]
+    table = df.reset_index() if index else df.reset_index(drop=True)
+    table.columns = [str(name) for name in table.columns]
+    if not table.columns.is_unique:
+        msg = f'Column names of {table_file.name} are not unique as strings'
+        raise ValueError(msg)
+
+    if output_format == 'parquet':
+        table.to_parquet(table_file, compression='zstd', index=False)
+    elif output_format == 'arrow':
+        table.to_feather(table_file, compression='zstd')
+    else:
+        table.to_csv(table_file, sep=csv_delimiter, index=False)
+    return {'file': table_file.name, 'rows': len(table), 'columns': columns, 'index': index_names}
+
+
+def read_table(directory: pathlib.Path, entry: dict, output_format: str, csv_delimiter: str = ',') -> pd.DataFrame:
+    """
+    Read a table written by write_table with the original column names and index.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        Directory of the table file
+    entry : dict
+        Description of the table returned by write_table
+    output_format : str
+        'parquet', 'arrow' or 'csv'
+    csv_delimiter : str, default ','
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    table_file = directory / entry['file']
+    if output_format == 'parquet':
+        df = pd.read_parquet(table_file)
+    elif output_format == 'arrow':
+        df = pd.read_feather(table_file)
+    else:
+        df = pd.read_csv(table_file, sep=csv_delimiter, keep_default_na=False, na_values=[''], float_precision='round_trip')
+    index_names = entry['index']
+    df.columns = [f'__index_{i}' for i in range(len(index_names))] + list(entry['columns'])
+    if index_names:
+        df = df.set_index(list(df.columns[:len(index_names)]))
+        df.index.names = index_names
+    return df
+
+
+def write_columnar_reports(workbooks: typing.Mapping[pathlib.Path, typing.Sequence[WorkbookSheet]], output_format: str,
+                           csv_delimiter: str = ',') -> typing.Iterator[pathlib.Path]:
+    """
+    Write every sheet of workbooks as a table file next to the workbook, and a manifest of the tables.
+
+    The sheet wide of area.xlsx is written to area_wide.parquet when output_format is parquet. manifest.json in
+    the directory of the first workbook records the sheets of each workbook, so read_columnar_reports can return
+    the same workbooks later, for instance to write them as Excel.
+
+    Parameters
+    ----------
+    workbooks : Mapping[pathlib.Path, Sequence[WorkbookSheet]]
+        Sheets of each workbook by file
+    output_format : str
+        'parquet', 'arrow' or 'csv'
+    csv_delimiter : str, default ','
+
+    Returns
+    -------
+    Iterator[pathlib.Path]
+        Each table file in the order of workbooks and sheets, then the manifest
+    """
+    manifest = {'version': MANIFEST_VERSION, 'format': output_format, 'reports': {}}
+    if output_format == 'csv':
+        manifest['csv_delimiter'] = csv_delimiter
+    manifest_file = None
+    for workbook_file, sheets in workbooks.items():
+        manifest_file = manifest_file or workbook_file.parent / MANIFEST
+        entries = []
+        for sheet in sheets:
+            started = time.perf_counter()
+            table_file = workbook_file.parent / f'{workbook_file.stem}_{sheet.name}{COLUMNAR_SUFFIXES[output_format]}'
+            entry = write_table(sheet.df, table_file, output_format, index=sheet.index, csv_delimiter=csv_delimiter)
+            entries.append({'sheet': sheet.name, **entry, 'merge_cells': sheet.merge_cells,
+                            'top_row_filter': sheet.top_row_filter})
+            logger.success(f'Wrote {table_file.name} in {time.perf_counter() - started:.2f}s')
+            yield table_file
+        manifest['reports'][workbook_file.name] = entries
+    if manifest_file is None:
+        return
+    manifest_file.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    logger.success(f'Wrote {manifest_file.name}')
+    yield manifest_file
+
+
+def read_columnar_reports(manifest_file: pathlib.Path,
+                          reports: typing.Iterable[str] | None = None) -> dict[pathlib.Path, list[WorkbookSheet]]:
+    """
+    Read the workbooks written by write_columnar_reports.
+
+    Parameters
+    ----------
+    manifest_file : pathlib.Path
+    reports : Iterable[str], optional
+        File names of the workbooks to read. Every workbook in the manifest when not provided.
+
+    Returns
+    -------
+    dict[pathlib.Path, list[WorkbookSheet]]
+        Sheets of each workbook by file, in the directory of manifest_file
+
+    Raises
+    ------
+    ValueError
+        When reports contains a file name that is not in the manifest
+    """
+    manifest = json.loads(manifest_file.read_text(encoding='utf-8'))
+    reports = list(manifest['reports'] if reports is None else reports)
+    unknown = [r for r in reports if r not in manifest['reports']]
+    if unknown:
+        msg = f'Unknown report {", ".join(unknown)}. Expected one of {", ".join(manifest["reports"])}'
+        raise ValueError(msg)
+    directory = manifest_file.parent
+    workbooks = {}
+    for report in reports:
+        workbooks[directory / report] = [
+            WorkbookSheet(entry['sheet'],
+                          read_table(directory, entry, manifest['format'], manifest.get('csv_delimiter', ',')),
+                          index=bool(entry['index']), merge_cells=entry['merge_cells'],
+                          top_row_filter=entry['top_row_filter'])
+            for entry in manifest['reports'][report]]
+    return workbooks
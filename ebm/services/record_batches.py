@@ -0,0 +1,206 @@
+"""Stream a model result to a single file as batches of rows by building category"""
+import contextlib
+import pathlib
+import typing
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+from loguru import logger
+
+from ebm.services.columnar import OUTPUT_FORMATS
+from ebm.services.spreadsheet import cell_value
+
+EXCEL_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+"""The header style of pd.DataFrame.to_excel"""
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def iter_record_batches(output: pd.DataFrame, reset_index: bool = True,
+                        batch_size: int = 100_000) -> typing.Iterator[pd.DataFrame]:
+    """
+    Split output into batches of rows with the same building_category, in the order of output.
+
+    Each batch has at most batch_size rows. The index is reset one batch at a time, so output is never copied as a
+    whole. A single empty batch is returned when output is empty.
+
+    Parameters
+    ----------
+    output : pd.DataFrame
+        Result with building_category as a column or index level. Otherwise output is split by batch_size only.
+    reset_index : bool, default True
+        Reset the index of every batch
+    batch_size : int, default 100_000
+        Largest number of rows in a batch
+
+    Returns
+    -------
+    Iterator[pd.DataFrame]
+    """
+    if 'building_category' in output.index.names:
+        categories = output.index.get_level_values('building_category')
+    elif 'building_category' in output.columns:
+        categories = output['building_category']
+    else:
+        categories = np.zeros(len(output))
+    codes, _ = pd.factorize(categories, use_na_sentinel=False)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+    ends = np.append(starts[1:], len(output))
+    if not len(output):
+        starts, ends = np.array([0]), np.array([0])
+    for start, end in zip(starts.tolist(), ends.tolist(), strict=True):
+        for batch_start in range(start, max(end, start + 1), batch_size):
+            batch = output.iloc[batch_start:min(end, batch_start + batch_size)]
+            yield batch.reset_index() if reset_index else batch
+
+
+class _CsvBatchWriter:
+    def __init__(self, csv_file: typing.TextIO, csv_delimiter: str):
+        self.file = csv_file
+        self.csv_delimiter = csv_delimiter
+        self.header = True
+
+    def write(self, batch: pd.DataFrame, index_columns: int) -> None:
+        batch.to_csv(self.file, sep=self.csv_delimiter, header=self.header, index=False)
+        self.header = False
+
+
+class _ArrowBatchWriter:
+    def __init__(self, output_file: pathlib.Path, output_format: str):
+        self.output_file = output_file
+        self.output_format = output_format
+        self.writer = None
+
+    def write(self, batch: pd.DataFrame, index_columns: int) -> None:
+        batch = batch.set_axis([str(c) for c in batch.columns], axis=1, copy=False)
+        if self.writer is None:
+            self.schema = self._schema(batch)
+            if self.output_format == 'parquet':
+                self.writer = pq.ParquetWriter(self.output_file, self.schema, compression='zstd')
+            else:
+                options = pa.ipc.IpcWriteOptions(compression='zstd')
+                self.writer = pa.ipc.new_file(str(self.output_file), self.schema, options=options)
+        self.writer.write_table(pa.Table.from_pandas(batch, schema=self.schema, preserve_index=False))
+
+    @staticmethod
+    def _schema(batch: pd.DataFrame) -> pa.Schema:
+        """Schema of batch, with string for object columns that are empty in batch but may have values in later batches"""
+        schema = pa.Schema.from_pandas(batch, preserve_index=False)
+        for position, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(position, field.with_type(pa.string()))
+        return schema
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _ExcelBatchWriter:
+    def __init__(self, output_file: pathlib.Path, sheet_name: str, freeze_panes: tuple[int, int] | None):
+        self.workbook = xlsxwriter.Workbook(output_file, {'constant_memory': True})
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+        if freeze_panes:
+            self.worksheet.freeze_panes(*freeze_panes)
+        self.header_format = self.workbook.add_format(EXCEL_HEADER_FORMAT)
+        self.row = 0
+
+    def write(self, batch: pd.DataFrame, index_columns: int) -> None:
+        if self.row == 0:
+            self.worksheet.write_row(0, 0, [cell_value(c) for c in batch.columns], self.header_format)
+            self.row = 1
+        if self.row + len(batch) > EXCEL_MAX_ROWS:
+            if self.row < EXCEL_MAX_ROWS:
+                logger.warning(f'Only the first {EXCEL_MAX_ROWS - 1:_d} rows fit in a sheet. The remaining rows are not written')
+            batch = batch.iloc[:EXCEL_MAX_ROWS - self.row]
+        columns = [self._excel_values(values) for _, values in batch.items()]
+        for row in zip(*columns, strict=True):
+            if index_columns:
+                self.worksheet.write_row(self.row, 0, row[:index_columns], self.header_format)
+            self.worksheet.write_row(self.row, index_columns, row[index_columns:])
+            self.row += 1
+
+    @staticmethod
+    def _excel_values(values: pd.Series) -> list:
+        """values as written by pd.DataFrame.to_excel, with None for empty cells"""
+        if values.dtype.kind in 'iu' or (values.dtype.kind == 'f' and np.isfinite(values.to_numpy()).all()):
+            return values.tolist()
+        return [cell_value(v) for v in values.astype(object)]
+
+    def close(self) -> None:
+        self.workbook.close()
+
+
+@contextlib.contextmanager
+def _open_batch_writer(output_file: pathlib.Path, output_format: str, csv_delimiter: str, sheet_name: str,
+                       freeze_panes: tuple[int, int] | None,
+                       ) -> typing.Iterator[_CsvBatchWriter | _ArrowBatchWriter | _ExcelBatchWriter]:
+    if output_format == 'csv':
+        with output_file.open('w', newline='', encoding='utf-8') as csv_file:
+            yield _CsvBatchWriter(csv_file, csv_delimiter)
+        return
+    if output_format == 'xlsx':
+        writer = _ExcelBatchWriter(output_file, sheet_name, freeze_panes)
+    else:
+        writer = _ArrowBatchWriter(output_file, output_format)
+    try:
+        yield writer
+    finally:
+        writer.close()
+
+
+def write_record_batches(batches: typing.Iterable[pd.DataFrame], output_file: pathlib.Path, output_format: str, *,
+                         csv_delimiter: str = ',', index: bool = False, sheet_name: str = 'area forecast',
+                         freeze_panes: tuple[int, int] | None = None,
+                         progress: typing.Callable[[pd.DataFrame], None] | None = None) -> int:
+    """
+    Write batches to output_file through a single open writer.
+
+    Only one batch is converted at a time, so the memory used by the writer is bounded by a batch rather than the
+    whole result. xlsx is written by xlsxwriter in constant memory mode, parquet by a ParquetWriter and arrow as an
+    Arrow IPC file, both with zstd compression, and csv through one file handle. Every batch must have the same
+    columns and dtypes. The parquet and arrow schema is taken from the first batch, with string for object columns
+    that have no values in it.
+
+    Parameters
+    ----------
+    batches : Iterable[pd.DataFrame]
+        Batches of rows, for instance from iter_record_batches
+    output_file : pathlib.Path
+    output_format : str
+        One of OUTPUT_FORMATS
+    csv_delimiter : str, default ','
+    index : bool, default False
+        Write the index levels of each batch as the first columns. In xlsx they are styled like the header.
+    sheet_name : str, default 'area forecast'
+        Name of the xlsx sheet
+    freeze_panes : tuple[int, int], optional
+        Number of rows and columns to freeze in xlsx, like pd.DataFrame.to_excel
+    progress : Callable[[pd.DataFrame], None], optional
+        Called with each batch after it is written
+
+    Returns
+    -------
+    int
+        Number of rows written
+
+    Raises
+    ------
+    ValueError
+        When output_format is not in OUTPUT_FORMATS
+    """
+    if output_format not in OUTPUT_FORMATS:
+        msg = f'Unknown output_format {output_format}. Expected one of {", ".join(OUTPUT_FORMATS)}'
+        raise ValueError(msg)
+
+    rows = 0
+    with _open_batch_writer(output_file, output_format, csv_delimiter, sheet_name, freeze_panes) as writer:
+        for batch in batches:
+            index_columns = batch.index.nlevels if index else 0
+            writer.write(batch.reset_index() if index else batch, index_columns)
+            rows += len(batch)
+            if progress:
+                progress(batch)
+    return rows
@@ -1,12 +1,17 @@
 import dataclasses
 import itertools
 import math
+import os
 import pathlib
 import string
+import time
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 
 import numpy as np
+import pandas as pd
+import xlsxwriter
 from loguru import logger
 from openpyxl import load_workbook
 from openpyxl.cell import Cell
@@ -15,6 +20,24 @@ from openpyxl.styles import Font, PatternFill
 from openpyxl.utils.cell import cols_from_range, coordinate_to_tuple, get_column_letter
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.errors import IgnoredError
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype, is_timedelta64_dtype
+
+HEADER_FORMAT = {'font_name': 'Source Sans Pro', 'font_size': 11, 'bold': True, 'font_color': '#FFFFFF',
+                 'pattern': 1, 'bg_color': '#C8102E', 'border': 1, 'align': 'center', 'valign': 'top'}
+"""xlsxwriter format of the header row written by write_styled_workbook, the same as make_pretty"""
+BODY_FORMAT = {'font_name': 'Source Sans Pro', 'font_size': 11, 'bold': False, 'font_color': '#000000'}
+"""xlsxwriter format of body cells written by write_styled_workbook, the same as make_pretty"""
+INDEX_FORMAT = {**BODY_FORMAT, 'border': 1, 'align': 'center', 'valign': 'top'}
+"""xlsxwriter format of index cells. pandas writes the index with a border and make_pretty keeps it"""
+ODD_ROW_FORMAT = {'bg_color': '#FFD8DE'}
+EVEN_ROW_FORMAT = {'bg_color': '#FFEBEE'}
+THOUSANDS_NUMBER_FORMAT = r'_-* #,##0_-;[Red]\-* #,##0_-;_-* "-"??_-;_-@_-'
+THOUSANDS_SEPARATOR_ABOVE = 1000
+"""Columns with numbers larger than this are written with THOUSANDS_NUMBER_FORMAT"""
+SCIENTIFIC_NOTATION_FROM = 1e16
+"""Numbers of this magnitude and larger are written in scientific notation"""
+SCIENTIFIC_NOTATION_BELOW = 1e-4
+"""Non-zero numbers of a smaller magnitude than this are written in scientific notation"""
 
 
 @dataclass
@@ -288,3 +311,339 @@ def make_pretty(workbook_name: pathlib.Path|str):
 
 
     wb.save(workbook_name)
+
+
+@dataclass(frozen=True)
+class WorkbookSheet:
+    """
+    A DataFrame and how to write it as a sheet with write_workbook.
+
+    Attributes
+    ----------
+    name : str
+        Name of the sheet
+    df : pd.DataFrame
+    index : bool
+        Write the index of df, see pd.DataFrame.to_excel
+    merge_cells : bool
+        Merge cells of MultiIndex rows and columns, see pd.DataFrame.to_excel
+    top_row_filter : bool
+        Add a filter to the header row
+    """
+    name: str
+    df: pd.DataFrame
+    index: bool = False
+    merge_cells: bool = True
+    top_row_filter: bool = False
+
+
+def write_workbook(workbook_file: pathlib.Path, sheets: typing.Sequence[WorkbookSheet]) -> pathlib.Path:
+    """
+    Write sheets to workbook_file in order, formatted like make_pretty.
+
+    The workbook is written in a single pass by write_styled_workbook. Sheets with MultiIndex columns, unnamed index
+    levels or date and time columns are written by pd.DataFrame.to_excel and formatted by make_pretty and
+    add_top_row_filter instead.
+
+    Parameters
+    ----------
+    workbook_file : pathlib.Path
+    sheets : Sequence[WorkbookSheet]
+
+    Returns
+    -------
+    pathlib.Path
+        workbook_file
+    """
+    if all(_supports_styled_writer(sheet) for sheet in sheets):
+        return write_styled_workbook(workbook_file, sheets)
+    logger.debug(f'{workbook_file.name} is not supported by the styled writer, falling back to make_pretty')
+    return write_pretty_workbook(workbook_file, sheets)
+
+
+def write_pretty_workbook(workbook_file: pathlib.Path, sheets: typing.Sequence[WorkbookSheet]) -> pathlib.Path:
+    """
+    Write sheets to workbook_file with pd.DataFrame.to_excel, then format the workbook with make_pretty and
+    add_top_row_filter.
+
+    Parameters
+    ----------
+    workbook_file : pathlib.Path
+    sheets : Sequence[WorkbookSheet]
+
+    Returns
+    -------
+    pathlib.Path
+        workbook_file
+    """
+    with pd.ExcelWriter(workbook_file, engine='xlsxwriter') as writer:
+        for sheet in sheets:
+            sheet.df.to_excel(writer, sheet_name=sheet.name, index=sheet.index, merge_cells=sheet.merge_cells)
+    make_pretty(workbook_file)
+    filter_sheets = [sheet.name for sheet in sheets if sheet.top_row_filter]
+    if filter_sheets:
+        logger.debug(f'Adding top row filter to {workbook_file}')
+        add_top_row_filter(workbook_file=workbook_file, sheet_names=filter_sheets)
+    return workbook_file
+
+
+def _timed_write_workbook(workbook_file: pathlib.Path, sheets: typing.Sequence[WorkbookSheet]) -> tuple[pathlib.Path, float]:
+    started = time.perf_counter()
+    write_workbook(workbook_file, sheets)
+    return workbook_file, time.perf_counter() - started
+
+
+def write_workbooks(workbooks: typing.Mapping[pathlib.Path, typing.Sequence[WorkbookSheet]],
+                    max_workers: int | None = None) -> typing.Iterator[pathlib.Path]:
+    """
+    Write each workbook with write_workbook in a separate process and log the time spent on each file.
+
+    Parameters
+    ----------
+    workbooks : Mapping[pathlib.Path, Sequence[WorkbookSheet]]
+        Sheets of each workbook by file
+    max_workers : int, optional
+        Number of processes. The number of CPUs, but no more than the number of workbooks, when max_workers is None.
+        With max_workers=1 the workbooks are written one by one in this process.
+
+    Returns
+    -------
+    Iterator[pathlib.Path]
+        Each workbook file in the order of workbooks
+    """
+    if max_workers is None:
+        max_workers = min(len(workbooks), os.cpu_count() or 1)
+    started = time.perf_counter()
+    if max_workers <= 1:
+        for workbook_file, sheets in workbooks.items():
+            written_file, seconds = _timed_write_workbook(workbook_file, sheets)
+            logger.success(f'Wrote {written_file.name} in {seconds:.2f}s')
+            yield written_file
+    else:
+        logger.debug(f'Writing {len(workbooks)} workbooks in {max_workers} processes')
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_timed_write_workbook, workbook_file, sheets)
+                       for workbook_file, sheets in workbooks.items()]
+            for future in futures:
+                workbook_file, seconds = future.result()
+                logger.success(f'Wrote {workbook_file.name} in {seconds:.2f}s')
+                yield workbook_file
+    logger.debug(f'Wrote {len(workbooks)} workbooks in {time.perf_counter() - started:.2f}s')
+
+
+def column_number_format(values: pd.Series) -> str:
+    """
+    Number format of a column given by make_pretty to values written to a spreadsheet.
+
+    The format depends on the largest and smallest of the non-zero numbers truncated to integers. Numbers larger than
+    1000 use a thousand separator and numbers between -1 and 1 use three decimals.
+
+    Parameters
+    ----------
+    values : pd.Series
+
+    Returns
+    -------
+    str
+        The number format or an empty string for the default format
+    """
+    largest, smallest = _extreme_numbers(values)
+    if largest is None:
+        return ''
+    largest, smallest = int(_written_number(largest)), int(_written_number(smallest))
+    if largest > THOUSANDS_SEPARATOR_ABOVE:
+        return THOUSANDS_NUMBER_FORMAT
+    if largest <= 1.0 and smallest >= -1.0:
+        return '0.000'
+    return ''
+
+
+def column_width(header: object, values: pd.Series) -> float:
+    """
+    Width of a column given by make_pretty, calculated from the header and the values instead of the written cells.
+
+    The width is one more than the longest text, while numbers count the digits before the decimal point plus three.
+
+    Parameters
+    ----------
+    header : object
+        The value in the header row
+    values : pd.Series
+
+    Returns
+    -------
+    float
+    """
+    max_length = 5
+    lengths = [_cell_length(header)]
+    if is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        numbers = numbers[~np.isnan(numbers)]
+        finite = np.isfinite(numbers)
+        lengths.extend(_cell_length(v) for v in np.unique(np.sign(numbers[~finite])) * np.inf)
+        numbers = numbers[finite]
+        # The number of digits grows with the magnitude except for numbers written in scientific notation
+        magnitude = np.abs(numbers)
+        scientific = (magnitude >= SCIENTIFIC_NOTATION_FROM) | ((magnitude < SCIENTIFIC_NOTATION_BELOW) & (magnitude > 0))
+        lengths.extend(_cell_length(v) for v in np.unique(numbers[scientific]))
+        for selected in (numbers[~scientific & (numbers > 0)], numbers[~scientific & (numbers < 0)]):
+            if len(selected):
+                lengths.append(_cell_length(selected[np.argmax(np.abs(selected))]))
+        if (numbers == 0).any():
+            lengths.append(_cell_length(0))
+    else:
+        lengths.extend(_cell_length(v) for v in pd.unique(values.astype(object)))
+    return max([max_length, *lengths])
+
+
+def _extreme_numbers(values: pd.Series) -> tuple[object, object]:
+    if is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        numbers = np.array([v for v in pd.unique(values.astype(object)) if _is_number(v)], dtype=float)
+    numbers = numbers[np.isfinite(numbers) & (numbers != 0)]
+    if not len(numbers):
+        return None, None
+    return numbers.max(), numbers.min()
+
+
+def _is_number(value: object) -> bool:
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def _written_number(value: int | float) -> int | float:
+    """value as it is read back from a cell written by xlsxwriter"""
+    text = f'{value:.16G}'
+    return float(text) if '.' in text or 'E' in text else int(text)
+
+
+def cell_value(value: object) -> object:
+    """
+    value as it is written to a cell by pd.DataFrame.to_excel.
+
+    Missing values are returned as None, which is written as an empty cell, and infinite numbers as inf or -inf.
+    numpy scalars are converted to Python values and values that are not numbers or booleans to str.
+    """
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if isinstance(value, (float, np.floating)) and np.isinf(value):
+        return 'inf' if value > 0 else '-inf'
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    return str(value)
+
+
+def _cell_length(value: object) -> float:
+    """Length of a written value as measured by find_max_column_width"""
+    value = cell_value(value)
+    if value is None or value == '':
+        return 0
+    if _is_number(value):
+        return max(len(str(_written_number(value)).split('.')[0]) + math.floor(math.log(1_000_000_0000, 1000)), 2)
+    return len(str(value)) + 1
+
+
+def _column_pixels(width: float) -> int:
+    """Pixels Excel uses to show a column of width characters set by openpyxl"""
+    return int(((256 * width + int(128 / 7)) / 256) * 7)
+
+
+def _sheet_columns(sheet: WorkbookSheet) -> list[tuple[object, pd.Series, bool]]:
+    """Header, values and whether it is an index column, for each column of sheet as written by to_excel"""
+    columns = []
+    if sheet.index:
+        for level, name in enumerate(sheet.df.index.names):
+            columns.append((name, pd.Series(sheet.df.index.get_level_values(level)), True))
+    for position, name in enumerate(sheet.df.columns):
+        columns.append((name, sheet.df.iloc[:, position], False))
+    return columns
+
+
+def _supports_styled_writer(sheet: WorkbookSheet) -> bool:
+    """
+    write_styled_workbook writes sheets with a single row of headers, named index levels when the index is written and
+    no date or time columns.
+    """
+    df = sheet.df
+    if isinstance(df.columns, pd.MultiIndex) or (sheet.index and any(name is None for name in df.index.names)):
+        return False
+    dtypes = list(df.dtypes) + (list(df.index.to_frame().dtypes) if sheet.index else [])
+    return not any(is_datetime64_any_dtype(dtype) or is_timedelta64_dtype(dtype) or isinstance(dtype, pd.PeriodDtype)
+                   for dtype in dtypes)
+
+
+def write_styled_workbook(workbook_file: pathlib.Path, sheets: typing.Sequence[WorkbookSheet]) -> pathlib.Path:
+    """
+    Write sheets to workbook_file styled like make_pretty and add_top_row_filter in a single pass.
+
+    The header style, row banding, number formats, frozen header row, top row filter and column widths are set
+    through xlsxwriter formats while the cells are written. Number formats and column widths are calculated from the
+    DataFrame columns with column_number_format and column_width, so the workbook is never read back.
+
+    Parameters
+    ----------
+    workbook_file : pathlib.Path
+    sheets : Sequence[WorkbookSheet]
+        Sheets supported by the styled writer, see _supports_styled_writer
+
+    Returns
+    -------
+    pathlib.Path
+        workbook_file
+    """
+    workbook = xlsxwriter.Workbook(workbook_file)
+    formats = {}
+
+    def cell_format(properties: dict, number_format: str = '') -> xlsxwriter.format.Format:
+        key = (tuple(properties.items()), number_format)
+        if key not in formats:
+            formats[key] = workbook.add_format({**properties, 'num_format': number_format} if number_format else properties)
+        return formats[key]
+
+    odd_row_format, even_row_format = workbook.add_format(ODD_ROW_FORMAT), workbook.add_format(EVEN_ROW_FORMAT)
+
+    for sheet in sheets:
+        worksheet = workbook.add_worksheet(sheet.name)
+        columns = _sheet_columns(sheet)
+        for column_number, (header, values, is_index) in enumerate(columns):
+            worksheet.write(0, column_number, cell_value(header), cell_format(HEADER_FORMAT))
+            number_format = '' if header == 'year' else column_number_format(values)
+            body_format = cell_format(INDEX_FORMAT if is_index else BODY_FORMAT, number_format)
+            width = column_width(header, values) + 1.5
+            worksheet.set_column_pixels(column_number, column_number, _column_pixels(width))
+            _write_column(worksheet, column_number, values, body_format)
+
+        worksheet.freeze_panes(1, 0)
+        last_row, last_column = len(sheet.df), len(columns) - 1
+        if last_row > 0:
+            for formula, row_format in (('=MOD(ROW(),2)=1', odd_row_format), ('=MOD(ROW(),2)=0', even_row_format)):
+                worksheet.conditional_format(1, 0, last_row, last_column,
+                                             {'type': 'formula', 'criteria': formula, 'format': row_format})
+        if sheet.top_row_filter:
+            worksheet.autofilter(0, 0, 0, last_column)
+    workbook.close()
+    return workbook_file
+
+
+def _write_column(worksheet: xlsxwriter.worksheet.Worksheet, column_number: int, values: pd.Series,
+                  body_format: xlsxwriter.format.Format) -> None:
+    if is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan) if values.dtype.kind == 'f' or values.hasnans \
+            else values.to_numpy()
+        if numbers.dtype.kind == 'f' and not np.isfinite(numbers).all():
+            cells = (cell_value(v) for v in numbers)
+        else:
+            for row_number, number in enumerate(numbers.tolist(), start=1):
+                worksheet.write_number(row_number, column_number, number, body_format)
+            return
+    else:
+        cells = (cell_value(v) for v in values.astype(object))
+    for row_number, cell in enumerate(cells, start=1):
+        if cell is None:
+            worksheet.write_blank(row_number, column_number, None, body_format)
+        else:
+            worksheet.write(row_number, column_number, cell, body_format)
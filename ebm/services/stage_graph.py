@@ -0,0 +1,181 @@
+"""Run named stages with declared inputs in dependency order, independent stages concurrently"""
+import time
+import typing
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    A named step in a StageGraph.
+
+    function is called with the output of each stage in inputs as a keyword argument of the same name. The return
+    value is the output of the stage.
+    """
+    name: str
+    function: typing.Callable[..., typing.Any]
+    inputs: tuple[str, ...] = ()
+
+
+class StageGraph:
+    """
+    A directed acyclic graph of stages.
+
+    Parameters
+    ----------
+    stages : Iterable[Stage]
+        The stages of the graph. Stages are run in this order when they do not depend on each other and only one
+        worker is used.
+
+    Raises
+    ------
+    ValueError
+        When two stages have the same name, a stage has an input that is not a stage, or the stages depend on each
+        other in a cycle.
+
+    Examples
+    --------
+    >>> graph = StageGraph([Stage('a', lambda: 1), Stage('b', lambda: 2), Stage('c', lambda a, b: a + b, ('a', 'b'))])
+    >>> graph.run(targets=['c'])
+    {'c': 3}
+    """
+
+    def __init__(self, stages: typing.Iterable[Stage]):
+        self.stages: dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                msg = f'Duplicate stage {stage.name}'
+                raise ValueError(msg)
+            self.stages[stage.name] = stage
+        for stage in self.stages.values():
+            unknown = [i for i in stage.inputs if i not in self.stages]
+            if unknown:
+                msg = f'Stage {stage.name} has unknown input {", ".join(unknown)}'
+                raise ValueError(msg)
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> list[str]:
+        order: list[str] = []
+        state: dict[str, str] = {}
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                msg = f'Stages depend on each other in a cycle: {" -> ".join((*path, name))}'
+                raise ValueError(msg)
+            state[name] = 'visiting'
+            for input_name in self.stages[name].inputs:
+                visit(input_name, (*path, name))
+            state[name] = 'done'
+            order.append(name)
+
+        for stage_name in self.stages:
+            visit(stage_name, ())
+        return order
+
+    def ancestors(self, targets: typing.Iterable[str]) -> list[str]:
+        """
+        Stages needed to run targets, including the targets, in the order they can be run.
+
+        Raises
+        ------
+        KeyError
+            When a target is not a stage
+        """
+        required: set[str] = set()
+        to_visit = list(targets)
+        while to_visit:
+            name = to_visit.pop()
+            if name not in self.stages:
+                msg = f'Unknown stage {name}'
+                raise KeyError(msg)
+            if name not in required:
+                required.add(name)
+                to_visit.extend(self.stages[name].inputs)
+        return [name for name in self.order if name in required]
+
+    def run(self, targets: typing.Iterable[str] | None = None, max_workers: int | None = None) -> dict[str, typing.Any]:
+        """
+        Run targets and the stages they depend on.
+
+        Stages with no dependency between them are run concurrently in a thread pool. The output of a stage is
+        released as soon as every stage using it is finished, unless the stage is a target.
+
+        Parameters
+        ----------
+        targets : Iterable[str], optional
+            Names of the stages to return the output of. Every stage when not provided.
+        max_workers : int, optional
+            Number of threads. The ThreadPoolExecutor default is used when max_workers is None. With 1 the stages
+            are run one at a time in the calling thread.
+
+        Returns
+        -------
+        dict[str, Any]
+            Output of each target by name
+        """
+        targets = list(self.stages if targets is None else dict.fromkeys(targets))
+        required = self.ancestors(targets)
+        results = _StageResults(self, required, targets)
+        if max_workers == 1:
+            for name in required:
+                results.finish(name, self._run_stage(name, results.arguments(name)))
+        else:
+            self._run_concurrently(required, results, max_workers)
+        return {name: results.outputs[name] for name in targets}
+
+    def _run_concurrently(self, required: list[str], results: '_StageResults', max_workers: int | None) -> None:
+        """Run required in a thread pool, each stage as soon as the stages it depends on are finished"""
+        waiting = {name: set(self.stages[name].inputs) for name in required}
+        running: dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stage') as executor:
+            try:
+                while waiting or running:
+                    for name in [n for n, inputs in waiting.items() if not inputs]:
+                        del waiting[name]
+                        running[executor.submit(self._run_stage, name, results.arguments(name))] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        results.finish(name, future.result())
+                        for inputs in waiting.values():
+                            inputs.discard(name)
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+
+    def _run_stage(self, name: str, arguments: dict[str, typing.Any]) -> object:
+        logger.debug(f'Start stage {name}')
+        started = time.perf_counter()
+        output = self.stages[name].function(**arguments)
+        logger.debug(f'Finished stage {name} in {time.perf_counter() - started:.2f}s')
+        return output
+
+
+class _StageResults:
+    """
+    Output of the finished stages of one StageGraph.run.
+
+    The output of a stage is released as soon as every stage using it is finished, unless the stage is a target.
+    """
+
+    def __init__(self, graph: StageGraph, required: list[str], targets: list[str]):
+        self.graph = graph
+        self.targets = targets
+        self.users = {name: sum(name in graph.stages[r].inputs for r in required) for name in required}
+        self.outputs: dict[str, typing.Any] = {}
+
+    def arguments(self, name: str) -> dict[str, typing.Any]:
+        return {input_name: self.outputs[input_name] for input_name in self.graph.stages[name].inputs}
+
+    def finish(self, name: str, output: object) -> None:
+        self.outputs[name] = output
+        for input_name in self.graph.stages[name].inputs:
+            self.users[input_name] -= 1
+            if self.users[input_name] == 0 and input_name not in self.targets:
+                del self.outputs[input_name]
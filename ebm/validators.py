@@ -1,19 +1,55 @@
 """
 Pandera validators for ebm input files.
 """
-import itertools
+import functools
+import hashlib
+import pathlib
+import sys
 
 import numpy as np
 import pandas as pd
 import pandera as pa
 
+from ebm.__version__ import version
+from ebm.model import (
+    building_category,
+    building_condition,
+    column_operations,
+    data_classes,
+    dataframemodels,
+    dimension_grid,
+    energy_purpose,
+    heating_systems,
+)
 from ebm.model.building_category import NON_RESIDENTIAL, RESIDENTIAL, BuildingCategory
 from ebm.model.building_condition import BuildingCondition
-from ebm.model.column_operations import explode_column_alias, explode_unique_columns
+from ebm.model.column_operations import expand_aliases, purpose_aliases, unique_column_aliases
 from ebm.model.data_classes import YearRange
+from ebm.model.dimension_grid import DEFAULT_BUILDING_CODES, building_purpose_grid
 from ebm.model.energy_purpose import EnergyPurpose
 from ebm.model.heating_systems import HeatingSystems
 
+SCHEMA_MODULES = (sys.modules[__name__], building_category, building_condition, column_operations, data_classes,
+                  dataframemodels, dimension_grid, energy_purpose, heating_systems)
+"""Modules whose source is part of schema_version"""
+
+
+@functools.cache
+def schema_version() -> str:
+    """
+    A fingerprint of the validators. The fingerprint changes with the content of this module and of the modules its
+    checks depend on, the ebm version and the pandera version. Validation results recorded under one schema_version
+    must not be trusted under another.
+
+    Returns
+    -------
+    str
+    """
+    source_hash = hashlib.sha256()
+    for module in SCHEMA_MODULES:
+        source_hash.update(pathlib.Path(module.__file__).read_bytes())
+    return f'{version}-{pa.__version__}-{source_hash.hexdigest()[:16]}'
+
 
 def check_building_category(value: pd.Series) -> pd.Series:
     """
@@ -111,7 +147,7 @@ def check_all_existing_building_conditions_present(df: pd.DataFrame):
     ----------
     df: pd.Dataframe
     """
-    grouped = df.groupby(['building_category', 'building_code', 'purpose'])['building_condition']
+    grouped = df.groupby(['building_category', 'building_code', 'purpose'], observed=True)['building_condition']
     existing_conditions = set(BuildingCondition.existing_conditions())
     for _, conditions in grouped:
         if set(conditions) != existing_conditions:
@@ -240,7 +276,7 @@ def check_sum_of_heating_system_shares_equal_1(df: pd.DataFrame):
     """
     """
     precision = 4
-    df = df.groupby(by=['building_category', 'building_code'])[['heating_system_share']].sum()
+    df = df.groupby(by=['building_category', 'building_code'], observed=True)[['heating_system_share']].sum()
     df['heating_system_share'] = round(df['heating_system_share'] * 100, precision)
     return_series = df["heating_system_share"] == 100.0
     return return_series
@@ -259,23 +295,7 @@ def make_building_purpose(years: YearRange | None = None) -> pd.DataFrame:
     -------
     pd.DataFrame
     """
-    data = []
-    columns = [list(BuildingCategory),
-               ['PRE_TEK49', 'TEK49', 'TEK69', 'TEK87', 'TEK97', 'TEK07', 'TEK10', 'TEK17'],
-               EnergyPurpose]
-
-    column_headers = ['building_category', 'building_code', 'building_condition', 'purpose']
-    if years:
-        columns.append(years)
-        column_headers.append('year')
-
-    for bc, building_code, purpose, *year in itertools.product(*columns):
-        row = [bc, building_code, 'original_condition', purpose]
-        if years:
-            row.append(year[0])
-        data.append(row)
-
-    return pd.DataFrame(data=data, columns=column_headers)
+    return building_purpose_grid(DEFAULT_BUILDING_CODES, years=years)
 
 
 def behaviour_factor_parser(df: pd.DataFrame) -> pd.DataFrame:
@@ -297,14 +317,8 @@ def behaviour_factor_parser(df: pd.DataFrame) -> pd.DataFrame:
     df['end_year'] = df.end_year.fillna(model_years.end).astype(int)
 
     unique_columns = ['building_category', 'building_code', 'purpose', 'start_year', 'end_year']
-    behaviour_factor = explode_unique_columns(df,
-                                              unique_columns=unique_columns)
-
-    behaviour_factor = explode_column_alias(behaviour_factor,
-                       column='purpose',
-                       values=[p for p in EnergyPurpose],
-                       alias='default',
-                       de_dup_by=unique_columns)
+    behaviour_factor = expand_aliases(df, {'purpose': purpose_aliases(), **unique_column_aliases()},
+                                      unique_columns=unique_columns)
 
     behaviour_factor['year'] = behaviour_factor.apply(
         lambda row: range(row.start_year, row.end_year+1), axis=1)
@@ -0,0 +1,87 @@
+"""
+Benchmark the pandas and numpy engines of ebm.model.area.calculate_all_area.
+
+The area forecast is calculated for 2020-2050 and for extended horizons. Inputs that end before the horizon,
+population, new building shares and the last building code, are extended by repeating the last year. Both engines
+are checked to return identical dataframes before they are timed.
+
+.. code-block:: bash
+
+    python scripts/benchmark_area_forecast.py --input ebm/data/long_analysis_2024 --end-years 2050 2070 2100
+"""
+import argparse
+import copy
+import pathlib
+import timeit
+
+import pandas as pd
+from loguru import logger
+
+from ebm.areaforecast.s_curve import calculate_s_curves
+from ebm.cmd.helpers import configure_loglevel
+from ebm.model.area import calculate_all_area
+from ebm.model.data_classes import YearRange
+from ebm.model.database_manager import DatabaseManager
+from ebm.model.file_handler import FileHandler
+
+
+def extend_to_year(df: pd.DataFrame, end_year: int) -> pd.DataFrame:
+    """Repeat the last row of df, indexed by year, until end_year"""
+    if df.index.max() >= end_year:
+        return df
+    return df.reindex(range(df.index.min(), end_year + 1)).ffill()
+
+
+def area_forecast_arguments(database_manager: DatabaseManager, years: YearRange) -> dict:
+    area_parameters = database_manager.get_area_parameters()
+    area_parameters['year'] = years.start
+    building_code_parameters = database_manager.file_handler.get_building_code()
+    last_code = building_code_parameters.period_end_year.idxmax()
+    building_code_parameters.loc[last_code, 'period_end_year'] = max(years.end,
+                                                                      building_code_parameters.loc[last_code, 'period_end_year'])
+    s_curves_by_condition = calculate_s_curves(database_manager.get_scurve_params(), building_code_parameters, years)
+
+    return {'area_new_residential_buildings': database_manager.get_area_new_residential_buildings(),
+            'area_parameters': area_parameters,
+            'area_per_person': database_manager.get_area_per_person(),
+            'building_code_parameters': building_code_parameters,
+            'construction_population': extend_to_year(database_manager.get_construction_population(), years.end),
+            'new_buildings_category_share': extend_to_year(database_manager.get_new_buildings_category_share(), years.end),
+            's_curves_by_condition': s_curves_by_condition,
+            'years': years}
+
+
+def benchmark(arguments: dict, engine: str, repeat: int) -> float:
+    timer = timeit.Timer(lambda: calculate_all_area(**copy.deepcopy(arguments), engine=engine))
+    return min(timer.repeat(repeat=repeat, number=1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the area forecast engines')
+    parser.add_argument('--input', type=pathlib.Path, default=FileHandler.default_data_directory())
+    parser.add_argument('--end-years', type=int, nargs='+', default=[2050, 2070, 2100])
+    parser.add_argument('--repeat', type=int, default=5)
+    arguments = parser.parse_args()
+    configure_loglevel(log_format='{message}', level='WARNING')
+
+    database_manager = DatabaseManager(FileHandler(directory=arguments.input))
+    rows = []
+    for end_year in arguments.end_years:
+        years = YearRange(2020, end_year)
+        area_arguments = area_forecast_arguments(database_manager, years)
+        expected = calculate_all_area(**copy.deepcopy(area_arguments), engine='pandas')
+        actual = calculate_all_area(**copy.deepcopy(area_arguments), engine='numpy')
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+        pandas_seconds = benchmark(area_arguments, 'pandas', arguments.repeat)
+        numpy_seconds = benchmark(area_arguments, 'numpy', arguments.repeat)
+        rows.append({'years': f'{years.start}-{years.end}', 'rows': len(expected),
+                     'pandas_ms': round(pandas_seconds * 1000, 1), 'numpy_ms': round(numpy_seconds * 1000, 1),
+                     'speedup': round(pandas_seconds / numpy_seconds, 1)})
+        logger.warning(f'{years} identical')
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
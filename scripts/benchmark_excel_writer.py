@@ -0,0 +1,64 @@
+"""
+Benchmark write_styled_workbook against writing with to_excel and formatting with make_pretty and add_top_row_filter.
+
+The sheets of the energy-use reports are calculated once. Every long sheet is then written to a temporary directory
+by both writers, and the fastest of repeat runs is reported.
+
+.. code-block:: bash
+
+    python scripts/benchmark_excel_writer.py --input ebm/data/long_analysis_2024 --end-year 2050
+"""
+import argparse
+import pathlib
+import tempfile
+import timeit
+
+import pandas as pd
+from loguru import logger
+
+from ebm.cmd.helpers import configure_loglevel
+from ebm.cmd.pipeline import REPORTS, energy_model_stages
+from ebm.model.data_classes import YearRange
+from ebm.model.database_manager import DatabaseManager
+from ebm.model.file_handler import FileHandler
+from ebm.services.spreadsheet import write_pretty_workbook, write_styled_workbook
+from ebm.services.stage_graph import StageGraph
+
+
+def benchmark(writer, workbook_file: pathlib.Path, sheets: list, repeat: int) -> float:
+    timer = timeit.Timer(lambda: writer(workbook_file, sheets))
+    return min(timer.repeat(repeat=repeat, number=1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the styled Excel writer')
+    parser.add_argument('--input', type=pathlib.Path, default=FileHandler.default_data_directory())
+    parser.add_argument('--end-year', type=int, default=2050)
+    parser.add_argument('--repeat', type=int, default=3)
+    arguments = parser.parse_args()
+    configure_loglevel(log_format='{message}', level='WARNING')
+
+    database_manager = DatabaseManager(FileHandler(directory=arguments.input))
+    graph = StageGraph(energy_model_stages(YearRange(2020, arguments.end_year), database_manager))
+    reports = graph.run(targets=REPORTS)
+    logger.warning(f'Calculated {len(reports)} reports')
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for report, sheets in reports.items():
+            long_sheets = [sheet for sheet in sheets if sheet.name == 'long']
+            if not long_sheets:
+                continue
+            workbook_file = pathlib.Path(directory) / report
+            pretty_seconds = benchmark(write_pretty_workbook, workbook_file, long_sheets, arguments.repeat)
+            styled_seconds = benchmark(write_styled_workbook, workbook_file, long_sheets, arguments.repeat)
+            rows.append({'report': report, 'rows': len(long_sheets[0].df), 'columns': len(long_sheets[0].df.columns),
+                         'make_pretty_ms': round(pretty_seconds * 1000, 1),
+                         'styled_ms': round(styled_seconds * 1000, 1),
+                         'speedup': round(pretty_seconds / styled_seconds, 1)})
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
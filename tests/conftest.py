@@ -37,6 +37,14 @@ def propagate_logs():
     yield
 
 
+@pytest.fixture(autouse=True)
+def ebm_cache_directory(tmp_path_factory, monkeypatch):
+    """Keep caches written by tests, like the validation cache, out of the user cache directory"""
+    cache_directory = tmp_path_factory.mktemp('ebm_cache')
+    monkeypatch.setenv('EBM_CACHE_DIRECTORY', str(cache_directory))
+    yield cache_directory
+
+
 def pytest_collection_modifyitems(config, items):
     """ Adds pytest.mark.explicit for test that only should run when called explicitly
 
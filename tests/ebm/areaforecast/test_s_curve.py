@@ -329,7 +329,7 @@ def test_calculate_s_curves_return_columns(scurves_parameters_house, building_co
 
 
 def test_calculate_s_curves_conditions_sums_to_one(scurves_parameters_house, building_code_parameters, years):
-    result = s_curve.calculate_s_curves(scurves_parameters_house, building_code_parameters, years)
+    result = s_curve.calculate_s_curves(scurves_parameters_house, building_code_parameters, years, diagnostics=True)
 
     assert pd.Series(result.s_curve_sum.round(5) == 1.0).all()
 
@@ -750,6 +750,76 @@ def test_pause_building_condition_rates(condition, expect_shifted, expect_accumu
     assert res.loc[('B', 't87'), f'{condition}_acc'].to_list() == pytest.approx(expect_accumulated)
 
 
+@pytest.mark.parametrize('diagnostics', [False, True])
+def test_calculate_s_curves_numpy_engine_equals_pandas_engine(scurves_parameters_house, building_code_parameters, years,
+                                                              diagnostics):
+    expected = s_curve.calculate_s_curves(scurves_parameters_house, building_code_parameters, years,
+                                          diagnostics=diagnostics)
+    actual = s_curve.calculate_s_curves(scurves_parameters_house, building_code_parameters, years, engine='numpy',
+                                        diagnostics=diagnostics)
+
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+
+def test_normalize_scurve_conditions_numpy_engine_falls_back_to_pandas_with_overrides(scurves_parameters_house,
+                                                                                      building_code_parameters, years):
+    s_curves_with_building_code = s_curve.calculate_scurves_with_building_code(building_code_parameters, scurves_parameters_house, years)
+    never_share = pd.Series(0.5, index=s_curves_with_building_code.index)
+
+    expected = s_curve.normalize_scurve_conditions(s_curves_with_building_code.copy(), years, small_measure_never_share=never_share)
+    actual = s_curve.normalize_scurve_conditions(s_curves_with_building_code, years, engine='numpy', small_measure_never_share=never_share)
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_normalize_scurve_conditions_raise_value_error_on_unknown_engine(scurves_parameters_house, building_code_parameters, years):
+    s_curves_with_building_code = s_curve.calculate_scurves_with_building_code(building_code_parameters, scurves_parameters_house, years)
+
+    with pytest.raises(ValueError, match='engine'):
+        s_curve.normalize_scurve_conditions(s_curves_with_building_code, years, engine='polars')
+
+
+def test_calculate_s_curves_without_diagnostics_return_columns_used_by_area(scurves_parameters_house,
+                                                                            building_code_parameters, years):
+    diagnostics = s_curve.calculate_s_curves(scurves_parameters_house, building_code_parameters, years, diagnostics=True)
+    result = s_curve.calculate_s_curves(scurves_parameters_house, building_code_parameters, years, diagnostics=False)
+
+    assert result.columns.to_list() == ['original_condition', 'demolition', 'small_measure', 'renovation',
+                                        'renovation_and_small_measure', 's_curve_demolition']
+    pd.testing.assert_frame_equal(result, diagnostics[result.columns])
+
+
+def test_calculate_s_curves_diagnostics_from_environment(scurves_parameters_house, building_code_parameters, years,
+                                                         monkeypatch):
+    monkeypatch.setenv('EBM_S_CURVE_DIAGNOSTICS', 'TRUE')
+    result = s_curve.calculate_s_curves(scurves_parameters_house, building_code_parameters, years)
+
+    assert 's_curve_sum' in result.columns
+    assert 'scurve_total' in result.columns
+
+
+def test_scurve_rates_batch_equals_scurve_rates_with_age(scurves_parameters_house):
+    shortform = s_curve.translate_scurve_parameter_to_shortform(scurves_parameters_house)
+    expected = s_curve.scurve_rates_with_age(s_curve.scurve_rates(shortform))
+
+    rate, rate_acc = s_curve.scurve_rates_batch(shortform[list(s_curve.BATCH_PARAMETERS)].to_numpy())
+
+    np.testing.assert_array_equal(rate, expected.rate.to_numpy().reshape(len(shortform), -1))
+    np.testing.assert_array_equal(rate_acc, expected.rate_acc.to_numpy().reshape(len(shortform), -1))
+
+
+def test_scurve_rates_batch_max_age():
+    rate, rate_acc = s_curve.scurve_rates_batch(np.array([[3, 23, 30, 80, 0.8, 0.01]]), max_age=61)
+
+    assert rate.shape == (1, 60)
+    assert rate_acc.shape == (1, 60)
+
+
+def test_scurve_rates_batch_raise_value_error_on_wrong_shape():
+    with pytest.raises(ValueError, match='Expected N'):
+        s_curve.scurve_rates_batch(np.array([3, 23, 30, 80, 0.8, 0.01]))
+
+
 if __name__ == "__main__":
     import sys
 
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from ebm.areaforecast import s_curve
+from ebm.areaforecast.s_curve_cache import SCurveRateCache
+from ebm.model.file_handler import FileHandler
+
+
+@pytest.fixture
+def scurve_parameters() -> pd.DataFrame:
+    return pd.read_csv(FileHandler.default_data_directory() / FileHandler.S_CURVE)
+
+
+@pytest.fixture
+def rate_cache(monkeypatch) -> SCurveRateCache:
+    cache = SCurveRateCache()
+    monkeypatch.setattr(s_curve, 's_curve_rate_cache', cache)
+    return cache
+
+
+def test_scurve_from_s_curve_parameters_with_cache_equals_without_cache(scurve_parameters, rate_cache):
+    expected = s_curve.scurve_from_s_curve_parameters(scurve_parameters, use_cache=False)
+
+    cold = s_curve.scurve_from_s_curve_parameters(scurve_parameters, use_cache=True)
+    warm = s_curve.scurve_from_s_curve_parameters(scurve_parameters, use_cache=True)
+
+    pd.testing.assert_frame_equal(cold, expected, check_exact=True)
+    pd.testing.assert_frame_equal(warm, expected, check_exact=True)
+    assert rate_cache.cache_info().hits == len(scurve_parameters)
+    assert rate_cache.cache_info().misses == len(scurve_parameters)
+
+
+def test_scurve_from_s_curve_parameters_only_calculate_changed_rows(scurve_parameters, rate_cache):
+    s_curve.scurve_from_s_curve_parameters(scurve_parameters, use_cache=True)
+    rate_cache.reset_counters()
+
+    changed = scurve_parameters.copy()
+    changed.loc[3, 'never_share'] = 0.3
+    result = s_curve.scurve_from_s_curve_parameters(changed, use_cache=True)
+
+    pd.testing.assert_frame_equal(result, s_curve.scurve_from_s_curve_parameters(changed, use_cache=False),
+                                  check_exact=True)
+    assert rate_cache.cache_info().misses == 1
+    assert rate_cache.cache_info().hits == len(scurve_parameters) - 1
+
+
+def test_scurve_rate_cache_reuse_files_in_cache_directory(scurve_parameters, tmp_path, monkeypatch):
+    first = SCurveRateCache(directory=tmp_path)
+    monkeypatch.setattr(s_curve, 's_curve_rate_cache', first)
+    expected = s_curve.scurve_from_s_curve_parameters(scurve_parameters, use_cache=True)
+    assert len(list(tmp_path.glob('*.npz'))) == len(scurve_parameters)
+
+    second = SCurveRateCache(directory=tmp_path)
+    monkeypatch.setattr(s_curve, 's_curve_rate_cache', second)
+    result = s_curve.scurve_from_s_curve_parameters(scurve_parameters, use_cache=True)
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    assert second.cache_info().misses == 0
+
+
+def test_scurve_rate_cache_directory_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv('EBM_S_CURVE_CACHE_DIRECTORY', str(tmp_path))
+
+    assert SCurveRateCache().directory == tmp_path
+    assert SCurveRateCache(directory=tmp_path / 'other').directory == tmp_path / 'other'
+
+
+def test_scurve_rate_cache_does_not_support_duplicate_rows(scurve_parameters):
+    shortform = s_curve.translate_scurve_parameter_to_shortform(scurve_parameters)
+
+    assert SCurveRateCache.supports(shortform)
+    assert not SCurveRateCache.supports(pd.concat([shortform, shortform.iloc[:1]]))
@@ -0,0 +1,95 @@
+import os
+import pathlib
+
+import pandas as pd
+import pandera as pa
+import pytest
+
+from ebm.cmd.compile_input import compile_input
+from ebm.model.file_handler import FileHandler
+
+
+@pytest.fixture
+def tmp_file_handler(tmp_path) -> FileHandler:
+    input_directory = tmp_path / 'input'
+    input_directory.mkdir()
+    file_handler = FileHandler(input_directory)
+    file_handler.create_missing_input_files()
+    return file_handler
+
+
+def test_compile_input_writes_manifest_and_snapshot_files(tmp_file_handler: FileHandler):
+    snapshot_directory = compile_input(tmp_file_handler)
+
+    assert snapshot_directory == tmp_file_handler.input_directory / '.ebm_snapshot'
+    manifest = tmp_file_handler.snapshot.manifest()
+    assert set(manifest['files']) == set(tmp_file_handler.files_to_check)
+    for file_name, entry in manifest['files'].items():
+        assert (snapshot_directory / entry['snapshot']).is_file()
+        assert len(entry['sha256']) == 64, f'Expected sha256 hex digest for {file_name}'
+
+
+def test_get_file_from_snapshot_equals_source_file(tmp_file_handler: FileHandler):
+    compile_input(tmp_file_handler)
+
+    source = FileHandler(tmp_file_handler.input_directory, use_cache=False, use_snapshot=False)
+    compiled = FileHandler(tmp_file_handler.input_directory, use_cache=False)
+    for file_name in tmp_file_handler.files_to_check:
+        assert compiled.snapshot.is_current(file_name)
+        pd.testing.assert_frame_equal(compiled.get_file(file_name), source.get_file(file_name))
+
+
+def test_snapshot_is_not_used_when_source_file_is_newer(tmp_file_handler: FileHandler):
+    compile_input(tmp_file_handler)
+
+    area_file = tmp_file_handler.input_directory / FileHandler.AREA
+    df = tmp_file_handler.get_file(FileHandler.AREA)
+    df.iloc[:1].to_csv(area_file, index=False)
+    snapshot_mtime = tmp_file_handler.snapshot.snapshot_path(FileHandler.AREA).stat().st_mtime_ns
+    os.utime(area_file, ns=(snapshot_mtime + 1_000_000_000, snapshot_mtime + 1_000_000_000))
+
+    assert not tmp_file_handler.snapshot.is_current(FileHandler.AREA)
+    assert len(tmp_file_handler.get_file(FileHandler.AREA)) == 1
+
+
+def test_snapshot_is_not_used_when_source_file_changes_with_same_size_and_older_mtime(tmp_file_handler: FileHandler):
+    compile_input(tmp_file_handler)
+
+    area_file = tmp_file_handler.input_directory / FileHandler.AREA
+    source_stat = area_file.stat()
+    content = area_file.read_bytes()
+    area_file.write_bytes(content.replace(b'house', b'hous3', 1))
+    os.utime(area_file, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns - 1_000_000_000))
+
+    assert area_file.stat().st_size == source_stat.st_size
+    assert not tmp_file_handler.snapshot.is_current(FileHandler.AREA)
+
+
+def test_snapshot_is_used_when_source_file_is_touched_with_same_content(tmp_file_handler: FileHandler):
+    compile_input(tmp_file_handler)
+
+    area_file = tmp_file_handler.input_directory / FileHandler.AREA
+    mtime_ns = area_file.stat().st_mtime_ns + 1_000_000_000
+    os.utime(area_file, ns=(mtime_ns, mtime_ns))
+
+    assert tmp_file_handler.snapshot.is_current(FileHandler.AREA)
+
+
+def test_compile_input_does_not_write_snapshot_for_invalid_input(tmp_file_handler: FileHandler):
+    df = tmp_file_handler.get_file(FileHandler.AREA)
+    df.loc[0, 'area'] = -1
+    df.to_csv(tmp_file_handler.input_directory / FileHandler.AREA, index=False)
+
+    with pytest.raises(pa.errors.SchemaErrors):
+        compile_input(tmp_file_handler)
+
+    assert tmp_file_handler.snapshot.manifest() is None
+
+
+def test_compile_input_raises_file_not_found_on_missing_file(tmp_file_handler: FileHandler):
+    (tmp_file_handler.input_directory / FileHandler.S_CURVE).unlink()
+
+    with pytest.raises(FileNotFoundError):
+        compile_input(tmp_file_handler)
+
+    assert not pathlib.Path(tmp_file_handler.input_directory / '.ebm_snapshot').exists()
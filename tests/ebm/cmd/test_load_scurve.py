@@ -0,0 +1,55 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from ebm.cmd.load_scurve import generate_scurve_dataframe
+from ebm.model.scurve import SCurve
+
+
+def s_curve_parameters() -> pd.DataFrame:
+    return pd.read_csv(io.StringIO("""
+building_category,condition,earliest_age_for_measure,average_age_for_measure,rush_period_years,last_age_for_measure,rush_share,never_share
+house,small_measure,3,23,30,80,0.8,0.01
+house,renovation,10,37,24,75,0.65,0.05
+house,demolition,60,90,40,150,0.7,0.05
+""".strip()))
+
+
+def test_generate_scurve_dataframe_equals_scurve():
+    parameters = s_curve_parameters()
+    result = generate_scurve_dataframe(parameters)
+
+    assert result.index.names == ['building_category', 'building_condition', 'age']
+    for row in parameters.itertuples():
+        expected = SCurve(earliest_age=row.earliest_age_for_measure, average_age=row.average_age_for_measure,
+                          last_age=row.last_age_for_measure, rush_years=row.rush_period_years,
+                          rush_share=row.rush_share, never_share=row.never_share).calc_scurve()
+        actual = result.sort_index().loc[(row.building_category, row.condition)]
+        assert actual.index.to_list() == list(range(1, len(expected) + 1))
+        np.testing.assert_array_equal(actual.share.to_numpy(), expected.rate.to_numpy())
+        np.testing.assert_array_equal(actual.share_acc.to_numpy(), expected.rate_acc.to_numpy())
+
+
+def test_generate_scurve_dataframe_keep_extra_columns_for_each_variation():
+    parameters = pd.concat([s_curve_parameters().iloc[:1]] * 3, ignore_index=True)
+    parameters['never_share'] = [0.0, 0.1, 0.2]
+    parameters['scenario'] = ['a', 'b', 'c']
+
+    result = generate_scurve_dataframe(parameters)
+
+    assert len(result) == 3 * 130
+    assert result.groupby('scenario').share.sum().round(6).to_list() == [1.0, 0.9, 0.8]
+
+
+def test_generate_scurve_dataframe_skip_negative_parameters():
+    parameters = s_curve_parameters()
+    parameters.loc[1, 'rush_share'] = -0.1
+
+    result = generate_scurve_dataframe(parameters)
+
+    assert set(result.index.get_level_values('building_condition')) == {'small_measure', 'demolition'}
+
+
+def test_generate_scurve_dataframe_empty_parameters():
+    assert generate_scurve_dataframe(s_curve_parameters().iloc[0:0]).empty
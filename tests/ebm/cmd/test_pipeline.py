@@ -0,0 +1,37 @@
+import pathlib
+from unittest.mock import Mock
+
+import pytest
+
+from ebm.cmd.pipeline import REPORTS, energy_model_stages, export_energy_model_reports
+from ebm.model.data_classes import YearRange
+from ebm.services.stage_graph import StageGraph
+
+
+def test_energy_model_stages_has_a_stage_for_every_report():
+    graph = StageGraph(energy_model_stages(YearRange(2020, 2050), Mock()))
+
+    assert set(REPORTS).issubset(graph.stages)
+    assert set(graph.ancestors(REPORTS)) == set(graph.stages)
+
+
+def test_energy_model_stages_heat_prod_hp_does_not_need_energy_use():
+    graph = StageGraph(energy_model_stages(YearRange(2020, 2050), Mock()))
+
+    ancestors = graph.ancestors(['heat_prod_hp.xlsx'])
+
+    assert 'total_energy_need' in ancestors
+    assert 'heating_systems_parameter' in ancestors
+    assert 'energy_use_kwh' not in ancestors
+    assert 'energy_use_holiday_homes' not in ancestors
+    assert not set(REPORTS).difference(['heat_prod_hp.xlsx']).intersection(ancestors)
+
+
+def test_export_energy_model_reports_raise_value_error_on_unknown_report():
+    with pytest.raises(ValueError, match=r'Unknown report area\.csv'):
+        export_energy_model_reports(YearRange(2020, 2050), Mock(), pathlib.Path('output'), reports=['area.csv'])
+
+
+def test_export_energy_model_reports_raise_value_error_on_unknown_output_format():
+    with pytest.raises(ValueError, match='Unknown output_format json'):
+        export_energy_model_reports(YearRange(2020, 2050), Mock(), pathlib.Path('output'), output_format='json')
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from ebm.cmd.result_handler import EbmDefaultHandler, resolve_output_format
+
+
+@pytest.mark.parametrize('output_format, read', [('parquet', pd.read_parquet), ('arrow', pd.read_feather)])
+def test_write_tqdm_result_columnar(tmp_path, output_format, read):
+    model = pd.DataFrame({'building_category': ['house', 'office'], 'year': [2020, 2020], 'm2': [1.5, 2.5]})
+    model = model.set_index(['building_category', 'year'])
+
+    EbmDefaultHandler.write_tqdm_result(tmp_path / f'model.{output_format}', model, output_format=output_format)
+
+    pd.testing.assert_frame_equal(read(tmp_path / f'model.{output_format}'), model.reset_index())
+
+
+def test_write_tqdm_result_xlsx_like_to_excel(tmp_path):
+    model = pd.DataFrame({'building_category': ['house', 'office'], 'building_code': ['TEK07', 'TEK17'],
+                          'building_condition': ['original_condition'] * 2, 'year': [2020, 2020], 'm2': [1.5, 2.5]})
+    model = model.set_index(['building_category', 'building_code', 'building_condition', 'year'])
+
+    EbmDefaultHandler.write_tqdm_result(tmp_path / 'model.xlsx', model)
+
+    workbook = load_workbook(tmp_path / 'model.xlsx')
+    assert workbook.sheetnames == ['area forecast']
+    worksheet = workbook['area forecast']
+    assert worksheet.freeze_panes == 'D2'
+    assert [[c.value for c in row] for row in worksheet.iter_rows()] == [
+        ['building_category', 'building_code', 'building_condition', 'year', 'm2'],
+        ['house', 'TEK07', 'original_condition', 2020, 1.5],
+        ['office', 'TEK17', 'original_condition', 2020, 2.5]]
+    assert worksheet['A2'].font.b
+    assert not worksheet['E2'].font.b
+
+
+def test_resolve_output_format(tmp_path):
+    assert resolve_output_format(tmp_path / 'model.csv') == 'csv'
+    assert resolve_output_format(tmp_path / 'model.xlsx') == 'xlsx'
+    assert resolve_output_format(tmp_path / 'model', 'parquet') == 'parquet'
+    with pytest.raises(ValueError, match='Unknown output_format json'):
+        resolve_output_format(tmp_path / 'model.json', 'json')
@@ -14,6 +14,7 @@ from ebm.model.area import (
     transform_cumulative_demolition_to_yearly_demolition,
     multiply_s_curves_with_floor_area, calculate_construction_with_demolition,
     check_yearly_index,
+    calculate_all_area,
 )
 from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
@@ -475,6 +476,11 @@ def test_calculate_construction_with_demolition_returns_float():
     assert pd.api.types.is_float_dtype(df.area), "Expected df.area to be float dtype"
 
 
+def test_calculate_all_area_raise_value_error_on_unknown_engine():
+    with pytest.raises(ValueError, match='engine'):
+        calculate_all_area(None, None, None, None, None, None, None, YearRange(2020, 2050), engine='polars')
+
+
 if __name__ == "__main__":
     import os
     pytest.main([os.path.abspath(__file__)])
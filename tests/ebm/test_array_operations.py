@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from ebm.model.array_operations import forward_fill, kahan_cumsum, kahan_sum
+
+
+def test_kahan_cumsum_equals_pandas_groupby_cumsum():
+    values = np.array([[0.1, np.nan, 0.2, 1e16, 0.3], [np.nan, 1.0, 2.0, np.nan, np.nan]])
+    df = pd.DataFrame({'group': np.repeat([0, 1], 5), 'value': values.ravel()})
+
+    expected = df.groupby('group').value.cumsum().to_numpy().reshape(values.shape)
+
+    np.testing.assert_array_equal(kahan_cumsum(values), expected)
+
+
+def test_kahan_sum_equals_pandas_groupby_sum():
+    rng = np.random.default_rng(seed=1)
+    values = rng.uniform(0, 1e7, (50, 9)) * rng.uniform(0, 1, (50, 9)) ** 8
+    values[0] = np.nan
+    df = pd.DataFrame({'group': np.repeat(np.arange(50), 9), 'value': values.ravel()})
+
+    expected = df.groupby('group').value.sum().to_numpy()
+
+    np.testing.assert_array_equal(kahan_sum(values, axis=1), expected)
+    assert kahan_sum(values, axis=1)[0] == 0.0
+
+
+def test_forward_fill():
+    values = np.array([[np.nan, 1.0, np.nan, 3.0, np.nan], [2.0, np.nan, np.nan, np.nan, 4.0]])
+
+    np.testing.assert_array_equal(forward_fill(values), [[np.nan, 1.0, 1.0, 3.0, 3.0], [2.0, 2.0, 2.0, 2.0, 4.0]])
@@ -1,7 +1,13 @@
 import pandas as pd
 import pytest
 
-from ebm.model.column_operations import explode_column_alias, replace_column_alias
+from ebm.model.column_operations import (
+    default_aliases,
+    expand_aliases,
+    explode_column_alias,
+    replace_column_alias,
+    unique_column_aliases,
+)
 
 
 def test_explode_column_alias():
@@ -72,6 +78,56 @@ def test_replace_column_alias():
     assert result.category.to_list() == ['A', 'B', 'b', 'a', 'A+B']
 
 
+def test_expand_aliases_prefer_specific_over_group_over_default():
+    df = pd.DataFrame({'building_category': ['default', 'residential', 'house'],
+                       'building_code': ['default', 'default', 'TEK07'],
+                       'v': ['default', 'residential', 'house']},
+                      index=[10, 11, 12])
+
+    result = expand_aliases(df, unique_column_aliases(['TEK07', 'TEK10']), unique_columns=['building_category', 'building_code'])
+    r = result.set_index(['building_category', 'building_code']).v
+
+    assert len(r) == 26
+    assert r.loc[('house', 'TEK07')] == 'house'
+    assert r.loc[('house', 'TEK10')] == 'residential'
+    assert r.loc[('apartment_block', 'TEK07')] == 'residential'
+    assert r.loc[('office', 'TEK10')] == 'default'
+    assert result.index.to_series().groupby(result.v).first().to_dict() == {'default': 10, 'residential': 11, 'house': 12}
+    assert result.columns.to_list() == ['building_category', 'building_code', 'v']
+
+
+def test_expand_aliases_first_column_takes_precedence():
+    df = pd.DataFrame({'building_category': ['house', 'default'],
+                       'building_code': ['default', 'TEK07'],
+                       'v': ['house-default', 'default-tek07']})
+
+    result = expand_aliases(df, unique_column_aliases(['TEK07']), unique_columns=['building_category', 'building_code'])
+
+    assert result.query('building_category=="house"').v.to_list() == ['house-default']
+
+
+def test_expand_aliases_split_plus_and_keep_first_duplicate():
+    df = pd.DataFrame({'building_code': ['TEK07+TEK10', 'TEK07', 'default'], 'v': [1, 2, 3]})
+
+    result = expand_aliases(df, {'building_code': default_aliases(['TEK07', 'TEK10', 'TEK17'])}, unique_columns=['building_code'])
+
+    assert result.building_code.to_list() == ['TEK07', 'TEK10', 'TEK17']
+    assert result.v.to_list() == [1, 1, 3]
+
+
+def test_expand_aliases_without_unique_columns_keep_every_row():
+    df = pd.DataFrame({'building_code': ['TEK07', 'default']})
+
+    result = expand_aliases(df, {'building_code': default_aliases(['TEK07', 'TEK10'])})
+
+    assert result.building_code.to_list() == ['TEK07', 'TEK07', 'TEK10']
+    assert result.index.to_list() == [0, 1, 1]
+
+
+def test_expand_aliases_checks_columns():
+    with pytest.raises(ValueError, match='must contain the column: purpose'):
+        expand_aliases(pd.DataFrame({'building_code': ['default']}), {'purpose': default_aliases(['lighting'])})
+
 
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,43 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ebm.services.columnar import MANIFEST, read_columnar_reports, write_columnar_reports, write_table
+from ebm.services.spreadsheet import WorkbookSheet
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow', 'csv'])
+def test_write_columnar_reports_read_back(tmp_path, output_format):
+    wide = pd.DataFrame({'building_category': ['house', 'office'], 'U': ['m2', 'm2'],
+                         2020: [1000.1, 2000.0 / 3], 2021: [np.nan, 1e-05]}, index=[5, 3])
+    long = pd.DataFrame({'year': [2020, 2020], 'building_category': ['house', 'office'], 'share': [0.1, 0.9]})
+    long = long.set_index(['year', 'building_category'])
+    workbooks = {tmp_path / 'area.xlsx': [WorkbookSheet('wide', wide),
+                                          WorkbookSheet('long', long, index=True, merge_cells=False, top_row_filter=True)]}
+
+    written = list(write_columnar_reports(workbooks, output_format, csv_delimiter=';'))
+
+    assert [f.name for f in written] == [f'area_wide.{output_format}', f'area_long.{output_format}', MANIFEST]
+    assert json.loads((tmp_path / MANIFEST).read_text())['reports']['area.xlsx'][0]['columns'] == [
+        'building_category', 'U', 2020, 2021]
+    actual = read_columnar_reports(tmp_path / MANIFEST)
+    assert list(actual) == [tmp_path / 'area.xlsx']
+    actual_wide, actual_long = actual[tmp_path / 'area.xlsx']
+    assert (actual_long.name, actual_long.index, actual_long.merge_cells, actual_long.top_row_filter) == \
+           ('long', True, False, True)
+    pd.testing.assert_frame_equal(actual_wide.df, wide.reset_index(drop=True))
+    pd.testing.assert_frame_equal(actual_long.df, long)
+
+
+def test_read_columnar_reports_raise_value_error_on_unknown_report(tmp_path):
+    list(write_columnar_reports({tmp_path / 'area.xlsx': [WorkbookSheet('long', pd.DataFrame({'a': [1]}))]}, 'parquet'))
+
+    with pytest.raises(ValueError, match=r'Unknown report energy_use\.xlsx'):
+        read_columnar_reports(tmp_path / MANIFEST, reports=['energy_use.xlsx'])
+
+
+def test_write_table_raise_value_error_on_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match='Unknown output_format xlsx'):
+        write_table(pd.DataFrame({'a': [1]}), tmp_path / 'a.xlsx', 'xlsx')
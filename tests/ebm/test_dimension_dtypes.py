@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from ebm.model.bema import map_sort_order
+from ebm.model.dimension_dtypes import DIMENSION_CATEGORIES, dimension_dtype, has_aliases, to_categorical
+from ebm.model.file_handler import FileHandler
+
+
+def test_dimension_categories_in_bema_order():
+    assert DIMENSION_CATEGORIES['building_code'][:3] == ('PRE_TEK49', 'TEK49', 'TEK69')
+    assert DIMENSION_CATEGORIES['purpose'][0] == 'heating_rv'
+    assert DIMENSION_CATEGORIES['building_category'].index('house') < DIMENSION_CATEGORIES['building_category'].index('retail')
+
+
+def test_dimension_dtype_is_cached_and_ordered():
+    assert dimension_dtype('building_code') is dimension_dtype('building_code')
+    assert dimension_dtype('building_code').ordered
+    assert list(dimension_dtype('building_code', ('TEK99',)).categories)[-1] == 'TEK99'
+
+    with pytest.raises(KeyError):
+        dimension_dtype('not_a_dimension')
+
+
+def test_to_categorical_sort_in_bema_order_and_keep_unknown_values():
+    df = pd.DataFrame({'building_category': ['office', 'house', 'apartment_block'],
+                       'building_code': ['TEK17', 'TEK99', 'PRE_TEK49'],
+                       'v': [1, 2, 3]})
+
+    result = to_categorical(df)
+
+    assert isinstance(result.building_category.dtype, pd.CategoricalDtype)
+    assert result.building_code.to_list() == ['TEK17', 'TEK99', 'PRE_TEK49']
+    assert result.sort_values('building_category').v.to_list() == [2, 3, 1]
+    assert result.sort_values('building_code').v.to_list() == [3, 1, 2]
+    assert df.building_category.dtype == object, 'Expected df to be unchanged'
+    assert result.v.dtype == df.v.dtype
+
+
+def test_to_categorical_convert_index_levels():
+    df = pd.DataFrame({'building_category': ['office', 'house'], 'year': [2020, 2020], 'v': [1, 2]})
+
+    result = to_categorical(df.set_index(['building_category', 'year'])).sort_index()
+
+    assert result.v.to_list() == [2, 1]
+
+
+def test_to_categorical_leave_columns_with_aliases():
+    df = pd.DataFrame({'building_category': ['default', 'house'], 'building_code': ['TEK07+TEK10', 'TEK17'],
+                       'purpose': ['lighting', 'cooling']})
+
+    result = to_categorical(df)
+
+    assert has_aliases(df.building_category)
+    assert result.building_category.dtype == object
+    assert result.building_code.dtype == object
+    assert isinstance(result.purpose.dtype, pd.CategoricalDtype)
+
+
+def test_map_sort_order_return_ordered_categorical_unchanged():
+    df = to_categorical(pd.DataFrame({'building_code': ['TEK17', 'TEK49']}))
+
+    assert map_sort_order(df.building_code) is df.building_code
+
+
+def test_file_handler_get_file_categorical(tmp_path, monkeypatch):
+    (tmp_path / 'area.csv').write_text('building_category,building_code,area\nhouse,TEK07,1.0\noffice,TEK49,2.0\n')
+
+    assert FileHandler(tmp_path, use_cache=False).get_file('area.csv').building_code.dtype == object
+    assert isinstance(FileHandler(tmp_path, use_cache=False, categorical=True).get_file('area.csv').building_code.dtype,
+                      pd.CategoricalDtype)
+
+    monkeypatch.setenv('EBM_CATEGORICAL_DIMENSIONS', 'TRUE')
+    fh = FileHandler(tmp_path, use_cache=False)
+    assert isinstance(fh.get_file('area.csv').building_code.dtype, pd.CategoricalDtype)
+    assert fh.get_file('area.csv', categorical=False).building_code.dtype == object
@@ -0,0 +1,60 @@
+import itertools
+
+import pandas as pd
+
+from ebm.model.building_category import BuildingCategory
+from ebm.model.data_classes import YearRange
+from ebm.model.dimension_grid import (
+    building_purpose_grid,
+    cross_join_dimensions,
+    dimension_grid,
+    dimension_index,
+)
+from ebm.model.energy_purpose import EnergyPurpose
+
+
+def test_dimension_grid_is_ordered_like_itertools_product():
+    building_codes = ['TEK07', 'TEK10', 'TEK17']
+    purposes = ['lighting', 'cooling']
+    years = YearRange(2020, 2023)
+
+    result = dimension_grid(building_code=building_codes, purpose=purposes, year=years)
+
+    expected = pd.DataFrame(data=list(itertools.product(building_codes, purposes, years)),
+                            columns=['building_code', 'purpose', 'year'])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_dimension_index_is_cached():
+    first = dimension_index(building_code=['TEK07', 'TEK10'], year=YearRange(2020, 2050))
+    second = dimension_index(building_code=('TEK07', 'TEK10'), year=range(2020, 2051))
+
+    assert first is second
+
+
+def test_dimension_index_cache_keeps_types_apart():
+    categories = dimension_index(building_category=[BuildingCategory.HOUSE])
+    strings = dimension_index(building_category=['house'])
+
+    assert categories is not strings
+    assert type(strings[0][0]) is str
+
+
+def test_cross_join_dimensions_equals_merge_how_cross():
+    df = pd.DataFrame({'building_category': ['house', 'office', 'house'], 'building_code': ['TEK07', 'TEK10', 'TEK17']})
+
+    result = cross_join_dimensions(df, heating_systems=['Electricity', 'DH'], year=[2020, 2021])
+
+    expected = df.merge(pd.DataFrame(data=list(itertools.product(['Electricity', 'DH'], [2020, 2021])),
+                                     columns=['heating_systems', 'year']), how='cross')
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_building_purpose_grid():
+    result = building_purpose_grid(['TEK07', 'TEK10'], years=YearRange(2020, 2021))
+
+    assert result.columns.tolist() == ['building_category', 'building_code', 'building_condition', 'purpose', 'year']
+    assert len(result) == len(BuildingCategory) * 2 * len(EnergyPurpose) * 2
+    assert (result.building_condition == 'original_condition').all()
+    assert building_purpose_grid(['TEK07']).columns.tolist() == ['building_category', 'building_code',
+                                                                 'building_condition', 'purpose']
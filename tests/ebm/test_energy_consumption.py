@@ -2,7 +2,7 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from ebm.energy_consumption import EnergyConsumption
+from ebm.energy_consumption import SORT_LEVELS, EnergyConsumption
 
 
 @pytest.fixture
@@ -156,3 +156,35 @@ def test_calculate_supports_non_index_energy_need(heating_systems_parameters_hou
 
     assert len(result) == 54
     assert round(result.kwh.sum(), 0) == 327690852
+
+
+@pytest.mark.parametrize('sort', [True, False])
+def test_calculate_numpy_engine_is_the_same_as_pandas_engine(heating_systems_parameters_house_building_code07, sort):
+    energy_need = pd.DataFrame(
+        data=[[building_code, building_condition, purpose] for building_code in ['TEK49', 'TEK07']
+              for building_condition in ['small_measure', 'original_condition']
+              for purpose in ['lighting', 'heating_rv', 'cooling', 'heating_dhw', 'fans_and_pumps', 'electrical_equipment']],
+        columns=['building_code', 'building_condition', 'purpose'])
+    energy_need.insert(0, 'building_category', 'house')
+    energy_need.insert(3, 'year', 2020)
+    energy_need['energy_requirement'] = np.arange(1, len(energy_need) + 1) * 1_000_000.0
+    energy_need['kwh_m2'] = 10.0
+    energy_need['m2'] = 100_000.0
+
+    pandas_engine = EnergyConsumption(heating_systems_parameters_house_building_code07)
+    pandas_engine.heating_systems_parameters = pandas_engine.grouped_heating_systems()
+    expected = pandas_engine.calculate(energy_need.copy())
+
+    numpy_engine = EnergyConsumption(heating_systems_parameters_house_building_code07)
+    numpy_engine.heating_systems_parameters = numpy_engine.grouped_heating_systems()
+    result = numpy_engine.calculate(energy_need.copy(), sort=sort, engine='numpy')
+
+    if not sort:
+        result = result.sort_index(level=SORT_LEVELS)
+    pd.testing.assert_frame_equal(result, expected)
+    assert (result.query('heating_systems=="HP - Electricity" and purpose=="heating_rv"').hp_source == 'Heat pump air-air').all()
+
+
+def test_calculate_raise_value_error_on_unknown_engine(heating_systems_parameters_house_building_code07):
+    with pytest.raises(ValueError, match="Unknown engine 'polars'"):
+        EnergyConsumption(heating_systems_parameters_house_building_code07).calculate(pd.DataFrame(), engine='polars')
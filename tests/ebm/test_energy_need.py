@@ -0,0 +1,70 @@
+import pathlib
+
+import pandas as pd
+import pytest
+
+from ebm import extractors
+from ebm.model.data_classes import YearRange
+from ebm.model.database_manager import DatabaseManager
+from ebm.model.energy_need import ENERGY_NEED_INDEX, EnergyNeed, transform_total_energy_need
+from ebm.model.energy_purpose import EnergyPurpose
+from ebm.model.file_handler import FileHandler
+
+test_data = pathlib.Path(__file__).parent / 'data'
+
+
+@pytest.fixture
+def database_manager() -> DatabaseManager:
+    return DatabaseManager(FileHandler(directory=test_data / 'kalibrert'))
+
+
+def test_energy_need_to_dataframe_equals_extract_energy_need(database_manager):
+    years = YearRange(2020, 2050)
+    expected = extractors.extract_energy_need(years, database_manager)
+
+    result = EnergyNeed.from_database_manager(database_manager, years).to_dataframe().set_index(ENERGY_NEED_INDEX)
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+@pytest.mark.parametrize('building_category, year', [(['house'], None),
+                                                     (None, [2023]),
+                                                     (['office', 'kindergarten'], [2020, 2045, 2050])])
+def test_energy_need_to_dataframe_slice(database_manager, building_category, year):
+    years = YearRange(2020, 2050)
+    expected = extractors.extract_energy_need(years, database_manager).reset_index()
+    if building_category is not None:
+        expected = expected[expected.building_category.isin(building_category)]
+    if year is not None:
+        expected = expected[expected.year.isin(year)]
+
+    result = EnergyNeed.from_database_manager(database_manager, years).to_dataframe(building_category=building_category,
+                                                                                    year=year)
+
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True), check_exact=True)
+
+
+def test_transform_total_energy_need_with_energy_need_for_one_year(database_manager):
+    years = YearRange(2020, 2050)
+    area_forecast = pd.DataFrame(
+        data=[['house', 'TEK07', 'original_condition', 2023, 100.0],
+              ['house', 'TEK07', 'renovation', 2023, 50.0],
+              ['office', 'TEK17', 'small_measure', 2023, 10.0]],
+        columns=['building_category', 'building_code', 'building_condition', 'year', 'm2'])
+    expected = transform_total_energy_need(extractors.extract_energy_need(years, database_manager), area_forecast)
+
+    result = transform_total_energy_need(EnergyNeed.from_database_manager(database_manager, years), area_forecast)
+
+    assert len(result) == 3 * len(EnergyPurpose)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_energy_need_from_database_manager_with_years_beyond_2050(database_manager):
+    energy_need = EnergyNeed.from_database_manager(database_manager, YearRange(2020, 2070))
+
+    assert energy_need.years == YearRange(2020, 2070)
+    result = energy_need.to_dataframe()
+    assert result.year.min() == 2020
+    assert result.year.max() == 2070
+    expected = EnergyNeed.from_database_manager(database_manager, YearRange(2020, 2050)).to_dataframe()
+    pd.testing.assert_frame_equal(result[result.year <= 2050].reset_index(drop=True), expected, check_exact=True)
@@ -10,6 +10,8 @@ from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
 from ebm.model.energy_purpose import EnergyPurpose
 from ebm.model.energy_requirement import (
+    calculate_energy_reduction,
+    calculate_reduction_factors,
     calculate_reduction_policy,
     calculate_reduction_yearly,
     energy_need_improvements_kwh_m2,
@@ -198,6 +200,78 @@ def test_calculate_reduction_with_policy_improvement():
     pd.testing.assert_series_equal(result, expected, check_index=False, check_names=False)
 
 
+def test_calculate_reduction_policy_use_first_period_outside_periods():
+    all_things = pd.DataFrame(
+        data=[['house', 'TEK01', 'lighting', y] for y in YearRange(2010, 2022)],
+        columns=['building_category', 'building_code', 'purpose', 'year'])
+
+    p_i_df = pd.DataFrame(
+        data=[
+            ['house', 'TEK01', 'lighting', 2017, 0.8, 2020],
+            ['house', 'TEK01', 'lighting', 2011, 0.6, 2015],
+        ],
+        columns=['building_category', 'building_code', 'purpose', 'start_year', 'improvement_at_end_year', 'end_year'])
+
+    df = calculate_reduction_policy(policy_improvement=p_i_df, all_things=all_things)
+
+    assert df.reduction_policy.round(8).tolist() == [1.0, 1.0, 0.85, 0.7, 0.55, 0.4, 0.4,
+                                                     0.4, 0.33333333, 0.26666667, 0.2, 0.4, 0.4]
+
+
+def _energy_requirements_with_reduction():
+    energy_requirements = make_df_building_category_code_purpose_yearly(
+        period=YearRange(2010, 2022), building_category=['house', 'office'], building_code=['TEK01', 'TEK02'],
+        purpose=['lighting', 'cooling'], building_condition=['original_condition', 'renovation'])
+    energy_requirements['kwh_m2'] = 100.0
+    energy_requirements['behaviour_factor'] = 0.9
+
+    policy_improvement = pd.DataFrame(
+        data=[['house', 'TEK01', 'lighting', 2011, 0.6, 2015],
+              ['house', 'TEK01', 'lighting', 2017, 0.8, 2020],
+              ['office', 'TEK02', 'cooling', 2012, 0.2, 2018]],
+        columns=['building_category', 'building_code', 'purpose', 'start_year', 'improvement_at_end_year', 'end_year'])
+    reduction_per_condition = pd.DataFrame(
+        data=[['house', 'TEK01', 'lighting', 'renovation', 0.2],
+              ['office', 'TEK02', 'lighting', 'renovation', None]],
+        columns=['building_category', 'building_code', 'purpose', 'building_condition', 'reduction_share'])
+    yearly_improvement = pd.DataFrame(
+        data=[['house', 'TEK01', 'lighting', 2011, 0.1, 2020],
+              ['office', 'TEK01', 'cooling', 2015, 0.05, 2018]],
+        columns=['building_category', 'building_code', 'purpose', 'start_year', 'yearly_efficiency_improvement',
+                 'end_year'])
+    return energy_requirements, policy_improvement, reduction_per_condition, yearly_improvement
+
+
+def test_calculate_reduction_factors_equals_merged_reduction_factors():
+    energy_requirements, policy_improvement, reduction_per_condition, yearly_improvement = \
+        _energy_requirements_with_reduction()
+    reduction_condition = reduction_per_condition.copy()
+    reduction_condition['reduction_condition'] = (1.0 - reduction_condition.reduction_share).fillna(1.0)
+
+    result = calculate_reduction_factors(energy_requirements, policy_improvement, reduction_condition,
+                                         yearly_improvement)
+
+    keys = ['building_category', 'building_code', 'purpose', 'year']
+    expected = energy_requirements.merge(reduction_condition, how='left',
+                                         on=['building_category', 'building_code', 'building_condition', 'purpose'])
+    expected = expected.merge(calculate_reduction_yearly(energy_requirements, yearly_improvement), on=keys, how='left')
+    expected = expected.merge(calculate_reduction_policy(policy_improvement, energy_requirements), on=keys, how='left')
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_calculate_energy_reduction_merge_duplicate_yearly_improvement():
+    energy_requirements, policy_improvement, reduction_per_condition, yearly_improvement = \
+        _energy_requirements_with_reduction()
+    yearly_improvement = pd.concat([yearly_improvement, yearly_improvement.iloc[[0]]], ignore_index=True)
+
+    df = calculate_energy_reduction(energy_requirements, policy_improvement, reduction_per_condition,
+                                    yearly_improvement)
+
+    assert len(df) == len(energy_requirements) + 2 * 13
+    assert (df.reduced_kwh_m2 <= 90.0).all()
+
+
 @pytest.fixture
 def energy_need():
     @dataclass
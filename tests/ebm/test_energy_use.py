@@ -42,28 +42,34 @@ def heating_systems_parameters_house_building_code07():
     return heating_systems_parameters_house_building_code07
 
 
-def test_heating_rv():
-    heating_systems_projection = pd.DataFrame(
+@pytest.fixture
+def heating_systems_parameter():
+    return pd.DataFrame(
         data=[
             ['house', 'TEK99', 1977, 'Electric boiler', 0.4,
-                1.0, 0.97, 'Electricity',
-                0.0, 1.0, 'Ingen',
-                0.0, 1.0, 'Ingen',
-             ],
+             1.0, 0.97, 'Electricity',
+             0.0, 1.0, 'Ingen',
+             0.0, 1.0, 'Ingen',
+             0.98, 'Electricity', 4.0],
             ['house', 'TEK99', 1977, 'HP - Bio - Electricity', 0.5,
-                0.6, 4.2, 'Electricity',
-                0.3, 0.68, 'Bio',
-                0.1,0.99, 'Electricity'],
+             0.6, 4.2, 'Electricity',
+             0.3, 0.68, 'Bio',
+             0.1, 0.99, 'Electricity',
+             0.98, 'DH', 3.0],
         ],
         columns=['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE,
                  GRUNNLAST_ANDEL, BASE_LOAD_EFFICIENCY, BASE_LOAD_ENERGY_PRODUCT,
                  PEAK_LOAD_COVERAGE, PEAK_LOAD_EFFICIENCY, PEAK_LOAD_ENERGY_PRODUCT,
-                 TERTIARY_LOAD_COVERAGE, TERTIARY_LOAD_EFFICIENCY, TERTIARY_LOAD_ENERGY_PRODUCT]
+                 TERTIARY_LOAD_COVERAGE, TERTIARY_LOAD_EFFICIENCY, TERTIARY_LOAD_ENERGY_PRODUCT,
+                 DHW_EFFICIENCY, DOMESTIC_HOT_WATER_ENERGY_PRODUCT, COOLING_EFFICIENCY],
     )
 
-    result = energy_use.heating_rv(heating_systems_projection)
-    result = result.reset_index().drop(columns=['index'], errors='ignore')[['building_category','building_code','year','heating_systems','heating_system',
-                 'heating_system_share', 'load_share','load_efficiency','energy_product','load','purpose']]
+
+def test_delivered_energy_factors_heating_rv(heating_systems_parameter):
+    result = energy_use.delivered_energy_factors(heating_systems_parameter)
+    result = result[result.purpose == 'heating_rv'].reset_index(drop=True)[
+        ['building_category', 'building_code', 'year', 'heating_systems', 'heating_system',
+         'heating_system_share', 'load_share', 'load_efficiency', 'energy_product', 'load', 'purpose']]
 
     expected = pd.DataFrame(
         data=[
@@ -78,81 +84,48 @@ def test_heating_rv():
             ['house', 'TEK99', 1977, 'Electric boiler', np.nan,
              0.4, 0.0, 1.0, 'Ingen', 'tertiary', 'heating_rv'],
             ['house', 'TEK99', 1977, 'HP - Bio - Electricity', 'Electricity',
-             0.5, 0.1, 0.99, 'Electricity', 'tertiary', 'heating_rv'],],
-        columns=['building_category','building_code','year','heating_systems','heating_system',
-                 'heating_system_share', 'load_share','load_efficiency','energy_product','load','purpose'])
-
-    assert len(result) == 6
-
-    pd.testing.assert_frame_equal(result , expected)
-
-
-
-def test_heating_dhw():
-    heating_systems_projection = pd.DataFrame(
-        data=[
-            ['house', 'TEK99', 1977, 'DH - Bio', 0.5, 99.0, 1.0, 'DH'],
-            ['house', 'TEK99', 1977, 'Electric boiler', 1.0, 52.0, 0.98, 'Electricity'],
-        ],
-        columns=['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, DHW_EFFICIENCY, DOMESTIC_HOT_WATER_ENERGY_PRODUCT]
-    )
-
-    result = energy_use.heating_dhw(heating_systems_projection)
-
-    expected = pd.DataFrame(
-        data=[
-            ['house', 'TEK99', 1977, 'DH - Bio', 0.5, 1.0, 1.0, 'DH', 'dhw', 'heating_dhw'],
-            ['house', 'TEK99', 1977, 'Electric boiler', 1.0, 1.0, 0.98, 'Electricity', 'dhw', 'heating_dhw'],
-        ],
-        columns=['building_category','building_code','year','heating_systems','heating_system_share', 'load_share','load_efficiency','energy_product','load','purpose'])
-
-    assert len(result) == 2
-
-    pd.testing.assert_frame_equal(result , expected)
+             0.5, 0.1, 0.99, 'Electricity', 'tertiary', 'heating_rv']],
+        columns=['building_category', 'building_code', 'year', 'heating_systems', 'heating_system',
+                 'heating_system_share', 'load_share', 'load_efficiency', 'energy_product', 'load', 'purpose'])
 
+    pd.testing.assert_frame_equal(result, expected)
 
-def test_cooling():
-    heating_systems_projection = pd.DataFrame(
-        data=[
-            ['house', 'TEK99', 1971, 'HP - BIO', 0.5, 99.0, 0.99, 'Nuclear waste'],
-            ['house', 'TEK99', 1972, 'HP - BIO', 1.0, 52.0, 3.0, 'Nuclear waste'],
-        ],
-        columns=['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, COOLING_EFFICIENCY, BASE_LOAD_ENERGY_PRODUCT]
-    )
 
-    result = energy_use.cooling(heating_systems_projection)
+def test_delivered_energy_factors_heating_dhw_cooling_and_other(heating_systems_parameter):
+    result = energy_use.delivered_energy_factors(heating_systems_parameter)
+    result = result[result.purpose != 'heating_rv'].reset_index(drop=True)[
+        ['heating_systems', 'heating_system_share', 'load_share', 'load_efficiency', 'energy_product', 'load', 'purpose']]
 
     expected = pd.DataFrame(
         data=[
-            ['house', 'TEK99', 1971, 'HP - BIO', 0.5, 1.0, 0.99, 'Electricity', 'base', 'cooling'],
-            ['house', 'TEK99', 1972, 'HP - BIO', 1.0, 1.0, 3.0, 'Electricity', 'base', 'cooling'],
-        ],
-        columns=['building_category','building_code','year','heating_systems','heating_system_share', 'load_share','load_efficiency','energy_product','load','purpose'])
+            ['Electric boiler', 0.4, 1.0, 0.98, 'Electricity', 'dhw', 'heating_dhw'],
+            ['HP - Bio - Electricity', 0.5, 1.0, 0.98, 'DH', 'dhw', 'heating_dhw'],
+            ['Electric boiler', 0.4, 1.0, 4.0, 'Electricity', 'base', 'cooling'],
+            ['HP - Bio - Electricity', 0.5, 1.0, 3.0, 'Electricity', 'base', 'cooling'],
+            *[[heating_systems, share, 1.0, 1.0, 'Electricity', 'base', purpose]
+              for purpose in ['electrical_equipment', 'fans_and_pumps', 'lighting']
+              for heating_systems, share in [('Electric boiler', 0.4), ('HP - Bio - Electricity', 0.5)]]],
+        columns=['heating_systems', 'heating_system_share', 'load_share', 'load_efficiency', 'energy_product', 'load',
+                 'purpose'])
 
-    assert len(result) == 2
+    pd.testing.assert_frame_equal(result, expected)
 
-    pd.testing.assert_frame_equal(result , expected)
 
+def test_delivered_energy_factors_efficiency_factor(heating_systems_parameter):
+    result = energy_use.delivered_energy_factors(heating_systems_parameter).set_index(['heating_systems', 'purpose', 'load'])
 
-def test_other():
-    heating_systems_projection = pd.DataFrame(
-        data=[
-            ['house', 'TEK99', 1971, 'HP - BIO', 0.5, 0.2, 1.0, 'Electricity'],
-        ],
-        columns=['building_category', 'building_code', 'year', 'heating_systems', HEATING_SYSTEM_SHARE, GRUNNLAST_ANDEL, BASE_LOAD_EFFICIENCY, BASE_LOAD_ENERGY_PRODUCT]
-    )
+    assert result.loc[('HP - Bio - Electricity', 'heating_rv', 'base'), 'efficiency_factor'] == pytest.approx(0.5 * 0.6 / 4.2)
+    assert result.loc[('Electric boiler', 'heating_dhw', 'dhw'), 'efficiency_factor'] == pytest.approx(0.4 / 0.98)
+    assert result.loc[('Electric boiler', 'lighting', 'base'), 'efficiency_factor'] == pytest.approx(0.4)
 
-    result = energy_use.other(heating_systems_projection)
 
-    expected = pd.DataFrame(
-        data=[['house', 'TEK99', 1971, 'HP - BIO', 0.5, 1.0, 1.0, 'Electricity', 'base', purpose] for purpose in ['electrical_equipment', 'fans_and_pumps', 'lighting']],
-        columns=['building_category','building_code','year','heating_systems','heating_system_share', 'load_share','load_efficiency','energy_product','load','purpose'])
+def test_delivered_energy_factors_building_group(heating_systems_parameter):
+    heating_systems_parameter.loc[1, 'building_category'] = 'kindergarten'
+    result = energy_use.delivered_energy_factors(heating_systems_parameter)
 
-    assert len(result) == 3
-    assert result.purpose.to_list() == ['electrical_equipment', 'fans_and_pumps', 'lighting']
-    assert result.load.tolist() == ['base'] * 3
+    assert result.groupby('building_category').building_group.unique().to_dict() == {
+        'house': ['Residential'], 'kindergarten': ['Non-residential']}
 
-    pd.testing.assert_frame_equal(result , expected)
 
 def test_energy_use_kwh():
     column_name = 'energy_need'
@@ -233,20 +206,6 @@ def test_energy_use_kwh_m2():
 
 
 
-def test_efficiency_factor():
-    heating_systems = pd.DataFrame(
-        data=[
-            ['house', 'TEK07', 'heating_rv', 1977, 0.5, 0.2, 4],
-            ['house', 'TEK07', 'lighting', 1977, 0.5, 0.2, 1],
-        ],
-        columns='building_category,building_code,purpose,year,heating_system_share,load_share,load_efficiency'.split(','))
-
-    result = energy_use.efficiency_factor(heating_systems)
-    assert 'efficiency_factor' in result.columns
-    assert len(result) == 2
-    assert result.efficiency_factor.to_list() == [0.025, 0.1]
-
-
 @pytest.mark.skip
 def test_calculate(heating_systems_parameters_house_building_code07):
     energy_need_house_building_code07 = pd.DataFrame(
@@ -286,7 +245,7 @@ def test_calculate(heating_systems_parameters_house_building_code07):
 
     energy_need = pd.concat([energy_need_house_building_code07, energy_need_house_building_code49])
 
-    result = energy_use.energy_use_kwh(energy_need, energy_use.efficiency_factor(energy_use.all_purposes(heating_systems_parameters_house_building_code07)))
+    result = energy_use.energy_use_kwh(energy_need, energy_use.delivered_energy_factors(heating_systems_parameters_house_building_code07))
 
 
 @pytest.mark.parametrize(('energy_need', 'heating_system_share', 'load_share', 'load_efficiency', 'expect'), [
@@ -362,3 +321,34 @@ def test_efficiency_kwh_raise_value_error_on_mismatching_index(
                                   heating_system_share=pd.Series([0.4, 0.6], index=pd.Index(heating_system_share)),
                                   load_share=pd.Series([0.4, 0.6], index=pd.Index(load_share)),
                                   load_efficiency=pd.Series([0.4, 0.6], index=pd.Index(load_efficiency)))
+
+
+def test_delivered_energy_factors_has_a_row_for_each_heating_system_and_load(heating_systems_parameters_house_building_code07):
+    result = energy_use.delivered_energy_factors(heating_systems_parameters_house_building_code07)
+
+    assert len(result) == len(heating_systems_parameters_house_building_code07) * len(energy_use.LOAD_DESCRIPTORS)
+    hp_bio = result[result.heating_systems == 'HP - Bio - Electricity'].set_index(['purpose', 'load'])
+    assert hp_bio.loc[('heating_rv', 'tertiary'), ['heating_system', 'load_share', 'energy_product']].to_list() == [
+        'Electricity', 0.28, 'Electricity']
+    assert hp_bio.loc[('lighting', 'base'), ['load_share', 'load_efficiency', 'energy_product']].to_list() == [
+        1.0, 1.0, 'Electricity']
+    assert (result.building_group == 'Residential').all()
+
+
+def test_building_group_energy_use_kwh_split_energy_need_by_heating_system_share(heating_systems_parameters_house_building_code07):
+    parameters = heating_systems_parameters_house_building_code07
+    energy_need = parameters[['building_category', 'building_code', 'year']].drop_duplicates().merge(
+        pd.DataFrame({'purpose': ['cooling', 'heating_rv', 'heating_dhw', 'lighting', 'fans_and_pumps']}), how='cross')
+    energy_need['energy_requirement'] = np.arange(1.0, len(energy_need) + 1) * 1000.0
+    energy_need['kwh_m2'] = 100.0
+    energy_need['m2'] = 10.0
+
+    result = energy_use.building_group_energy_use_kwh(parameters, energy_need)
+
+    assert len(result) == len(parameters) * 7
+    assert (result.building_group == 'Residential').all()
+    kwh = result[result.purpose.isin(['lighting', 'fans_and_pumps'])].groupby(['building_code', 'purpose']).kwh.sum()
+    share = parameters.groupby('building_code').heating_system_share.sum()
+    expected = energy_need.set_index(['building_code', 'purpose']).energy_requirement.loc[kwh.index]
+    pd.testing.assert_series_equal(kwh, expected * share.reindex(kwh.index.get_level_values('building_code')).to_numpy(),
+                                   check_names=False)
@@ -5,6 +5,7 @@ import pytest
 from loguru import logger
 
 from ebm.extractors import extract_area_forecast
+from ebm.model.area import calculate_all_area_by_building_category
 from ebm.model.bema import map_sort_order
 from ebm.model.data_classes import YearRange
 from ebm.model.database_manager import DatabaseManager
@@ -23,7 +24,8 @@ def extract_area_forecast_csv():
     return df
 
 
-def test_extract_area_forecast(extract_area_forecast_csv: pd.DataFrame):
+@pytest.mark.parametrize('engine', ['pandas', 'numpy'])
+def test_extract_area_forecast(extract_area_forecast_csv: pd.DataFrame, engine: str):
     """Integration test to keep area working while doing refactor."""
     input_directory = test_data / 'kalibrert'
 
@@ -35,7 +37,8 @@ def test_extract_area_forecast(extract_area_forecast_csv: pd.DataFrame):
     s_curves_by_condition = pd.read_csv(test_data / 's_curves_by_condition.csv').set_index(['building_category','building_code','year'])
 
     index_columns = ['year', 'building_category', 'building_condition', 'building_code']
-    result = extract_area_forecast(years, s_curves_by_condition, building_code_parameters, area_parameters, dm)
+    result = extract_area_forecast(years, s_curves_by_condition, building_code_parameters, area_parameters, dm,
+                                   engine=engine)
     # noinspection PyTypeChecker
     result = result.set_index(index_columns, drop=True).sort_index(key=map_sort_order)[['m2']]
     result = result.fillna(0.0)
@@ -54,6 +57,53 @@ def test_extract_area_forecast(extract_area_forecast_csv: pd.DataFrame):
     pd.testing.assert_frame_equal(result, expected)
 
 
+def test_extract_area_forecast_numpy_engine_equals_pandas_engine():
+    dm: DatabaseManager = DatabaseManager(FileHandler(directory=test_data / 'kalibrert'))
+    years: YearRange = YearRange(2020, 2050)
+    building_code_parameters: pd.DataFrame = dm.file_handler.get_building_code()
+    s_curves_by_condition = pd.read_csv(test_data / 's_curves_by_condition.csv').set_index(['building_category','building_code','year'])
+
+    expected = extract_area_forecast(years, s_curves_by_condition.copy(), building_code_parameters.copy(),
+                                     dm.get_area_parameters(), dm)
+    result = extract_area_forecast(years, s_curves_by_condition.copy(), building_code_parameters.copy(),
+                                   dm.get_area_parameters(), dm, engine='numpy')
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_calculate_all_area_by_building_category_equals_serial(processes: int):
+    dm: DatabaseManager = DatabaseManager(FileHandler(directory=test_data / 'kalibrert'))
+    years: YearRange = YearRange(2020, 2050)
+    building_code_parameters: pd.DataFrame = dm.file_handler.get_building_code()
+    s_curves_by_condition = pd.read_csv(test_data / 's_curves_by_condition.csv').set_index(['building_category','building_code','year'])
+
+    expected = extract_area_forecast(years, s_curves_by_condition.copy(), building_code_parameters.copy(),
+                                     dm.get_area_parameters(), dm, processes=1)
+    result = calculate_all_area_by_building_category(dm.get_area_new_residential_buildings(), dm.get_area_parameters(),
+                                                     dm.get_area_per_person(), building_code_parameters.copy(),
+                                                     dm.get_construction_population(),
+                                                     dm.get_new_buildings_category_share(),
+                                                     s_curves_by_condition.copy(), years, max_workers=processes)
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_extract_area_forecast_use_processes_from_environment(monkeypatch):
+    dm: DatabaseManager = DatabaseManager(FileHandler(directory=test_data / 'kalibrert'))
+    years: YearRange = YearRange(2020, 2050)
+    building_code_parameters: pd.DataFrame = dm.file_handler.get_building_code()
+    s_curves_by_condition = pd.read_csv(test_data / 's_curves_by_condition.csv').set_index(['building_category','building_code','year'])
+    expected = extract_area_forecast(years, s_curves_by_condition.copy(), building_code_parameters.copy(),
+                                     dm.get_area_parameters(), dm, processes=1)
+
+    monkeypatch.setenv('EBM_AREA_PROCESSES', '2')
+    result = extract_area_forecast(years, s_curves_by_condition.copy(), building_code_parameters.copy(),
+                                   dm.get_area_parameters(), dm)
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
 def decompress(expected):
 
     return expected
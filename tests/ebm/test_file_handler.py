@@ -1,12 +1,13 @@
 import os
 import pathlib
 import shutil
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import pandas as pd
 import pandera as pa
 import pytest
 
+from ebm import validators
 from ebm.model.file_handler import FileHandler
 
 
@@ -275,5 +276,135 @@ def test_filehandler_get_area_per_person_calls_get_file(tmp_path):
     fh.get_file.assert_called_with('area_per_person.csv')
 
 
+def test_get_file_reads_through_cache(tmp_file_handler):
+    """get_file must only parse the file once as long as the file is unchanged on disk"""
+    tmp_file_handler.invalidate_cache()
+    before = tmp_file_handler.cache_info()
+
+    first = tmp_file_handler.get_file(FileHandler.AREA)
+    second = tmp_file_handler.get_file(FileHandler.AREA)
+
+    after = tmp_file_handler.cache_info()
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_get_file_returns_independent_copies(tmp_file_handler):
+    """Altering a dataframe returned from get_file must not alter the next result"""
+    first = tmp_file_handler.get_file(FileHandler.AREA)
+    first.loc[0, 'area'] = -1
+
+    second = tmp_file_handler.get_file(FileHandler.AREA)
+    assert second.loc[0, 'area'] != -1
+
+
+def test_get_file_reads_changed_file(tmp_file_handler):
+    """get_file must read the file again when it has changed since it was cached"""
+    df = tmp_file_handler.get_file(FileHandler.AREA_PER_PERSON)
+    df.iloc[:1].to_csv(tmp_file_handler.input_directory / FileHandler.AREA_PER_PERSON, index=False)
+
+    assert len(tmp_file_handler.get_file(FileHandler.AREA_PER_PERSON)) == 1
+
+
+def test_invalidate_cache_forces_read(tmp_file_handler):
+    tmp_file_handler.get_file(FileHandler.AREA)
+    tmp_file_handler.invalidate_cache(FileHandler.AREA)
+    before = tmp_file_handler.cache_info()
+
+    tmp_file_handler.get_file(FileHandler.AREA)
+
+    assert tmp_file_handler.cache_info().misses - before.misses == 1
+
+
+def test_filehandler_use_cache_false_bypasses_cache(tmp_file_handler):
+    fh = FileHandler(directory=tmp_file_handler.input_directory, use_cache=False)
+    before = fh.cache_info()
+
+    fh.get_file(FileHandler.AREA)
+    fh.get_file(FileHandler.AREA)
+
+    after = fh.cache_info()
+    assert (after.hits, after.misses) == (before.hits, before.misses)
+
+
+def test_validate_input_files_skips_unchanged_files(tmp_file_handler, ebm_cache_directory):
+    """validate_input_files must not validate files recorded as valid in the validation cache"""
+    input_files = set(tmp_file_handler.input_directory.iterdir())
+    tmp_file_handler.validate_input_files()
+    assert len(list((ebm_cache_directory / 'validation').glob('*.json'))) == 1
+    assert set(tmp_file_handler.input_directory.iterdir()) == input_files
+
+    with patch('ebm.validators.area.validate') as validate_area:
+        tmp_file_handler.validate_input_files()
+        validate_area.assert_not_called()
+
+        tmp_file_handler.validate_input_files(revalidate=True)
+        validate_area.assert_called_once()
+
+
+def test_validate_input_files_validates_changed_file(tmp_file_handler):
+    tmp_file_handler.validate_input_files()
+
+    df = tmp_file_handler.get_file(FileHandler.AREA)
+    df.loc[0, 'area'] = -1
+    df.to_csv(tmp_file_handler.input_directory / FileHandler.AREA, index=False)
+
+    with pytest.raises(pa.errors.SchemaErrors):
+        tmp_file_handler.validate_input_files()
+
+
+def test_validate_input_files_ignores_cache_from_other_schema_version(tmp_file_handler):
+    tmp_file_handler.validate_input_files()
+
+    with patch('ebm.validators.schema_version', return_value='other'), \
+            patch('ebm.validators.area.validate') as validate_area:
+        tmp_file_handler.validate_input_files()
+        validate_area.assert_called_once()
+
+
+def test_schema_version_changes_with_modules_used_by_validators(tmp_path):
+    column_operations_file = tmp_path / 'column_operations.py'
+    column_operations_file.write_text('# changed rule', encoding='utf-8')
+    validators.schema_version.cache_clear()
+    try:
+        before = validators.schema_version()
+        with patch('ebm.model.column_operations.__file__', str(column_operations_file)):
+            validators.schema_version.cache_clear()
+            assert validators.schema_version() != before
+    finally:
+        validators.schema_version.cache_clear()
+
+
+def test_validate_input_files_reads_every_file_into_cache(tmp_file_handler):
+    tmp_file_handler.invalidate_cache()
+
+    tmp_file_handler.validate_input_files(max_workers=4)
+
+    before = tmp_file_handler.cache_info()
+    tmp_file_handler.get_file(FileHandler.S_CURVE)
+    assert tmp_file_handler.cache_info().hits - before.hits == 1
+
+
+def test_validate_input_files_raises_failure_cases_of_every_invalid_file(tmp_file_handler, caplog):
+    """validate_input_files must report every invalid file and raise their failure cases together"""
+    for file_name, column in [(FileHandler.AREA, 'area'), (FileHandler.S_CURVE, 'rush_share')]:
+        df = tmp_file_handler.get_file(file_name)
+        df.loc[0, column] = -1
+        df.to_csv(tmp_file_handler.input_directory / file_name, index=False)
+
+    with pytest.raises(pa.errors.SchemaErrors) as schema_errors:
+        tmp_file_handler.validate_input_files(max_workers=4)
+
+    failure_cases = schema_errors.value.failure_cases
+    assert failure_cases.columns[0] == 'file'
+    assert failure_cases.groupby('file').column.unique().map(list).to_dict() == {'area.csv': ['area'],
+                                                                                's_curve.csv': ['rush_share']}
+    assert len(schema_errors.value.schema_errors) == 2
+    assert set(schema_errors.value.schema.name.split(', ')) == {'area.csv', 's_curve.csv'}
+    assert 'Got error while validating s_curve.csv' in caplog.text
+    assert 'Got error while validating area.csv' in caplog.text
+
+
 if __name__ == "__main__":
     pytest.main()
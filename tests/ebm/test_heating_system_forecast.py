@@ -1,19 +1,27 @@
 import io
+import pathlib
 import re
 
 import pandas as pd
 import pytest
 from loguru import logger
 
+from ebm.cmd.compile_input import compile_input
 from ebm.heating_system_forecast import (
     HeatingSystemsForecast,
     add_existing_heating_system_shares_to_projection,
     add_missing_heating_systems,
     check_sum_of_shares,
+    compile_heating_system_transitions,
     expand_building_category_building_code,
     project_heating_systems,
+    sum_of_shares_errors,
+    year_coverage_errors,
 )
 from ebm.model.data_classes import YearRange
+from ebm.model.database_manager import DatabaseManager
+from ebm.model.file_handler import FileHandler
+from ebm.model.heating_systems import HeatingSystems
 
 BUILDING_CATEGORY = 'building_category'
 BUILDING_CODE = 'building_code'
@@ -107,6 +115,75 @@ apartment_block,TEK07,Electricity,DH,0.25,0.5,0.55
                                period=YearRange(2020,2030))
 
 
+def test_year_coverage_errors_report_each_error_once_with_years():
+    projection = pd.DataFrame(
+        data=[['kindergarten', 'TEK97', 'Electricity', 'DH', 0.25, 0.5],
+              ['kindergarten', 'TEK97', 'Gas', 'DH', 0.25, 0.5],
+              ['house', 'TEK07', 'Electricity', 'DH', 0.25, 0.5]],
+        columns=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS, 2020, 2021])
+
+    errors = year_coverage_errors(projection, start_year=2020, period=YearRange(2020, 2023))
+
+    assert errors.to_dict(orient='records') == [
+        {'error': "Years don't match between dataframes.", 'years': [2020]},
+        {'error': 'Years in dataframe not present in given period.', 'years': [2022, 2023]}]
+    assert year_coverage_errors(projection, start_year=2019, period=YearRange(2019, 2021)).empty
+    assert year_coverage_errors(projection.iloc[0:0], start_year=2020, period=YearRange(2020, 2023)).empty
+
+
+def test_validate_years_check_year_coverage_when_not_validating():
+    shares_start_year = pd.DataFrame(data=[['kindergarten', 'TEK97', 'Electricity', 2020, 1.0]],
+                                     columns=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, YEAR, HEATING_SYSTEM_SHARE])
+    projection = pd.DataFrame(data=[['kindergarten', 'TEK97', 'Electricity', 'DH', 0.25]],
+                              columns=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS, 2021])
+
+    HeatingSystemsForecast(shares_start_year=shares_start_year, efficiencies=pd.DataFrame(), forecast=projection,
+                           building_code_list=[], period=YearRange(2020, 2021), validate=False)
+
+    with pytest.raises(ValueError, match=re.escape('Years in dataframe not present in given period.')):
+        HeatingSystemsForecast(shares_start_year=shares_start_year, efficiencies=pd.DataFrame(), forecast=projection,
+                               building_code_list=[], period=YearRange(2020, 2030), validate=False)
+
+    with pytest.raises(ValueError, match=re.escape("Start year in dataframe doesn't match start year for given period.")):
+        HeatingSystemsForecast(shares_start_year=shares_start_year, efficiencies=pd.DataFrame(), forecast=projection,
+                               building_code_list=[], period=YearRange(2021, 2030), validate=False)
+
+
+def test_new_instance_with_compiled_snapshot_check_year_coverage(tmp_path: pathlib.Path):
+    input_directory = tmp_path / 'input'
+    input_directory.mkdir()
+    FileHandler(input_directory).create_missing_input_files()
+    compile_input(FileHandler(input_directory))
+    file_handler = FileHandler(input_directory)
+    assert file_handler.is_validated_by_snapshot(FileHandler.HEATING_SYSTEM_FORECAST)
+    dm = DatabaseManager(file_handler=file_handler)
+
+    with pytest.raises(ValueError, match=re.escape('Years in dataframe not present in given period.')):
+        HeatingSystemsForecast.new_instance(YearRange(2023, 2050), dm)
+
+
+def test_new_instance_with_compiled_snapshot_check_sum_of_shares(tmp_path: pathlib.Path):
+    input_directory = tmp_path / 'input'
+    input_directory.mkdir()
+    FileHandler(input_directory).create_missing_input_files()
+    shares_file = input_directory / FileHandler.HEATING_SYSTEM_INITIAL_SHARES
+    shares = pd.read_csv(shares_file)
+    shares.loc[0, HEATING_SYSTEM_SHARE] = shares.loc[0, HEATING_SYSTEM_SHARE] + 0.1
+    shares.to_csv(shares_file, index=False)
+    compile_input(FileHandler(input_directory))
+    file_handler = FileHandler(input_directory)
+    assert file_handler.is_validated_by_snapshot(FileHandler.HEATING_SYSTEM_INITIAL_SHARES)
+
+    messages = []
+    handler_id = logger.add(messages.append, level='ERROR')
+    try:
+        HeatingSystemsForecast.new_instance(YearRange(2023, 2030), DatabaseManager(file_handler=file_handler))
+    finally:
+        logger.remove(handler_id)
+
+    assert any('Sum of TEK shares not equal to 1' in message for message in messages)
+
+
 def test_add_missing_heating_systems_ok():
     """Test that missing heating systems are added with default value = 0."""
     shares = pd.read_csv(io.StringIO("""
@@ -288,7 +365,8 @@ kindergarten,TEK97,Gas,DH,0.05,0.075
 
 
 
-def test_project_heating_systems_ok():
+@pytest.mark.parametrize('engine', ['pandas', 'numpy'])
+def test_project_heating_systems_ok(engine: str):
     shares_start_year_all_systems = pd.read_csv(io.StringIO("""
 kindergarten,TEK97,Electricity,2020,1
 kindergarten,TEK97,DH,2020,0.0
@@ -300,7 +378,7 @@ kindergarten,TEK97,Electricity,DH,0.25,0.5
 """.strip()),
                                    names=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS, 2021, 2022], skipinitialspace=True)
 
-    result = project_heating_systems(shares_start_year_all_systems, projected_shares, YearRange(2020,2022))
+    result = project_heating_systems(shares_start_year_all_systems, projected_shares, YearRange(2020,2022), engine=engine)
 
     expected = pd.read_csv(io.StringIO("""
 2021,kindergarten,TEK97,DH,0.25
@@ -318,7 +396,8 @@ kindergarten,TEK97,Electricity,DH,0.25,0.5
     pd.testing.assert_frame_equal(result, expected)
 
 
-def test_project_heating_systems_different_years_in_data():
+@pytest.mark.parametrize('engine', ['pandas', 'numpy'])
+def test_project_heating_systems_different_years_in_data(engine: str):
     shares_start_year_all_systems = pd.read_csv(io.StringIO("""
 kindergarten,TEK97,Electricity,2022,1
 kindergarten,TEK97,DH,2022,0.0
@@ -330,7 +409,7 @@ kindergarten,TEK97,Electricity,DH,0.25,0.5,0.75
 """.strip()),
                                    names=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS, 2021, 2022, 2023], skipinitialspace=True)
 
-    result = project_heating_systems(shares_start_year_all_systems, projected_shares, YearRange(2022,2023))
+    result = project_heating_systems(shares_start_year_all_systems, projected_shares, YearRange(2022,2023), engine=engine)
 
     expected = pd.read_csv(io.StringIO("""
 2023,kindergarten,TEK97,DH,0.75
@@ -416,6 +495,19 @@ kindergarten,TEK97,Gas,2021,0.5
     logger.remove()
 
 
+def test_sum_of_shares_errors():
+    projected_shares = pd.DataFrame(data=[['house', 'TEK97', 'DH', 2020, 0.5],
+                                          ['house', 'TEK97', 'Gas', 2020, 0.5],
+                                          ['house', 'TEK97', 'DH', 2021, 0.5],
+                                          ['house', 'TEK97', 'Gas', 2021, 0.4]],
+                                    columns=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, YEAR, HEATING_SYSTEM_SHARE])
+
+    errors = sum_of_shares_errors(projected_shares, precision=5)
+
+    assert errors.index.to_list() == [('house', 'TEK97', 2021)]
+    assert errors[HEATING_SYSTEM_SHARE].round(5).to_list() == [0.9]
+
+
 def test_check_sum_of_shares_ignore_tiny_deviations():
     """Make sure that check_sum_of_share does not log error when the sum of heating_system_share similar enough to 1."""
     projected_shares = pd.read_csv(io.StringIO("""
@@ -436,7 +528,8 @@ house,TEK97,Electricity,2021,0.5
     logger.remove()
 
 
-def test_calculate_forecast_ok(building_code_list):
+@pytest.mark.parametrize('engine', ['pandas', 'numpy'])
+def test_calculate_forecast_ok(building_code_list, engine: str):
     """Test that calculate_forecast method runs ok with input that is correct."""
     shares_start_year = pd.read_csv(io.StringIO("""
 kindergarten,TEK97,Electricity,2020,0.5
@@ -472,7 +565,7 @@ kindergarten,TEK97,Electricity,DH,0.25,0.5,0.5,0.5
                                  building_code_list=building_code_list,
                                  period=YearRange(2020,2022))
 
-    result = hsp.calculate_forecast()
+    result = hsp.calculate_forecast(engine=engine)
 
     expected = pd.read_csv(io.StringIO("""
 kindergarten,TEK97,Electricity,2020,0.5,0
@@ -495,6 +588,40 @@ kindergarten,TEK97,Gas,2022,0.5,0
     pd.testing.assert_frame_equal(result, expected)
 
 
+def test_project_heating_systems_numpy_engine_equals_pandas_engine():
+    dm = DatabaseManager(FileHandler(directory=pathlib.Path(__file__).parent / 'data' / 'kalibrert'))
+    hsp = HeatingSystemsForecast.new_instance(YearRange(2023, 2050), dm)
+    shares = add_missing_heating_systems(hsp.shares_start_year, HeatingSystems, hsp.period.start)
+    projected_shares = expand_building_category_building_code(hsp.forecast, hsp.building_code_list)
+
+    expected = project_heating_systems(shares, projected_shares, hsp.period)
+    result = project_heating_systems(shares, projected_shares, hsp.period, engine='numpy')
+
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True), check_exact=True)
+
+
+def test_compile_heating_system_transitions():
+    projected_shares = pd.DataFrame(
+        data=[['kindergarten', 'TEK97', 'Electricity', 'DH', 0.25, 0.5],
+              ['kindergarten', 'TEK97', 'Gas', 'DH', 0.1, 0.2],
+              ['school', 'TEK97', 'Electricity', 'DH', 0.3, 0.4]],
+        columns=[BUILDING_CATEGORY, BUILDING_CODE, HEATING_SYSTEMS, NEW_HEATING_SYSTEMS, '2021', '2022'])
+
+    transitions = compile_heating_system_transitions(projected_shares, YearRange(2021, 2022))
+
+    assert transitions.keys.to_list() == [('kindergarten', 'TEK97'), ('school', 'TEK97')]
+    assert transitions.groups.tolist() == [0, 0, 1]
+    assert transitions.heating_systems[transitions.sources].to_list() == ['Electricity', 'Gas', 'Electricity']
+    assert transitions.heating_systems[transitions.targets].to_list() == ['DH', 'DH', 'DH']
+    assert transitions.years.tolist() == [2022]
+    assert transitions.rates.tolist() == [[0.5], [0.2], [0.4]]
+
+
+def test_project_heating_systems_unknown_engine():
+    with pytest.raises(ValueError, match='Unknown engine polars'):
+        project_heating_systems(pd.DataFrame(), pd.DataFrame(), YearRange(2020, 2022), engine='polars')
+
+
 if __name__ == "__main__":
     pytest.main()
 
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ebm.model.heating_systems import (
+    HeatingSystems,
+    explode_heating_system_components,
+    heating_system_catalogue,
+    heating_system_components,
+)
+
+
+def test_heating_system_catalogue():
+    catalogue = heating_system_catalogue()
+
+    assert catalogue.index.to_list() == [str(h) for h in HeatingSystems]
+    assert catalogue.loc['HP - Bio - Electricity'].to_list() == ['HP', 'Bio', 'Electricity']
+    assert catalogue.loc['HP Central heating - Gas'].to_list() == ['HP Central heating', 'Gas', np.nan]
+    assert catalogue.loc['DH'].to_list() == ['DH', np.nan, np.nan]
+
+
+def test_heating_system_components_keeps_index_and_splits_unknown_heating_systems():
+    heating_systems = pd.Series(['HP - Bio - Electricity', 'Electricity', 'Wood -Oil', 'HP - Bio - Electricity'],
+                                index=[10, 5, 7, 3])
+
+    result = heating_system_components(heating_systems, 'peak')
+
+    expected = pd.Series(['Bio', np.nan, 'Oil', 'Bio'], index=[10, 5, 7, 3], name='peak', dtype=object)
+    pd.testing.assert_series_equal(result, expected)
+    assert heating_system_components(heating_systems, 'base').to_list() == ['HP', 'Electricity', 'Wood', 'HP']
+
+
+def test_heating_system_components_raise_value_error_on_unknown_load():
+    with pytest.raises(ValueError, match="Unknown load 'dhw'"):
+        heating_system_components(pd.Series(['DH']), 'dhw')
+
+
+def test_heating_system_components_raise_value_error_on_more_than_three_components():
+    with pytest.raises(ValueError, match='more than 3 components: HP - Bio - Gas - Electricity'):
+        heating_system_components(pd.Series(['DH', 'HP - Bio - Gas - Electricity']), 'base')
+
+
+def test_explode_heating_system_components():
+    df = pd.DataFrame({'heating_systems': ['DH - Bio', 'Electricity', 'HP - Bio - Electricity'], 'v': [1, 2, 3]},
+                      index=[2, 1, 0])
+
+    result = explode_heating_system_components(df)
+
+    expected = pd.DataFrame({'heating_systems': ['DH - Bio', 'DH - Bio', 'Electricity', 'HP - Bio - Electricity',
+                                                 'HP - Bio - Electricity', 'HP - Bio - Electricity'],
+                             'v': [1, 1, 2, 3, 3, 3],
+                             'heating_system': ['DH', 'Bio', 'Electricity', 'HP', 'Bio', 'Electricity']},
+                            index=[2, 2, 1, 0, 0, 0])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_explode_heating_system_components_keeps_rows_without_str_once():
+    df = pd.DataFrame({'heating_systems': ['DH - Bio', np.nan, 5], 'v': [1, 2, 3]})
+
+    result = explode_heating_system_components(df)
+
+    expected = pd.DataFrame({'heating_systems': ['DH - Bio', 'DH - Bio', np.nan, 5],
+                             'v': [1, 1, 2, 3],
+                             'heating_system': ['DH', 'Bio', np.nan, np.nan]},
+                            index=[0, 0, 1, 2])
+    pd.testing.assert_frame_equal(result, expected)
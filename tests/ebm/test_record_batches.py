@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from ebm.services.record_batches import iter_record_batches, write_record_batches
+
+
+@pytest.fixture
+def model() -> pd.DataFrame:
+    df = pd.DataFrame({'building_category': ['house'] * 3 + ['office'] * 2 + ['house'],
+                       'year': [2020, 2021, 2022, 2020, 2021, 2020],
+                       'm2': [1.5, np.nan, 3.5, 4.5, np.inf, 6.5]})
+    return df.set_index(['building_category', 'year'])
+
+
+def test_iter_record_batches_by_building_category(model):
+    batches = list(iter_record_batches(model, batch_size=2))
+
+    assert [b.building_category.tolist() for b in batches] == [['house', 'house'], ['house'], ['office', 'office'],
+                                                                ['house']]
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), model.reset_index())
+
+
+def test_iter_record_batches_keep_index(model):
+    batches = list(iter_record_batches(model, reset_index=False))
+
+    assert [len(b) for b in batches] == [3, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(batches), model)
+
+
+def test_iter_record_batches_return_one_empty_batch_when_output_is_empty(model):
+    batches = list(iter_record_batches(model.iloc[0:0]))
+
+    assert len(batches) == 1
+    assert batches[0].columns.tolist() == ['building_category', 'year', 'm2']
+
+
+@pytest.mark.parametrize(('output_format', 'read'), [
+    ('csv', lambda f: pd.read_csv(f, sep=';')),
+    ('parquet', pd.read_parquet),
+    ('arrow', pd.read_feather)])
+def test_write_record_batches(tmp_path, model, output_format, read):
+    output_file = tmp_path / f'model.{output_format}'
+
+    rows = write_record_batches(iter_record_batches(model, batch_size=2), output_file, output_format, csv_delimiter=';')
+
+    assert rows == len(model)
+    pd.testing.assert_frame_equal(read(output_file), model.reset_index())
+
+
+@pytest.mark.parametrize(('output_format', 'read'), [('parquet', pd.read_parquet), ('arrow', pd.read_feather)])
+def test_write_record_batches_column_without_values_in_first_batch(tmp_path, output_format, read):
+    output_file = tmp_path / f'model.{output_format}'
+    model = pd.DataFrame({'building_category': ['house', 'house', 'office'],
+                          'hp_source': [None, None, 'Heat pump air-air']})
+
+    write_record_batches(iter_record_batches(model.set_index('building_category')), output_file, output_format)
+
+    pd.testing.assert_frame_equal(read(output_file), model)
+
+
+def test_write_record_batches_xlsx(tmp_path, model):
+    output_file = tmp_path / 'model.xlsx'
+    progress = []
+
+    write_record_batches(iter_record_batches(model, reset_index=False, batch_size=2), output_file, 'xlsx', index=True,
+                         progress=progress.append)
+
+    assert [len(b) for b in progress] == [2, 1, 2, 1]
+    worksheet = load_workbook(output_file).active
+    assert [[c.value for c in row] for row in worksheet.iter_rows()] == [
+        ['building_category', 'year', 'm2'],
+        ['house', 2020, 1.5], ['house', 2021, None], ['house', 2022, 3.5],
+        ['office', 2020, 4.5], ['office', 2021, 'inf'], ['house', 2020, 6.5]]
+    assert worksheet['A2'].font.b
+    assert worksheet['B2'].font.b
+    assert not worksheet['C2'].font.b
@@ -1,6 +1,19 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
 import pytest
+from openpyxl import load_workbook
 
-from ebm.services.spreadsheet import SpreadsheetCell
+from ebm.services.spreadsheet import (
+    SpreadsheetCell,
+    WorkbookSheet,
+    column_number_format,
+    column_width,
+    write_pretty_workbook,
+    write_styled_workbook,
+    write_workbooks,
+)
 
 
 def test_spreadsheet_cell_first_row():
@@ -45,3 +58,73 @@ def test_spreadsheet_submatrix():
         SpreadsheetCell(column=2, row=4, value=None),
         SpreadsheetCell(column=3, row=4,  value=None),
     )
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_write_workbooks(tmp_path, max_workers):
+    df = pd.DataFrame({'building_category': ['house', 'office'], 'year': [2020, 2021], 'm2': [1000.5, 2000.5]})
+    workbooks = {tmp_path / 'b.xlsx': [WorkbookSheet('wide', df), WorkbookSheet('long', df, top_row_filter=True)],
+                 tmp_path / 'a.xlsx': [WorkbookSheet('long', df.set_index('building_category'), index=True)]}
+
+    written = list(write_workbooks(workbooks, max_workers=max_workers))
+
+    assert written == [tmp_path / 'b.xlsx', tmp_path / 'a.xlsx']
+    b = load_workbook(tmp_path / 'b.xlsx')
+    assert b.sheetnames == ['wide', 'long']
+    assert b['wide'].auto_filter.ref is None
+    assert b['long'].auto_filter.ref == 'A1:C1'
+    assert [c.value for c in b['long'][2]] == ['house', 2020, 1000.5]
+    a = load_workbook(tmp_path / 'a.xlsx')
+    assert [c.value for c in a['long'][1]] == ['building_category', 'year', 'm2']
+
+
+@pytest.mark.parametrize(('values', 'expected'), [
+    ([2020, 2021], '_-* #,##0_-;[Red]\\-* #,##0_-;_-* "-"??_-;_-@_-'),
+    ([0.1, 0.9, np.nan], '0.000'),
+    ([-0.5, 1.9, 0.0], '0.000'),
+    ([12.5, 3.0], ''),
+    (['house', 'office'], ''),
+    ([0.0, np.nan], '')])
+def test_column_number_format(values, expected):
+    assert column_number_format(pd.Series(values)) == expected
+
+
+@pytest.mark.parametrize(('header', 'values', 'expected'), [
+    ('building_category', ['house', 'apartment_block'], 18),
+    ('U', ['m2'], 5),
+    (2020, [273023995.5, -12.25], 12),
+    ('m2', [-1234.5, 1e-05, np.nan], 8),
+    ('m2', [np.inf, 1.0], 5)])
+def test_column_width(header, values, expected):
+    assert column_width(header, pd.Series(values)) == expected
+
+
+def _cell_styles(workbook_file: pathlib.Path) -> dict:
+    workbook = load_workbook(workbook_file)
+    styles = {}
+    for worksheet in workbook:
+        widths = {i: int(((256 * d.width + int(128 / 7)) / 256) * 7)
+                  for d in worksheet.column_dimensions.values() for i in range(d.min, d.max + 1)}
+        formatting = sorted((str(cf.sqref), tuple(rule.formula), rule.dxf.fill.bgColor.rgb[-6:].lower())
+                            for cf in worksheet.conditional_formatting for rule in cf.rules)
+        styles[worksheet.title] = (worksheet.freeze_panes, worksheet.auto_filter.ref, widths, formatting)
+        for row in worksheet.iter_rows():
+            for c in row:
+                styles[worksheet.title, c.coordinate] = (
+                    c.value, c.data_type, c.font.name, c.font.b, c.font.color.rgb[-6:].lower(), c.fill.fill_type,
+                    c.fill.fgColor.rgb[-6:].lower() if c.fill.fill_type else None, c.border.left.style,
+                    c.alignment.horizontal, c.number_format)
+    return styles
+
+
+def test_write_styled_workbook_looks_like_make_pretty(tmp_path):
+    df = pd.DataFrame({'building_category': ['house', None, 'office'], 'year': [2020, 2021, 2022],
+                       'share': [0.25, np.nan, 1.0], 'gwh': [-1500.5, 12345678.25, 0.0], 'tiny': [1e-05, 0.5, -0.25],
+                       'flag': [True, False, True], 2020: [1, 2, 3]})
+    long = df.set_index(['year', 'building_category'])
+    sheets = [WorkbookSheet('wide', df), WorkbookSheet('long', long, index=True, merge_cells=False, top_row_filter=True)]
+
+    write_pretty_workbook(tmp_path / 'expected.xlsx', sheets)
+    write_styled_workbook(tmp_path / 'actual.xlsx', sheets)
+
+    assert _cell_styles(tmp_path / 'actual.xlsx') == _cell_styles(tmp_path / 'expected.xlsx')
@@ -0,0 +1,75 @@
+import threading
+import typing
+
+import pytest
+
+from ebm.services.stage_graph import Stage, StageGraph
+
+
+def make_graph(calls: list) -> StageGraph:
+    def stage(name: str, value: int) -> typing.Callable[..., int]:
+        def run(**inputs: int) -> int:
+            calls.append(name)
+            return value + sum(inputs.values())
+        return run
+
+    return StageGraph([Stage('a', stage('a', 1)),
+                       Stage('b', stage('b', 10)),
+                       Stage('c', stage('c', 100), ('a',)),
+                       Stage('d', stage('d', 1000), ('b', 'c'))])
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_run_returns_output_of_every_stage(max_workers):
+    calls = []
+    result = make_graph(calls).run(max_workers=max_workers)
+
+    assert result == {'a': 1, 'b': 10, 'c': 101, 'd': 1111}
+    assert calls.index('a') < calls.index('c') < calls.index('d')
+    assert calls.index('b') < calls.index('d')
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_run_only_runs_ancestors_of_targets(max_workers):
+    calls = []
+    result = make_graph(calls).run(targets=['c'], max_workers=max_workers)
+
+    assert result == {'c': 101}
+    assert sorted(calls) == ['a', 'c']
+
+
+def test_ancestors_in_topological_order():
+    assert make_graph([]).ancestors(['d']) == ['a', 'b', 'c', 'd']
+    with pytest.raises(KeyError):
+        make_graph([]).ancestors(['e'])
+
+
+def test_run_independent_stages_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = StageGraph([Stage('a', barrier.wait), Stage('b', barrier.wait),
+                        Stage('c', lambda a, b: sorted([a, b]), ('a', 'b'))])
+
+    assert graph.run(targets=['c'], max_workers=2) == {'c': [0, 1]}
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_run_raises_exception_from_stage(max_workers):
+    def fail() -> None:
+        raise ValueError('failed')
+
+    calls = []
+    graph = StageGraph([Stage('a', fail), Stage('b', lambda a: calls.append('b'), ('a',))])
+
+    with pytest.raises(ValueError, match='failed'):
+        graph.run(max_workers=max_workers)
+    assert calls == []
+
+
+@pytest.mark.parametrize(('stages', 'match'), [
+    pytest.param([Stage('a', print), Stage('a', print)], 'Duplicate stage a', id='duplicate'),
+    pytest.param([Stage('a', print, ('b',))], 'Stage a has unknown input b', id='unknown input'),
+    pytest.param([Stage('a', print, ('b',)), Stage('b', print, ('a',))], 'in a cycle: a -> b -> a', id='cycle'),
+])
+def test_stage_graph_raise_value_error_on_invalid_graph(stages, match):
+    with pytest.raises(ValueError, match=match):
+        StageGraph(stages)
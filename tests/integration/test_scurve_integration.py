@@ -1,8 +1,11 @@
 import pathlib
 
 import pandas as pd
+import pytest
 
 import ebm.areaforecast.s_curve
+from ebm.model.data_classes import YearRange
+from ebm.model.file_handler import FileHandler
 
 
 def test_scurves():
@@ -17,3 +20,20 @@ def test_scurves():
 
     pd.testing.assert_series_equal(actual.rate, expected.share, check_names=False)
 
+
+
+@pytest.mark.parametrize('diagnostics', [False, True])
+@pytest.mark.parametrize('years', [YearRange(2020, 2050), YearRange(2020, 2070)])
+def test_normalize_scurve_conditions_numpy_engine_is_identical_to_pandas(years, diagnostics):
+    p = pathlib.Path(__file__).parent
+    scurve_parameters = pd.read_csv(p / 'test_scurve_integration_parameter.csv')
+    building_code_parameters = pd.read_csv(FileHandler.default_data_directory() / FileHandler.BUILDING_CODE_PARAMS)
+    s_curves_with_building_code = ebm.areaforecast.s_curve.calculate_scurves_with_building_code(
+        building_code_parameters, scurve_parameters, years)
+
+    expected = ebm.areaforecast.s_curve.normalize_scurve_conditions(s_curves_with_building_code.copy(), years,
+                                                                      diagnostics=diagnostics)
+    actual = ebm.areaforecast.s_curve.normalize_scurve_conditions(s_curves_with_building_code, years, engine='numpy',
+                                                                    diagnostics=diagnostics)
+
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)